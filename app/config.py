@@ -15,6 +15,20 @@ class Settings(BaseSettings):
         alias="DATABASE_URL"
     )
     
+    # Connection pool (PostgreSQL)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # ثواني - إعادة فتح الاتصالات القديمة
+    db_pool_timeout: int = 30  # ثواني - انتظار اتصال متاح
+    
+    # Read replica (اختياري) - عند غيابه تذهب القراءات إلى القاعدة الأساسية
+    database_replica_url: str = Field(
+        default="",
+        alias="DATABASE_REPLICA_URL"
+    )
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval: float = 10.0
+    
     # Security
     secret_key: str = Field(
         default="your-super-secret-key-change-this-in-production",
@@ -26,6 +40,34 @@ class Settings(BaseSettings):
     
     # AI
     gemini_api_key: str = ""
+    # كاش أوصاف الوحدات المولدة: الصلاحية بالثواني (0 = معطل) وعدد العناصر في ذاكرة العامل
+    ai_description_cache_seconds: float = 7 * 24 * 3600
+    ai_description_cache_size: int = 1024
+    
+    # SQL instrumentation - عدد تكرار الاستعلام نفسه لاعتباره N+1
+    sql_n_plus_one_threshold: int = 5
+    # الحد الأقصى للاستعلامات لكل طلب (0 = بدون حد) - يُطبق في وضع الاختبار فقط
+    sql_query_budget: int = 0
+    
+    # مدة الاحتفاظ بإصدارات الجداول في ذاكرة العامل (ETag للقوائم المرجعية)
+    etag_version_cache_seconds: float = 1.0
+    
+    # الحد الأقصى لعدد الطلبات الفرعية في POST /api/batch
+    batch_max_requests: int = 20
+    
+    # محلل الأداء: نسبة الطلبات التي تُحلل تلقائياً (0 = فقط بترويسة X-Profile من مدير)
+    profiler_sample_rate: float = 0.0
+    profiler_interval_ms: float = 5.0
+    # مجلد ملفات التحليل (فارغ = مجلد مؤقت) وعدد الملفات المحتفظ بها
+    profiler_dir: str = ""
+    profiler_max_profiles: int = 50
+    
+    # سجل الاستعلامات البطيئة: الحد بالمللي ثانية (0 = معطل) وفترة الكتابة إلى الجدول
+    slow_query_threshold_ms: float = 200.0
+    slow_query_flush_seconds: float = 5.0
+    
+    # تسويات الملاك: عدد العمليات لإنشاء كشوف الحساب (0 أو 1 = في نفس العملية)
+    settlement_workers: int = 0
     
     # CORS - Frontend URL
     frontend_url: str = Field(
@@ -37,6 +79,10 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.environment == "production"
     
+    @property
+    def is_test(self) -> bool:
+        return self.environment == "test"
+    
     @property
     def cors_origins(self) -> list:
         """Get allowed CORS origins based on environment"""
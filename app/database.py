@@ -1,9 +1,16 @@
 import os
 import sys
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from .config import settings
+from .utils.query_stats import install_query_instrumentation
+from .utils.slow_query_log import install_slow_query_log
+from .utils.batch_context import get_batch_context
+
 # Get database URL directly from environment variable
 database_url = os.environ.get("DATABASE_URL")
 
@@ -46,28 +53,104 @@ print(f"🔗 Using database: {database_url[:40]}...")
 if database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql://", 1)
 
-# Handle SQLite special case for check_same_thread
-connect_args = {}
-if database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
 # Check if production
 is_production = os.environ.get("ENVIRONMENT", "development") == "production"
 
-engine = create_engine(
-    database_url,
-    connect_args=connect_args,
-    echo=not is_production,
-    pool_pre_ping=True,
-)
+
+def _engine_options(url: str) -> dict:
+    """إعدادات المحرك - أحجام الـ pool قابلة للضبط من Settings (لا تنطبق على SQLite)"""
+    options = {
+        "echo": not is_production,
+        "pool_pre_ping": True,
+    }
+    if url.startswith("sqlite"):
+        # Handle SQLite special case for check_same_thread
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+engine = create_engine(database_url, **_engine_options(database_url))
+
+# قياس عدد الاستعلامات وزمنها لكل طلب (انظر QueryStatsMiddleware)
+install_query_instrumentation(engine)
+# سجل الاستعلامات البطيئة مع خطط التنفيذ (GET /api/diagnostics/slow-queries)
+install_slow_query_log(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ======== النسخة المتماثلة للقراءة (Read Replica) - اختيارية ========
+replica_url = settings.database_replica_url
+if replica_url.startswith("postgres://"):
+    replica_url = replica_url.replace("postgres://", "postgresql://", 1)
+
+replica_engine = None
+if replica_url:
+    print(f"📖 Using read replica: {replica_url[:40]}...")
+    replica_engine = create_engine(replica_url, **_engine_options(replica_url))
+    install_query_instrumentation(replica_engine)
+    install_slow_query_log(replica_engine)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine or engine)
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+_replica_lock = threading.Lock()
+_replica_state = {"checked_at": float("-inf"), "usable": True}
+
+
+def replica_is_usable() -> bool:
+    """
+    هل يمكن القراءة من النسخة المتماثلة؟
+    يُفحص التأخير كل replica_lag_check_interval ثانية، وإذا تجاوز
+    replica_max_lag_seconds أو تعذر الاتصال تُوجه القراءات إلى الأساسية
+    """
+    if replica_engine is None:
+        return False
+    
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] < settings.replica_lag_check_interval:
+        return _replica_state["usable"]
+    
+    with _replica_lock:
+        if now - _replica_state["checked_at"] < settings.replica_lag_check_interval:
+            return _replica_state["usable"]
+        try:
+            with replica_engine.connect() as conn:
+                if replica_engine.dialect.name == "postgresql":
+                    lag = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+            usable = lag <= settings.replica_max_lag_seconds
+            if not usable:
+                print(f"⚠️  Read replica lagging {lag:.1f}s - reading from primary")
+        except Exception as e:
+            print(f"⚠️  Read replica unavailable - reading from primary: {e}")
+            usable = False
+        _replica_state["checked_at"] = time.monotonic()
+        _replica_state["usable"] = usable
+    return usable
+
 Base = declarative_base()
 
 
 def get_db():
     """Dependency to get database session"""
+    batch = get_batch_context()
+    if batch is not None:
+        # طلب فرعي داخل /api/batch: الجلسة المشتركة (يغلقها الطلب المجمع)
+        yield batch.db
+        return
+    
     db = SessionLocal()
     try:
         yield db
@@ -75,6 +158,28 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """
+    Dependency لجلسة قراءة فقط (للـ GET الثقيلة: لوحة التحكم، القوائم، الإحصائيات)
+    تستخدم النسخة المتماثلة إن وجدت وكانت ضمن حد التأخير، وإلا القاعدة الأساسية
+    """
+    batch = get_batch_context()
+    if batch is not None:
+        yield batch.read_db(lambda: ReadSessionLocal() if replica_is_usable() else batch.db)
+        return
+    
+    db = open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def open_read_session():
+    """جلسة قراءة (النسخة المتماثلة إن كانت صالحة) يغلقها المستدعي - للاستجابات المتدفقة بعد انتهاء الـ endpoint"""
+    return ReadSessionLocal() if replica_is_usable() else SessionLocal()
+
+
 def create_tables():
     """Create all tables in the database"""
     Base.metadata.create_all(bind=engine)
@@ -110,17 +215,48 @@ def run_migrations():
         ("units.amenities", "ALTER TABLE units ADD COLUMN IF NOT EXISTS amenities TEXT"),
         ("units.floor_number", "ALTER TABLE units ADD COLUMN IF NOT EXISTS floor_number INTEGER DEFAULT 0"),
         ("units.unit_area", "ALTER TABLE units ADD COLUMN IF NOT EXISTS unit_area FLOAT DEFAULT 0"),
+        # Units table - indexes for filtered / paginated listing
+        ("ix_units_created_at_id", "CREATE INDEX IF NOT EXISTS ix_units_created_at_id ON units (created_at, id)"),
+        ("ix_units_project_id", "CREATE INDEX IF NOT EXISTS ix_units_project_id ON units (project_id)"),
+        ("ix_units_status", "CREATE INDEX IF NOT EXISTS ix_units_status ON units (status)"),
+        # Units table - amenity containment search (amenities::jsonb @> '["..."]')
+        ("ix_units_amenities_gin", "CREATE INDEX IF NOT EXISTS ix_units_amenities_gin ON units USING GIN ((amenities::jsonb) jsonb_path_ops)"),
         
         # Bookings table
         ("bookings.created_by_id", "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS created_by_id VARCHAR(36) REFERENCES users(id) ON DELETE SET NULL"),
         ("bookings.updated_by_id", "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS updated_by_id VARCHAR(36) REFERENCES users(id) ON DELETE SET NULL"),
         ("bookings.customer_id", "ALTER TABLE bookings ADD COLUMN IF NOT EXISTS customer_id VARCHAR(36) REFERENCES customers(id) ON DELETE SET NULL"),
+        # Bookings table - customer booking history (keyset by check-in date)
+        ("ix_bookings_customer_check_in_id", "CREATE INDEX IF NOT EXISTS ix_bookings_customer_check_in_id ON bookings (customer_id, check_in_date, id)"),
+        
+        # Transactions table - ledger keyset pagination on (date, id)
+        ("ix_transactions_project_date_id", "CREATE INDEX IF NOT EXISTS ix_transactions_project_date_id ON transactions (project_id, date, id)"),
+        ("ix_transactions_date_id", "CREATE INDEX IF NOT EXISTS ix_transactions_date_id ON transactions (date, id)"),
         
         # Customers table
         ("customers.booking_count", "ALTER TABLE customers ADD COLUMN IF NOT EXISTS booking_count INTEGER DEFAULT 0"),
         ("customers.is_banned", "ALTER TABLE customers ADD COLUMN IF NOT EXISTS is_banned BOOLEAN DEFAULT FALSE"),
         ("customers.ban_reason", "ALTER TABLE customers ADD COLUMN IF NOT EXISTS ban_reason TEXT"),
         ("customers.gender", "ALTER TABLE customers ADD COLUMN IF NOT EXISTS gender VARCHAR(20)"),
+        # Customers table - filtering / sorting by visitor type and customer status
+        ("ix_customers_completed_booking_count_id", "CREATE INDEX IF NOT EXISTS ix_customers_completed_booking_count_id ON customers (completed_booking_count, id)"),
+        ("ix_customers_created_at_id", "CREATE INDEX IF NOT EXISTS ix_customers_created_at_id ON customers (created_at, id)"),
+        # Customers table - keyset sort keys must be NOT NULL (a NULL cursor value skips rows, and NULLs sort differently per dialect)
+        ("customers.booking_count backfill", "UPDATE customers SET booking_count = 0 WHERE booking_count IS NULL"),
+        ("customers.booking_count default", "ALTER TABLE customers ALTER COLUMN booking_count SET DEFAULT 0"),
+        ("customers.booking_count not null", "ALTER TABLE customers ALTER COLUMN booking_count SET NOT NULL"),
+        ("customers.completed_booking_count backfill", "UPDATE customers SET completed_booking_count = 0 WHERE completed_booking_count IS NULL"),
+        ("customers.completed_booking_count default", "ALTER TABLE customers ALTER COLUMN completed_booking_count SET DEFAULT 0"),
+        ("customers.completed_booking_count not null", "ALTER TABLE customers ALTER COLUMN completed_booking_count SET NOT NULL"),
+        ("customers.total_revenue backfill", "UPDATE customers SET total_revenue = 0 WHERE total_revenue IS NULL"),
+        ("customers.total_revenue default", "ALTER TABLE customers ALTER COLUMN total_revenue SET DEFAULT 0"),
+        ("customers.total_revenue not null", "ALTER TABLE customers ALTER COLUMN total_revenue SET NOT NULL"),
+        ("customers.created_at backfill", "UPDATE customers SET created_at = '1970-01-01' WHERE created_at IS NULL"),
+        ("customers.created_at not null", "ALTER TABLE customers ALTER COLUMN created_at SET NOT NULL"),
+        # Customers table - fuzzy search by normalized name / phone substring (LIKE '%...%')
+        ("customers.search_text", "ALTER TABLE customers ADD COLUMN IF NOT EXISTS search_text VARCHAR(300)"),
+        ("pg_trgm", "CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+        ("ix_customers_search_trgm", "CREATE INDEX IF NOT EXISTS ix_customers_search_trgm ON customers USING GIN (search_text gin_trgm_ops)"),
     ]
     
     with engine.connect() as conn:
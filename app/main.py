@@ -1,14 +1,30 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .database import create_tables, run_migrations, get_db, SessionLocal
+from .database import create_tables, run_migrations, get_db, SessionLocal, engine, replica_engine
 from .models.user import User, UserRole, SYSTEM_OWNER_DATA
 from .utils.security import hash_password
+from .services.table_versions import install_table_versioning, ensure_table_versions
+from .services.unit_amenities import install_amenity_index, ensure_unit_amenities
+from .services.customer_search import install_customer_search, ensure_customer_search
+from .services.customer_stats import ensure_customer_sort_keys, ensure_customer_stats, install_customer_stats
+from .services.monthly_pnl import install_monthly_pnl, ensure_monthly_pnl
+from .utils.query_stats import QueryStatsMiddleware
+from .utils.profiler import ProfilerMiddleware
+from .utils.metrics import MetricsMiddleware, install_pool_metrics, monitor_event_loop_lag, render_metrics
 
 # Import all routers
-from .routers import auth, users, owners, projects, units, bookings, transactions, dashboard, ai, customers, employee_performance
+from .routers import auth, users, owners, projects, units, bookings, transactions, dashboard, ai, customers, employee_performance, batch, diagnostics, settlements, exports
+
+# سجلات التطبيق المنظمة (mnam.*) تُكتب إلى stdout
+_app_logger = logging.getLogger("mnam")
+if not _app_logger.handlers:
+    _app_logger.addHandler(logging.StreamHandler())
+    _app_logger.setLevel(logging.INFO)
 
 
 @asynccontextmanager
@@ -20,6 +36,13 @@ async def lifespan(app: FastAPI):
     
     db = SessionLocal()
     try:
+        ensure_table_versions(db)
+        ensure_unit_amenities(db)
+        ensure_customer_search(db)
+        ensure_customer_sort_keys(db)
+        ensure_customer_stats(db)
+        ensure_monthly_pnl(db)
+        
         # إنشاء مالك النظام (System Owner) إذا لم يكن موجوداً
         system_owner = db.query(User).filter(User.is_system_owner == True).first()
         if not system_owner:
@@ -62,12 +85,28 @@ async def lifespan(app: FastAPI):
     print("✅ Database tables created")
     print("📝 API Documentation: http://localhost:8000/docs")
     
+    # مراقبة تأخر حلقة الأحداث (لمقياس /metrics)
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    
     yield
     
     # Shutdown
+    lag_monitor.cancel()
     print("👋 Shutting down mnam-backend...")
 
 
+# زيادة إصدار الجدول مع كل كتابة (لحساب ETag للقوائم المرجعية)
+install_table_versioning()
+# جدول مرافق الوحدات للبحث (على القواعد التي لا تدعم JSONB)
+install_amenity_index()
+# نص البحث الموحد للعملاء (الاسم العربي ورقم الجوال)
+install_customer_search()
+# عدادات العميل (عدد الحجوزات، المكتملة، الإيراد) تُحدث مع كل تغيير على الحجز
+install_customer_stats()
+# ملخص الأرباح والخسائر الشهري يُحدث مع كل تغيير على المعاملات المالية
+install_monthly_pnl()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="منام - Mnam Backend API",
@@ -89,6 +128,31 @@ app.add_middleware(
     allow_credentials=False,   # True فقط لو Cookies
     allow_methods=["*"],
     allow_headers=["*"],
+    # ترويسات يقرأها الفرونت إند (مؤشر الصفحة التالية، اسم ملف التصدير، مصدر وصف AI، نتائج بحث مقطوعة)
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Content-Disposition", "X-AI-Cache", "X-Search-Truncated"],
+)
+
+# مقاييس Prometheus (زمن الطلب وحالته حسب المسار) - يجب أن يكون داخل QueryStatsMiddleware
+app.add_middleware(MetricsMiddleware)
+install_pool_metrics(engine)
+if replica_engine is not None:
+    install_pool_metrics(replica_engine, "replica")
+
+# محلل الأداء للطلبات المختارة (ترويسة X-Profile من مدير أو نسبة عشوائية) - داخل QueryStatsMiddleware
+app.add_middleware(
+    ProfilerMiddleware,
+    sample_rate=settings.profiler_sample_rate,
+    interval_ms=settings.profiler_interval_ms,
+)
+
+# إحصائيات الاستعلامات لكل طلب: ترويسات في التطوير، سجلات منظمة في الإنتاج
+app.add_middleware(
+    QueryStatsMiddleware,
+    expose_headers=not settings.is_production,
+    log_results=settings.is_production,
+    n_plus_one_threshold=settings.sql_n_plus_one_threshold,
+    enforce_budget=settings.is_test,
+    query_budget=settings.sql_query_budget,
 )
 
 # Include routers
@@ -100,9 +164,13 @@ app.include_router(units.router)
 app.include_router(bookings.router)
 app.include_router(customers.router)
 app.include_router(transactions.router)
+app.include_router(settlements.router)
+app.include_router(exports.router)
 app.include_router(dashboard.router)
 app.include_router(ai.router)
 app.include_router(employee_performance.router)
+app.include_router(batch.router)
+app.include_router(diagnostics.router)
 
 
 @app.get("")
@@ -122,3 +190,10 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -3,9 +3,16 @@ from .user import User
 from .owner import Owner
 from .project import Project
 from .unit import Unit
+from .unit_amenity import UnitAmenity
 from .booking import Booking
 from .transaction import Transaction
+from .monthly_pnl import MonthlyPnl
+from .owner_settlement import OwnerSettlement
 from .customer import Customer
+from .table_version import TableVersion
+from .startup_step import StartupStep
+from .slow_query import SlowQuery
+from .ai_description import AiDescription
 from .employee_performance import (
     EmployeeActivityLog,
     EmployeeTarget,
@@ -18,7 +25,7 @@ from .employee_performance import (
 )
 
 __all__ = [
-    "User", "Owner", "Project", "Unit", "Booking", "Transaction", "Customer",
+    "User", "Owner", "Project", "Unit", "UnitAmenity", "Booking", "Transaction", "MonthlyPnl", "OwnerSettlement", "Customer", "TableVersion", "StartupStep", "SlowQuery", "AiDescription",
     "EmployeeActivityLog", "EmployeeTarget", "EmployeePerformanceSummary",
     "ActivityType", "TargetPeriod", "ACTIVITY_LABELS", "ACTIVITY_BY_ROLE", "KPIDefinition"
 ]
@@ -0,0 +1,18 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime
+from ..database import Base
+
+
+class AiDescription(Base):
+    """
+    وصف تسويقي مولد بالذكاء الاصطناعي محفوظ حسب بصمة طلب التوليد
+    كاش دائم مشترك بين العمال وبعد إعادة التشغيل، صلاحيته ai_description_cache_seconds من created_at
+    """
+    __tablename__ = "ai_descriptions"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256 لطلب التوليد بعد التطبيع
+    description = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<AiDescription {self.cache_key[:12]} {self.created_at}>"
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Date, Numeric, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Date, Numeric, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import enum
@@ -16,6 +16,10 @@ class BookingStatus(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # سجل حجوزات العميل مرتباً بتاريخ الدخول مع ترقيم الصفحات بالمؤشر
+        Index("ix_bookings_customer_check_in_id", "customer_id", "check_in_date", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     unit_id = Column(String(36), ForeignKey("units.id", ondelete="CASCADE"), nullable=False)
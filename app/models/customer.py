@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, Text, Float, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Text, Float, Index, case, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 import enum
@@ -13,9 +13,22 @@ class GenderEnum(str, enum.Enum):
     FEMALE = "female"  # أنثى
 
 
+# العميل المميز: حجزين مكتملين أو أكثر
+VIP_COMPLETED_BOOKINGS = 2
+# العميل الجديد: أُضيف خلال آخر أسبوعين
+NEW_CUSTOMER_PERIOD = timedelta(weeks=2)
+# تاريخ إضافة العملاء القدامى بلا created_at (يُعبأ به العمود قبل جعله NOT NULL): يبقون "قدامى"
+LEGACY_CREATED_AT = datetime(1970, 1, 1)
+
+
 class Customer(Base):
     """جدول العملاء - يحتوي على بيانات الضيوف المتكررين"""
     __tablename__ = "customers"
+    __table_args__ = (
+        # التصفية والترتيب حسب نوع الزائر وحالة العميل مع ترقيم الصفحات بالمؤشر
+        Index("ix_customers_completed_booking_count_id", "completed_booking_count", "id"),
+        Index("ix_customers_created_at_id", "created_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
@@ -25,10 +38,10 @@ class Customer(Base):
     email = Column(String(255), nullable=True)  # البريد الإلكتروني (اختياري)
     gender = Column(SQLEnum(GenderEnum), nullable=True)  # الجنس (اختياري)
     
-    # إحصائيات
-    booking_count = Column(Integer, default=0)  # عدد مرات الحجز
-    completed_booking_count = Column(Integer, default=0)  # عدد الحجوزات المكتملة
-    total_revenue = Column(Float, default=0.0)  # إجمالي الإيراد من العميل
+    # إحصائيات (مفاتيح ترتيب بالمؤشر: NOT NULL حتى لا يضيع صف بين الصفحات)
+    booking_count = Column(Integer, default=0, server_default="0", nullable=False)  # عدد مرات الحجز
+    completed_booking_count = Column(Integer, default=0, server_default="0", nullable=False)  # عدد الحجوزات المكتملة
+    total_revenue = Column(Float, default=0.0, server_default="0", nullable=False)  # إجمالي الإيراد من العميل
     
     # حالة العميل
     is_banned = Column(Boolean, default=False)  # هل العميل محظور؟
@@ -38,8 +51,11 @@ class Customer(Base):
     # ملاحظات
     notes = Column(Text, nullable=True)
     
+    # نص البحث الموحد: الاسم بدون تشكيل وبهمزات موحدة + أرقام الجوال (services/customer_search.py)
+    search_text = Column(String(300), nullable=True)
+    
     # التواريخ
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # العلاقات
@@ -52,10 +68,15 @@ class Customer(Base):
         - مميز: زيارتين أو أكثر
         - عادي: زيارة واحدة فقط
         """
-        if self.completed_booking_count >= 2:
+        if (self.completed_booking_count or 0) >= VIP_COMPLETED_BOOKINGS:
             return "مميز"
         return "عادي"
     
+    @visitor_type.inplace.expression
+    @classmethod
+    def _visitor_type_expression(cls):
+        return case((cls.completed_booking_count >= VIP_COMPLETED_BOOKINGS, "مميز"), else_="عادي")
+    
     @hybrid_property
     def customer_status(self) -> str:
         """
@@ -64,11 +85,17 @@ class Customer(Base):
         - old: مر أسبوعين أو أكثر على إضافته
         """
         if self.created_at:
-            two_weeks_ago = datetime.utcnow() - timedelta(weeks=2)
+            two_weeks_ago = datetime.utcnow() - NEW_CUSTOMER_PERIOD
             if self.created_at > two_weeks_ago:
                 return "new"
         return "old"
     
+    @customer_status.inplace.expression
+    @classmethod
+    def _customer_status_expression(cls):
+        # الحد الزمني يُحسب عند بناء الاستعلام (قيمة ثابتة يستخدمها فهرس created_at)
+        return case((cls.created_at > datetime.utcnow() - NEW_CUSTOMER_PERIOD, "new"), else_="old")
+    
     def check_profile_complete(self) -> bool:
         """
         التحقق من اكتمال بيانات العميل
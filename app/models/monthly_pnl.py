@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Date, Numeric, Integer, ForeignKey
+from ..database import Base
+
+
+class MonthlyPnl(Base):
+    """
+    ملخص الأرباح والخسائر الشهري (صف لكل مشروع ووحدة وتصنيف وشهر)
+    يُحدث تلقائياً مع كل إضافة أو تعديل أو حذف معاملة (انظر services/monthly_pnl.py)
+    فتقرأ التقارير متعددة السنوات مئات الصفوف بدلاً من مسح دفتر المعاملات
+    """
+    __tablename__ = "monthly_pnl"
+    
+    project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    # "" بدلاً من NULL: أعمدة المفتاح الأساسي لا تقبل NULL
+    unit_id = Column(String(36), primary_key=True, default="")
+    category = Column(String(50), primary_key=True, default="")
+    month = Column(Date, primary_key=True)  # أول يوم في الشهر
+    income = Column(Numeric(14, 2), nullable=False, default=0)
+    expense = Column(Numeric(14, 2), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<MonthlyPnl {self.project_id} {self.month}: {self.income} - {self.expense}>"
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Date, Numeric, Integer, Text, DateTime, JSON, ForeignKey
+from ..database import Base
+
+
+class OwnerSettlement(Base):
+    """
+    تسوية مالك لشهر: الإيرادات والعمولة والمصروفات وصافي المستحق مع كشف الحساب
+    تُنشأ بمحرك التسويات (services/settlements.py) ولا يُعاد إنشاؤها إلا إذا تغيرت بيانات المالك (fingerprint)
+    """
+    __tablename__ = "owner_settlements"
+    
+    owner_id = Column(String(36), ForeignKey("owners.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # أول يوم في الشهر
+    fingerprint = Column(String(64), nullable=False)  # بصمة مدخلات التسوية
+    booking_count = Column(Integer, nullable=False, default=0)
+    gross_revenue = Column(Numeric(14, 2), nullable=False, default=0)
+    commission = Column(Numeric(14, 2), nullable=False, default=0)
+    expenses = Column(Numeric(14, 2), nullable=False, default=0)
+    net_payout = Column(Numeric(14, 2), nullable=False, default=0)
+    projects = Column(JSON, nullable=False, default=list)  # تفاصيل كل مشروع
+    statement = Column(Text, nullable=False, default="")  # كشف الحساب النصي
+    generated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<OwnerSettlement {self.owner_id} {self.month}: {self.net_payout}>"
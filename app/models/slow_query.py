@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, Text, Float
+from ..database import Base
+
+
+class SlowQuery(Base):
+    """
+    سجل الاستعلامات البطيئة - صف واحد لكل شكل استعلام (fingerprint)
+    يُحدث عدده وأزمنته مع كل تكرار، ويُحفظ معه خطة التنفيذ (EXPLAIN)
+    """
+    __tablename__ = "slow_queries"
+    
+    fingerprint = Column(String(16), primary_key=True)  # blake2b لشكل الاستعلام
+    statement = Column(Text, nullable=False)  # الشكل العام بدون قيم
+    param_types = Column(String(500), nullable=True)  # أنواع المعاملات: str,int,date
+    route = Column(String(255), nullable=True)  # آخر مسار API نفذ الاستعلام
+    
+    count = Column(Integer, nullable=False, default=0)
+    total_ms = Column(Float, nullable=False, default=0.0)
+    max_ms = Column(Float, nullable=False, default=0.0)
+    last_ms = Column(Float, nullable=False, default=0.0)
+    
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow)
+    
+    # خطة التنفيذ: EXPLAIN (ANALYZE, BUFFERS) على PostgreSQL، EXPLAIN QUERY PLAN على SQLite
+    explain_plan = Column(Text, nullable=True)
+    explained_at = Column(DateTime, nullable=True)
+    
+    @property
+    def avg_ms(self) -> float:
+        return round(self.total_ms / self.count, 2) if self.count else 0.0
+    
+    def __repr__(self):
+        return f"<SlowQuery {self.fingerprint} x{self.count}>"
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from ..database import Base
+
+
+class StartupStep(Base):
+    """
+    خطوات تصحيح البيانات القائمة التي تعمل مرة واحدة عند أول تشغيل بعد الترقية
+    (services/startup_steps.py) - وجود الصف يعني أن الخطوة اكتملت
+    """
+    __tablename__ = "startup_steps"
+    
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<StartupStep {self.name} @ {self.applied_at}>"
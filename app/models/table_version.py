@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer
+from ..database import Base
+
+
+class TableVersion(Base):
+    """
+    رقم إصدار لكل جدول - يزيد مع كل كتابة على الجدول
+    يُستخدم لحساب ETag للقوائم بدون تحميل صفوفها
+    """
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TableVersion {self.table_name}={self.version}>"
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Date, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, String, Date, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import enum
@@ -13,6 +13,11 @@ class TransactionType(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # دفتر المعاملات مرتباً بالتاريخ مع ترقيم الصفحات بالمؤشر (لمشروع محدد أو لكل المشاريع)
+        Index("ix_transactions_project_date_id", "project_id", "date", "id"),
+        Index("ix_transactions_date_id", "date", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
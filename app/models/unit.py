@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, Numeric, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, String, Integer, Float, Numeric, Text, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 import enum
@@ -29,6 +29,12 @@ class UnitStatus(str, enum.Enum):
 
 class Unit(Base):
     __tablename__ = "units"
+    __table_args__ = (
+        # ترتيب قائمة الوحدات ومؤشر الصفحات (الأحدث أولاً)
+        Index("ix_units_created_at_id", "created_at", "id"),
+        Index("ix_units_project_id", "project_id"),
+        Index("ix_units_status", "status"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String(36), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, ForeignKey, Index
+from ..database import Base
+
+
+class UnitAmenity(Base):
+    """
+    مرافق الوحدات بشكل جدول (صف لكل وحدة ومرفق)
+    بديل فهرس JSONB على القواعد التي لا تدعمه (SQLite) للبحث والتصفية حسب المرافق
+    يُحدث تلقائياً مع كل تعديل على Unit.amenities (انظر services/unit_amenities.py)
+    """
+    __tablename__ = "unit_amenities"
+    __table_args__ = (
+        Index("ix_unit_amenities_amenity", "amenity"),
+    )
+    
+    unit_id = Column(String(36), ForeignKey("units.id", ondelete="CASCADE"), primary_key=True)
+    amenity = Column(String(100), primary_key=True)
+    
+    def __repr__(self):
+        return f"<UnitAmenity {self.unit_id}: {self.amenity}>"
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 
 # Try to import google generativeai, handle if not installed
@@ -11,11 +12,16 @@ except ImportError:
     GENAI_AVAILABLE = False
 
 from ..config import settings
+from ..services.ai_descriptions import DescriptionGenerator, cached_description, description_cache_key
 from ..utils.dependencies import get_current_user
 from ..models.user import User
 
 router = APIRouter(prefix="/api/ai", tags=["الذكاء الاصطناعي"])
 
+GEMINI_MODEL = "gemini-1.5-flash"
+# مصدر الوصف: memory / store / shared / upstream
+AI_CACHE_HEADER = "X-AI-Cache"
+
 
 class GenerateDescriptionRequest(BaseModel):
     unit_type: str
@@ -46,27 +52,37 @@ def get_gemini_model():
         return None
     
     genai.configure(api_key=settings.gemini_api_key)
-    return genai.GenerativeModel('gemini-1.5-flash')
+    return genai.GenerativeModel(GEMINI_MODEL)
 
 
-@router.post("/generate-description")
-@router.post("/generate-description/", response_model=GenerateDescriptionResponse)
-async def generate_unit_description(
-    request: GenerateDescriptionRequest,
-    current_user: User = Depends(get_current_user)
-):
-    """توليد وصف تسويقي للوحدة باستخدام AI"""
+def get_description_generator() -> Optional[DescriptionGenerator]:
+    """
+    مزود توليد الوصف (Gemini) أو None إذا لم يكن متوفراً
+    يُستبدل في الاختبارات بمزود محلي: app.dependency_overrides[get_description_generator]
+    """
     model = get_gemini_model()
-    
     if not model:
-        raise HTTPException(
-            status_code=503,
-            detail="خدمة الذكاء الاصطناعي غير متوفرة. يرجى إضافة GEMINI_API_KEY."
-        )
-    
+        return None
+
+    async def generate(prompt: str) -> str:
+        # generate_content متزامن: يُنفذ خارج حلقة الأحداث
+        response = await run_in_threadpool(model.generate_content, prompt)
+        return response.text
+
+    return generate
+
+
+async def _unavailable(prompt: str) -> str:
+    raise HTTPException(
+        status_code=503,
+        detail="خدمة الذكاء الاصطناعي غير متوفرة. يرجى إضافة GEMINI_API_KEY."
+    )
+
+
+def _description_prompt(request: GenerateDescriptionRequest) -> str:
     amenities_text = "، ".join(request.amenities) if request.amenities else "لا توجد مرافق محددة"
     
-    prompt = f"""
+    return f"""
 أنت كاتب محتوى عقاري محترف. اكتب وصفاً تسويقياً جذاباً وموجزاً (3-4 جمل) لوحدة سكنية بالمواصفات التالية:
 
 - نوع الوحدة: {request.unit_type}
@@ -77,15 +93,34 @@ async def generate_unit_description(
 
 اكتب الوصف باللغة العربية الفصحى بأسلوب تسويقي جذاب يبرز مميزات الوحدة.
 """
-    
+
+
+@router.post("/generate-description")
+@router.post("/generate-description/", response_model=GenerateDescriptionResponse)
+async def generate_unit_description(
+    request: GenerateDescriptionRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    generator: Optional[DescriptionGenerator] = Depends(get_description_generator)
+):
+    """
+    توليد وصف تسويقي للوحدة باستخدام AI
+    نفس المواصفات (بعد التطبيع) تُخدم من الكاش، والطلبات المتزامنة المتطابقة تنتظر استدعاءً واحداً
+    """
+    key = description_cache_key(request.model_dump(), GEMINI_MODEL)
     try:
-        response = model.generate_content(prompt)
-        return GenerateDescriptionResponse(description=response.text)
+        description, source = await cached_description(
+            key, _description_prompt(request), generator or _unavailable
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"خطأ في توليد الوصف: {str(e)}"
         )
+    response.headers[AI_CACHE_HEADER] = source
+    return GenerateDescriptionResponse(description=description)
 
 
 @router.post("/chat")
@@ -0,0 +1,142 @@
+"""
+API الطلبات المجمعة
+Batch endpoint: many GET sub-requests, one auth check, one DB session
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+
+from ..config import settings
+from ..database import get_db
+from ..models.user import User
+from ..schemas.batch import BatchRequest, BatchRequestItem, BatchResponse
+from ..utils.batch_context import BatchContext, batch_scope
+from ..utils.dependencies import get_current_user
+from ..utils.fast_response import FastJSONResponse
+
+router = APIRouter(prefix="/api/batch", tags=["الطلبات المجمعة"])
+logger = logging.getLogger("mnam.batch")
+
+# ترويسات الطلب المجمع التي لا تُمرر للطلبات الفرعية
+_EXCLUDED_HEADERS = {b"content-length", b"content-type", b"accept", b"if-none-match", b"transfer-encoding"}
+
+
+# مفاتيح scope الطلب المجمع التي يرثها الطلب الفرعي (الباقي خاص بمسار /api/batch نفسه)
+_INHERITED_SCOPE_KEYS = (
+    "type", "http_version", "scheme", "root_path", "client", "server", "extensions",
+    "app", "starlette.exception_handlers", "fastapi_middleware_astack",
+)
+
+
+def _sub_scope(parent: Dict[str, Any], item: BatchRequestItem) -> Dict[str, Any]:
+    """ASGI scope للطلب الفرعي مبني على scope الطلب المجمع (نفس التطبيق ونفس ترويسة Authorization)"""
+    path, _, query = item.path.partition("?")
+    headers = [(name, value) for name, value in parent["headers"] if name not in _EXCLUDED_HEADERS]
+    headers.append((b"accept", b"application/json"))
+    scope = {key: parent[key] for key in _INHERITED_SCOPE_KEYS if key in parent}
+    scope.update(
+        method=item.method,
+        path=path,
+        raw_path=path.encode("utf-8"),
+        query_string=query.encode("utf-8"),
+        headers=headers,
+        state=dict(parent.get("state", {})),
+    )
+    return scope
+
+
+def _iter_routes(routes):
+    """كل المسارات الفعلية (FastAPI الحديث يغلف الـ routers المضمنة بدون نسخ مساراتها)"""
+    for route in routes:
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            yield from _iter_routes(included.routes)
+        else:
+            yield route
+
+
+def _resolve(app, scope: Dict[str, Any]):
+    """المسار المطابق للطلب الفرعي (None إذا لم يوجد)"""
+    for route in _iter_routes(app.router.routes):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+async def _dispatch(app, scope: Dict[str, Any]) -> Tuple[int, Optional[bytes], str]:
+    """تنفيذ الطلب الفرعي عبر موجّه التطبيق مباشرة (بدون middleware) وجمع الاستجابة"""
+    status_code = 500
+    content_type = ""
+    chunks: List[bytes] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            for name, value in message.get("headers", []):
+                if name == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app.router(scope, receive, send)
+    return status_code, b"".join(chunks), content_type
+
+
+async def _run_item(app, item: BatchRequestItem, scope: Dict[str, Any], route, db: Session) -> Dict[str, Any]:
+    result = {"id": item.id, "path": item.path, "status": 500, "body": None}
+    if route is None or getattr(route, "path", "").startswith(router.prefix):
+        result.update(status=404, body={"detail": "المسار غير موجود"})
+        return result
+
+    try:
+        status_code, body, content_type = await _dispatch(app, scope)
+    except Exception:
+        # خطأ غير متوقع في طلب فرعي لا يُفشل باقي الطلبات
+        db.rollback()
+        logger.exception("Batch sub-request failed: %s", item.path)
+        result["body"] = {"detail": "خطأ داخلي في الخادم"}
+        return result
+
+    result["status"] = status_code
+    if body:
+        result["body"] = orjson.loads(body) if "json" in content_type else body.decode("utf-8", "replace")
+    return result
+
+
+@router.post("", response_model=BatchResponse)
+@router.post("/", response_model=BatchResponse)
+async def execute_batch(
+    batch: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    تنفيذ عدة طلبات GET في طلب واحد:
+    - التحقق من المستخدم مرة واحدة
+    - جلسة قاعدة بيانات واحدة مشتركة (وجلسة قراءة واحدة عند وجود نسخة متماثلة)
+    - الطلبات تُنفذ بالترتيب واحداً تلو الآخر (الجلسة المشتركة لا تُستخدم من طلبين في نفس اللحظة)،
+      ولكل نتيجة كود حالتها الخاص
+    """
+    if len(batch.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=400,
+            detail=f"الحد الأقصى {settings.batch_max_requests} طلب في الطلب المجمع"
+        )
+
+    app = request.app
+    responses: List[Dict[str, Any]] = []
+    with batch_scope(BatchContext(db, current_user)):
+        for item in batch.requests:
+            scope = _sub_scope(request.scope, item)
+            responses.append(await _run_item(app, item, scope, _resolve(app, scope), db))
+    return FastJSONResponse({"responses": responses})
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, select
 from typing import List, Optional
 from datetime import date, timedelta
 from decimal import Decimal
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.booking import Booking, BookingStatus as BookingStatusEnum
 from ..models.unit import Unit
 from ..models.project import Project
@@ -22,6 +22,7 @@ from ..services.employee_performance_service import (
     log_customer_created
 )
 from ..models.employee_performance import ActivityType
+from ..utils.fast_response import UNKNOWN, list_response, parse_fields, schema_columns, serialize_rows, wants
 
 router = APIRouter(prefix="/api/bookings", tags=["الحجوزات"])
 
@@ -64,86 +65,74 @@ def calculate_booking_price(unit: Unit, check_in: date, check_out: date) -> Deci
     return total
 
 
+# أعمدة قائمة الحجوزات بأسماء حقول BookingResponse (مسار التحويل السريع)
+BOOKING_LIST_COLUMNS = {
+    "id": Booking.id,
+    "unit_id": Booking.unit_id,
+    "guest_name": Booking.guest_name,
+    "guest_phone": Booking.guest_phone,
+    "check_in_date": Booking.check_in_date,
+    "check_out_date": Booking.check_out_date,
+    "total_price": Booking.total_price,
+    "status": Booking.status,
+    "notes": Booking.notes,
+    "project_id": func.coalesce(Project.id, ""),
+    "project_name": func.coalesce(Project.name, UNKNOWN),
+    "unit_name": func.coalesce(Unit.unit_name, UNKNOWN),
+    "created_at": Booking.created_at,
+    "updated_at": Booking.updated_at,
+}
+
+
 @router.get("")
 @router.get("/", response_model=List[BookingResponse])
 async def get_all_bookings(
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,guest_name)"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة جميع الحجوزات"""
-    bookings = db.query(Booking).order_by(Booking.check_in_date.desc()).all()
-    
-    result = []
-    for booking in bookings:
-        unit = booking.unit
-        project = unit.project if unit else None
-        
-        result.append(BookingResponse(
-            id=booking.id,
-            unit_id=booking.unit_id,
-            guest_name=booking.guest_name,
-            guest_phone=booking.guest_phone,
-            check_in_date=booking.check_in_date,
-            check_out_date=booking.check_out_date,
-            total_price=booking.total_price,
-            status=booking.status,
-            notes=booking.notes,
-            project_id=project.id if project else "",
-            project_name=project.name if project else "غير معروف",
-            unit_name=unit.unit_name if unit else "غير معروف",
-            created_at=booking.created_at,
-            updated_at=booking.updated_at
-        ))
-    
-    return result
+    selected = parse_fields(fields, BookingResponse)
+    query = select(*schema_columns(BookingResponse, BOOKING_LIST_COLUMNS, selected)).select_from(Booking)
+    if wants(selected, "unit_name", "project_id", "project_name"):
+        query = query.outerjoin(Unit, Booking.unit_id == Unit.id)
+    if wants(selected, "project_id", "project_name"):
+        query = query.outerjoin(Project, Unit.project_id == Project.id)
+    
+    rows = db.execute(query.order_by(Booking.check_in_date.desc()))
+    return list_response(request, serialize_rows(rows, BookingResponse, selected), BookingResponse, selected)
 
 
 @router.get("/monthly")
 @router.get("/monthly/", response_model=List[BookingResponse])
 async def get_monthly_bookings(
+    request: Request,
     year: int = Query(..., description="السنة"),
     month: int = Query(..., ge=1, le=12, description="الشهر (1-12)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على حجوزات شهر محدد"""
+    """الحصول على حجوزات شهر محدد (مع اسم الوحدة والمشروع من نفس الاستعلام)"""
     start_date = date(year, month, 1)
     if month == 12:
         end_date = date(year + 1, 1, 1)
     else:
         end_date = date(year, month + 1, 1)
     
-    bookings = db.query(Booking).filter(
-        or_(
+    rows = db.execute(
+        select(*schema_columns(BookingResponse, BOOKING_LIST_COLUMNS))
+        .select_from(Booking)
+        .outerjoin(Unit, Booking.unit_id == Unit.id)
+        .outerjoin(Project, Unit.project_id == Project.id)
+        .where(or_(
             and_(Booking.check_in_date >= start_date, Booking.check_in_date < end_date),
             and_(Booking.check_out_date > start_date, Booking.check_out_date <= end_date),
             and_(Booking.check_in_date < start_date, Booking.check_out_date > end_date)
-        )
-    ).order_by(Booking.check_in_date).all()
-    
-    result = []
-    for booking in bookings:
-        unit = booking.unit
-        project = unit.project if unit else None
-        
-        result.append(BookingResponse(
-            id=booking.id,
-            unit_id=booking.unit_id,
-            guest_name=booking.guest_name,
-            guest_phone=booking.guest_phone,
-            check_in_date=booking.check_in_date,
-            check_out_date=booking.check_out_date,
-            total_price=booking.total_price,
-            status=booking.status,
-            notes=booking.notes,
-            project_id=project.id if project else "",
-            project_name=project.name if project else "غير معروف",
-            unit_name=unit.unit_name if unit else "غير معروف",
-            created_at=booking.created_at,
-            updated_at=booking.updated_at
         ))
-    
-    return result
+        .order_by(Booking.check_in_date)
+    )
+    return list_response(request, serialize_rows(rows, BookingResponse), BookingResponse)
 
 
 @router.get("/check-availability")
@@ -243,16 +232,14 @@ async def create_booking(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"العميل محظور. السبب: {customer.ban_reason or 'غير محدد'}"
                 )
-            # تحديث اسم العميل وزيادة عدد الحجوزات
+            # تحديث اسم العميل (عدادات الحجوزات تُحدث تلقائياً مع إدخال الحجز)
             customer.name = booking_data.guest_name
-            customer.booking_count += 1
             customer_id = customer.id
         else:
             # إنشاء عميل جديد
             customer = Customer(
                 name=booking_data.guest_name,
-                phone=booking_data.guest_phone,
-                booking_count=1
+                phone=booking_data.guest_phone
             )
             db.add(customer)
             db.flush()  # للحصول على ID قبل الـ commit
@@ -1,32 +1,294 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-
-from ..database import get_db
-from ..models.customer import Customer
-from ..models.booking import Booking
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import Integer, case, cast, func, select, true
+from datetime import date, datetime
+from typing import List, Literal, Optional
+
+from ..database import get_db, get_read_db
+from ..models.customer import Customer, NEW_CUSTOMER_PERIOD, VIP_COMPLETED_BOOKINGS
+from ..models.booking import Booking, BookingStatus
+from ..models.project import Project
+from ..models.unit import Unit
+from ..schemas.booking import BookingResponse
 from ..schemas.customer import (
     CustomerResponse, CustomerCreate, CustomerUpdate, 
-    CustomerBanUpdate, CustomerWithBookings
+    CustomerBanUpdate, CustomerWithBookings, CustomerStatsResponse,
+    CustomerBookingHistory, CustomerBookingSummary
 )
-from ..utils.dependencies import get_current_user
+from ..utils.dependencies import get_current_user, require_admin
 from ..models.user import User
 from ..services.employee_performance_service import log_customer_created, EmployeePerformanceService
 from ..models.employee_performance import ActivityType
+from ..utils.fast_response import UNKNOWN, list_response, parse_fields, schema_columns, schema_fields, serialize_objects, serialize_rows
+from ..utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER,
+    KeysetPage, decode_cursor, encode_cursor, keyset_condition
+)
+from ..services.customer_search import (
+    MIN_TRIGRAM_TERM, SEARCH_CANDIDATES, TRUNCATED_HEADER, apply_customer_search, search_terms, search_truncated
+)
+from ..services.customer_stats import COMPLETED_STATUSES, reconcile_customer_stats
 
 router = APIRouter(prefix="/api/customers", tags=["العملاء"])
 
 
+# الأعمدة التي تحتاجها الحقول المحسوبة في CustomerResponse
+CUSTOMER_COMPUTED_FIELDS = {
+    "visitor_type": ("completed_booking_count",),
+    "customer_status": ("created_at",),
+}
+
+
+def customer_load_columns(fields):
+    """أعمدة Customer اللازمة لحقول الاستجابة المطلوبة (لـ load_only)"""
+    columns = set()
+    for name in fields:
+        columns.update(CUSTOMER_COMPUTED_FIELDS.get(name, (name,)))
+    return [getattr(Customer, name) for name in sorted(columns)]
+
+
+# أعمدة الترتيب المتاحة ونوع قيمتها في المؤشر (مع id لكسر التعادل)
+CUSTOMER_SORTS = {
+    "created_at": (Customer.created_at, datetime),
+    "completed_booking_count": (Customer.completed_booking_count, int),
+    "booking_count": (Customer.booking_count, int),
+    "total_revenue": (Customer.total_revenue, float),
+    "name": (Customer.name, str),
+}
+
+
+def _customer_filters(
+    visitor_type: Optional[str] = None,
+    customer_status: Optional[str] = None,
+    is_banned: Optional[bool] = None
+) -> list:
+    """
+    شروط التصفية بصيغة تستخدم الفهارس مباشرة
+    (بدلاً من مقارنة تعبير CASE في Customer.visitor_type / customer_status)
+    """
+    conditions = []
+    if visitor_type == "مميز":
+        conditions.append(Customer.completed_booking_count >= VIP_COMPLETED_BOOKINGS)
+    elif visitor_type == "عادي":
+        conditions.append(Customer.completed_booking_count < VIP_COMPLETED_BOOKINGS)
+    cutoff = datetime.utcnow() - NEW_CUSTOMER_PERIOD
+    if customer_status == "new":
+        conditions.append(Customer.created_at > cutoff)
+    elif customer_status == "old":
+        conditions.append(Customer.created_at <= cutoff)
+    if is_banned is not None:
+        conditions.append(Customer.is_banned == is_banned)
+    return conditions
+
+
+# أعمدة سجل حجوزات العميل (BookingResponse) مع اسم الوحدة والمشروع من نفس الاستعلام
+CUSTOMER_BOOKING_COLUMNS = {
+    "id": Booking.id,
+    "unit_id": Booking.unit_id,
+    "guest_name": Booking.guest_name,
+    "guest_phone": Booking.guest_phone,
+    "check_in_date": Booking.check_in_date,
+    "check_out_date": Booking.check_out_date,
+    "total_price": Booking.total_price,
+    "status": Booking.status,
+    "notes": Booking.notes,
+    "project_id": func.coalesce(Project.id, ""),
+    "project_name": func.coalesce(Project.name, UNKNOWN),
+    "unit_name": func.coalesce(Unit.unit_name, UNKNOWN),
+    "customer_id": Booking.customer_id,
+    "created_at": Booking.created_at,
+    "updated_at": Booking.updated_at,
+}
+
+
+def _booking_nights(dialect_name: str):
+    """عدد ليالي الحجز (فرق التاريخين بالأيام)"""
+    if dialect_name == "postgresql":
+        return Booking.check_out_date - Booking.check_in_date
+    return cast(func.julianday(Booking.check_out_date) - func.julianday(Booking.check_in_date), Integer)
+
+
+def _customer_history_query(customer_id: str, where: list, limit: int, dialect_name: str):
+    """
+    صفحة من حجوزات العميل (الأحدث دخولاً أولاً) وملخص كل حجوزاته في استعلام واحد:
+    الملخص صف واحد دائماً تُربط به صفوف الصفحة (LEFT JOIN) فيصل حتى لو كانت الصفحة فارغة
+    كلاهما يقرأ فهرس ix_bookings_customer_check_in_id
+    """
+    active = Booking.status != BookingStatus.CANCELLED.value
+    summary = (
+        select(
+            func.count().label("total_bookings"),
+            func.coalesce(func.sum(case((Booking.status.in_(COMPLETED_STATUSES), 1), else_=0)), 0)
+            .label("completed_bookings"),
+            func.coalesce(func.sum(case((active, 0), else_=1)), 0).label("cancelled_bookings"),
+            func.coalesce(func.sum(case((active, _booking_nights(dialect_name)), else_=0)), 0).label("total_nights"),
+            func.coalesce(func.sum(case((active, Booking.total_price), else_=0)), 0).label("total_spent"),
+            func.min(Booking.check_in_date).label("first_check_in"),
+            func.max(Booking.check_in_date).label("last_check_in"),
+        )
+        .where(Booking.customer_id == customer_id)
+        .subquery("booking_summary")
+    )
+    page = (
+        select(*schema_columns(BookingResponse, CUSTOMER_BOOKING_COLUMNS))
+        .outerjoin(Unit, Booking.unit_id == Unit.id)
+        .outerjoin(Project, Unit.project_id == Project.id)
+        .where(Booking.customer_id == customer_id, *where)
+        .order_by(Booking.check_in_date.desc(), Booking.id.desc())
+        .limit(limit)
+        .subquery("booking_page")
+    )
+    return (
+        select(summary, page)
+        .select_from(summary)
+        .outerjoin(page, true())
+        .order_by(page.c.check_in_date.desc(), page.c.id.desc())
+    )
+
+
 @router.get("")
 @router.get("/", response_model=List[CustomerResponse])
 async def get_all_customers(
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,name,phone)"),
+    visitor_type: Optional[Literal["مميز", "عادي"]] = None,
+    customer_status: Optional[Literal["new", "old"]] = None,
+    is_banned: Optional[bool] = None,
+    sort: Literal["created_at", "completed_booking_count", "booking_count", "total_revenue", "name"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="حجم الصفحة (بدونه ترجع كل النتائج)"),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    with_total: bool = Query(False, description="إرسال عدد كل النتائج المطابقة في X-Total-Count"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على قائمة جميع العملاء"""
-    customers = db.query(Customer).order_by(Customer.created_at.desc()).all()
-    return customers
+    """
+    الحصول على قائمة العملاء مع التصفية حسب نوع الزائر وحالة العميل والحظر
+    والترتيب وترقيم الصفحات بالمؤشر - كلها في قاعدة البيانات
+    """
+    selected = parse_fields(fields, CustomerResponse)
+    conditions = _customer_filters(visitor_type, customer_status, is_banned)
+    sort_column, sort_kind = CUSTOMER_SORTS[sort]
+    descending = order == "desc"
+    
+    query = select(Customer).where(*conditions)
+    if selected:
+        query = query.options(load_only(*customer_load_columns(selected)))
+    
+    headers = {}
+    if with_total:
+        total = db.execute(select(func.count()).select_from(Customer).where(*conditions)).scalar()
+        headers[TOTAL_COUNT_HEADER] = str(total)
+    
+    ordering = [sort_column.desc(), Customer.id.desc()] if descending else [sort_column.asc(), Customer.id.asc()]
+    if limit is None and cursor is None:
+        customers = db.execute(query.order_by(*ordering)).scalars().all()
+    else:
+        if cursor:
+            query = query.where(keyset_condition(
+                (sort_column, Customer.id), decode_cursor(cursor, (sort_kind, str)), descending
+            ))
+        limit = limit or DEFAULT_PAGE_SIZE
+        query = query.add_columns(
+            sort_column.label("cursor_value"), Customer.id.label("cursor_id")
+        ).order_by(*ordering).limit(limit + 1)
+        page = KeysetPage(db.execute(query), limit, ("cursor_value", "cursor_id"))
+        customers = [row[0] for row in page]
+        headers.update(page.headers())
+    
+    return list_response(
+        request, serialize_objects(customers, CustomerResponse, selected), CustomerResponse, selected,
+        headers=headers
+    )
+
+
+@router.get("/stats")
+@router.get("/stats/", response_model=CustomerStatsResponse)
+async def get_customers_stats(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """أعداد العملاء حسب الحالة ونوع الزائر واكتمال البيانات في استعلام مجمع واحد"""
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+    
+    row = db.execute(select(
+        func.count().label("total_customers"),
+        count_where(Customer.customer_status == "new").label("new_customers"),
+        count_where(Customer.visitor_type == "مميز").label("vip_customers"),
+        count_where(Customer.is_profile_complete.is_(True)).label("complete_profiles"),
+        func.coalesce(func.sum(Customer.total_revenue), 0).label("total_revenue"),
+    )).one()
+    return CustomerStatsResponse(
+        total_customers=row.total_customers,
+        new_customers=row.new_customers,
+        old_customers=row.total_customers - row.new_customers,
+        vip_customers=row.vip_customers,
+        regular_customers=row.total_customers - row.vip_customers,
+        complete_profiles=row.complete_profiles,
+        incomplete_profiles=row.total_customers - row.complete_profiles,
+        total_revenue=round(row.total_revenue, 2)
+    )
+
+
+@router.get("/search")
+@router.get("/search/", response_model=List[CustomerResponse])
+async def search_customers(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="جزء من الاسم أو رقم الجوال (بداية أو نهاية)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,name,phone)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    البحث في العملاء بالاسم أو رقم الجوال مرتباً حسب الصلة
+    الاسم يطابق مهما اختلفت الهمزات أو التاء المربوطة أو التشكيل (أحمد = احمد، فاطمة = فاطمه)
+    والرقم يطابق ببدايته أو نهايته وبالصيغة المحلية أو الدولية (055... أو 96655...)
+    النتائج هي أعلى SEARCH_CANDIDATES مطابقة صلةً؛ إذا وُجد أكثر منها تُرسل ترويسة X-Search-Truncated
+    """
+    selected = parse_fields(fields, CustomerResponse)
+    terms = search_terms(q)
+    if not any(len(term) >= MIN_TRIGRAM_TERM for term in terms):
+        raise HTTPException(status_code=400, detail=f"أدخل {MIN_TRIGRAM_TERM} أحرف أو أرقام على الأقل للبحث")
+    
+    # الترتيب حسب الصلة لا يسمح بمؤشر على أعمدة الفهرس، فالمؤشر يحمل موضع الصفحة
+    offset = decode_cursor(cursor, (int,))[0] if cursor else 0
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="مؤشر الصفحة غير صالح")
+    query, rank = apply_customer_search(db.query(Customer), terms, db.get_bind().dialect.name)
+    if selected:
+        query = query.options(load_only(*customer_load_columns(selected)))
+    
+    customers = query.order_by(*rank, Customer.name, Customer.id).offset(offset).limit(limit + 1).all()
+    headers = {}
+    if len(customers) > limit:
+        customers = customers[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor([offset + limit])
+    # بدون صفحة تالية وأقل من الحد: كل المطابقات عُرضت، فلا حاجة للعد
+    reached_cap = NEXT_CURSOR_HEADER in headers or offset + len(customers) >= SEARCH_CANDIDATES
+    if reached_cap and search_truncated(db, terms):
+        headers[TRUNCATED_HEADER] = "true"
+    return list_response(
+        request, serialize_objects(customers, CustomerResponse, selected), CustomerResponse, selected,
+        headers=headers
+    )
+
+
+@router.post("/stats/reconcile")
+@router.post("/stats/reconcile/")
+async def reconcile_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    إعادة حساب عدادات العملاء من الحجوزات للصفوف المنحرفة فقط
+    (بعد استيراد جماعي أو تعديل مباشر في القاعدة؛ التحديث العادي يتم مع كل حجز)
+    """
+    fixed = reconcile_customer_stats(db.connection())
+    db.commit()
+    return {"message": "تمت مطابقة عدادات العملاء", "fixed": fixed}
 
 
 @router.get("/{customer_id}")
@@ -174,24 +436,57 @@ async def ban_customer(
 
 
 @router.get("/{customer_id}/bookings")
-@router.get("/{customer_id}/bookings/")
+@router.get("/{customer_id}/bookings/", response_model=CustomerBookingHistory)
 async def get_customer_bookings(
+    request: Request,
     customer_id: str,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="حجم الصفحة (ترقيم بالمؤشر)"),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على حجوزات عميل محدد"""
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    """
+    سجل حجوزات عميل محدد (الأحدث دخولاً أولاً) مع اسم الوحدة والمشروع لكل حجز
+    وملخص كل حجوزاته (الليالي، المبلغ، الإلغاءات) من نفس الاستعلام
+    limit / cursor اختياريان: بدونهما تُعاد كل الحجوزات
+    """
+    customer = db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="العميل غير موجود")
     
-    bookings = db.query(Booking).filter(Booking.customer_id == customer_id).order_by(Booking.check_in_date.desc()).all()
+    where = []
+    if cursor:
+        where.append(keyset_condition(
+            (Booking.check_in_date, Booking.id), decode_cursor(cursor, (date, str))
+        ))
+    paginated = limit is not None or cursor is not None
+    limit = limit or DEFAULT_PAGE_SIZE
+    # الملخص في كل صف: النتيجة تُقرأ مرة للملخص ومرة للصفحة
+    result = db.execute(_customer_history_query(
+        customer_id, where, limit + 1 if paginated else None, db.get_bind().dialect.name
+    )).freeze()
+    first = result().first()
+    summary = {name: first._mapping[name] for name in schema_fields(CustomerBookingSummary)}
     
-    return {
-        "customer": customer,
-        "bookings": bookings,
-        "total_bookings": len(bookings)
-    }
+    items, headers = [], {}
+    if first.id is not None:
+        if paginated:
+            page = KeysetPage(result(), limit, ("check_in_date", "id"))
+            items, headers = serialize_rows(page, BookingResponse), page.headers()
+        else:
+            items = serialize_rows(result(), BookingResponse)
+    for item in items:
+        item["customer_name"] = customer.name
+        item["customer_is_banned"] = bool(customer.is_banned)
+    return list_response(
+        request, items, BookingResponse, headers=headers,
+        envelope={
+            "customer": serialize_objects([customer], CustomerResponse)[0],
+            "summary": summary,
+            "total_bookings": summary["total_bookings"],
+        },
+        items_key="bookings"
+    )
 
 
 @router.delete("/{customer_id}")
@@ -215,7 +510,7 @@ async def delete_customer(
 def get_or_create_customer(db: Session, name: str, phone: str) -> Customer:
     """
     دالة مساعدة: البحث عن عميل برقم الجوال أو إنشائه إذا لم يكن موجوداً
-    وتحديث عدد الحجوزات
+    عدادات الحجوزات لا تُعدل هنا: تُحدث مع إدخال الحجز نفسه (services/customer_stats.py)
     """
     customer = db.query(Customer).filter(Customer.phone == phone).first()
     
@@ -223,16 +518,13 @@ def get_or_create_customer(db: Session, name: str, phone: str) -> Customer:
         # تحديث الاسم إذا تغير
         if customer.name != name:
             customer.name = name
-        # زيادة عدد الحجوزات
-        customer.booking_count += 1
-        db.commit()
-        db.refresh(customer)
+            db.commit()
+            db.refresh(customer)
     else:
         # إنشاء عميل جديد
         customer = Customer(
             name=name,
-            phone=phone,
-            booking_count=1
+            phone=phone
         )
         db.add(customer)
         db.commit()
@@ -5,7 +5,7 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List
 
-from ..database import get_db
+from ..database import get_read_db
 from ..models.booking import Booking
 from ..models.unit import Unit
 from ..models.employee_performance import EmployeeTarget
@@ -24,7 +24,7 @@ router = APIRouter(prefix="/api/dashboard", tags=["لوحة التحكم"])
 @router.get("/summary")
 @router.get("/summary/", response_model=DashboardSummary)
 async def get_dashboard_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على ملخص لوحة التحكم"""
@@ -0,0 +1,105 @@
+"""
+أدوات تشخيص الأداء (لمالك النظام فقط)
+Performance diagnostics: stored request profiles and the slow-query log
+"""
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.slow_query import SlowQuery
+from ..models.user import User
+from ..schemas.diagnostics import SlowQueryDetail, SlowQueryResponse
+from ..utils.dependencies import require_system_owner
+from ..utils.fast_response import FastJSONResponse
+from ..utils.profiler import profile_store, to_collapsed
+
+# ترتيب سجل الاستعلامات البطيئة
+SLOW_QUERY_SORTS = {
+    "total": SlowQuery.total_ms.desc(),
+    "count": SlowQuery.count.desc(),
+    "max": SlowQuery.max_ms.desc(),
+    "recent": SlowQuery.last_seen.desc(),
+}
+
+router = APIRouter(prefix="/api/diagnostics", tags=["التشخيص"])
+
+
+@router.get("/profiles")
+@router.get("/profiles/")
+async def list_profiles(
+    current_user: User = Depends(require_system_owner)
+):
+    """قائمة الطلبات المحللة (الأحدث أولاً) بدون المكدسات"""
+    return FastJSONResponse(profile_store.list())
+
+
+@router.get("/profiles/{profile_id}")
+@router.get("/profiles/{profile_id}/")
+async def download_profile(
+    profile_id: str,
+    format: Literal["json", "collapsed"] = "json",
+    current_user: User = Depends(require_system_owner)
+):
+    """
+    تحميل ملف تحليل طلب:
+    - json: المكدسات وأزمنة الاستعلامات
+    - collapsed: نص للرسم عبر flamegraph.pl أو speedscope.app
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="ملف التحليل غير موجود")
+    disposition = {"Content-Disposition": f'attachment; filename="profile-{profile_id}.{"txt" if format == "collapsed" else "json"}"'}
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(profile), headers=disposition)
+    return FastJSONResponse(profile, headers=disposition)
+
+
+@router.get("/slow-queries")
+@router.get("/slow-queries/", response_model=List[SlowQueryResponse])
+async def list_slow_queries(
+    sort: Literal["total", "count", "max", "recent"] = "total",
+    route: str = Query(None, description="تصفية حسب مسار الـ API"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_system_owner)
+):
+    """
+    الاستعلامات البطيئة مجمعة حسب الشكل (الأعلى زمناً إجمالياً أولاً افتراضياً)
+    قائمة دائمة لما يحتاج فهرساً أو إعادة كتابة
+    يقرأ المحفوظ فقط: ما جمعه العمال يُكتب (مع EXPLAIN) من خيطهم الخلفي كل slow_query_flush_seconds
+    """
+    query = db.query(SlowQuery)
+    if route:
+        query = query.filter(SlowQuery.route == route)
+    rows = query.order_by(SLOW_QUERY_SORTS[sort]).limit(limit).all()
+    return [SlowQueryResponse.model_validate(row) for row in rows]
+
+
+@router.get("/slow-queries/{fingerprint}")
+@router.get("/slow-queries/{fingerprint}/", response_model=SlowQueryDetail)
+async def get_slow_query(
+    fingerprint: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_system_owner)
+):
+    """استعلام بطيء واحد مع خطة التنفيذ"""
+    slow_query = db.query(SlowQuery).filter(SlowQuery.fingerprint == fingerprint).first()
+    if not slow_query:
+        raise HTTPException(status_code=404, detail="الاستعلام غير موجود في السجل")
+    return SlowQueryDetail.model_validate(slow_query)
+
+
+@router.delete("/slow-queries")
+@router.delete("/slow-queries/")
+async def clear_slow_queries(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_system_owner)
+):
+    """تفريغ السجل (بعد إضافة الفهارس مثلاً)"""
+    deleted = db.execute(delete(SlowQuery)).rowcount
+    db.commit()
+    return {"message": "تم تفريغ سجل الاستعلامات البطيئة", "deleted": deleted}
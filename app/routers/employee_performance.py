@@ -2,12 +2,12 @@
 API لنظام تتبع أداء الموظفين
 Employee Performance Tracking API
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date, timedelta
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.user import User, UserRole
 from ..models.employee_performance import EmployeeTarget
 from ..schemas.employee_performance import (
@@ -19,17 +19,30 @@ from ..schemas.employee_performance import (
 )
 from ..services.employee_performance_service import EmployeePerformanceService
 from ..utils.dependencies import get_current_user
+from ..utils.fast_response import list_response, schema_fields, serialize_objects
 
 router = APIRouter(prefix="/api/employee-performance", tags=["Employee Performance"])
 
 
+# حقول سجل النشاط كما تُرجع من الجدول: employee_name لا تملؤه خدمة الأنشطة فلا يُضاف للمخرجات
+ACTIVITY_LIST_FIELDS = tuple(name for name in schema_fields(ActivityLogResponse) if name != "employee_name")
+
+
+def _activities_response(request: Request, page: dict):
+    """قائمة الأنشطة بالصيغة المطلوبة (json / columnar / msgpack) حسب ActivityLogResponse"""
+    activities = serialize_objects(page.pop("activities"), ActivityLogResponse, ACTIVITY_LIST_FIELDS)
+    return list_response(
+        request, activities, ActivityLogResponse, ACTIVITY_LIST_FIELDS, envelope=page, items_key="activities"
+    )
+
+
 # ======== لوحة تحكم الموظف ========
 
 @router.get("/my-dashboard")
 @router.get("/my-dashboard/")
 async def get_my_dashboard(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """الحصول على لوحة تحكم الموظف الحالي"""
     service = EmployeePerformanceService(db)
@@ -39,6 +52,7 @@ async def get_my_dashboard(
 @router.get("/my-activities")
 @router.get("/my-activities/")
 async def get_my_activities(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     page: int = Query(1, ge=1),
@@ -48,9 +62,9 @@ async def get_my_activities(
 ):
     """الحصول على أنشطتي"""
     service = EmployeePerformanceService(db)
-    return service.get_employee_activities(
+    return _activities_response(request, service.get_employee_activities(
         current_user.id, start_date, end_date, page=page, page_size=page_size
-    )
+    ))
 
 
 @router.get("/my-target")
@@ -78,7 +92,7 @@ async def get_my_current_target(
 @router.get("/team-overview/")
 async def get_team_overview(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """نظرة عامة على أداء الفريق (للمدير فقط)"""
     if not current_user.is_admin_or_higher:
@@ -93,7 +107,7 @@ async def get_team_overview(
 async def get_employee_dashboard(
     employee_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """لوحة تحكم موظف معين (للمدير فقط)"""
     if not current_user.is_admin_or_higher:
@@ -110,6 +124,7 @@ async def get_employee_dashboard(
 @router.get("/employee/{employee_id}/activities/")
 async def get_employee_activities(
     employee_id: str,
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     page: int = Query(1, ge=1),
@@ -122,9 +137,9 @@ async def get_employee_activities(
         raise HTTPException(status_code=403, detail="صلاحيات غير كافية")
     
     service = EmployeePerformanceService(db)
-    return service.get_employee_activities(
+    return _activities_response(request, service.get_employee_activities(
         employee_id, start_date, end_date, page=page, page_size=page_size
-    )
+    ))
 
 
 # ======== إدارة الأهداف ========
@@ -257,20 +272,23 @@ async def deactivate_target(
 @router.get("/all-activities")
 @router.get("/all-activities/")
 async def get_all_activities(
+    request: Request,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     role: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """جميع الأنشطة (للمدير فقط)"""
     if not current_user.is_admin_or_higher:
         raise HTTPException(status_code=403, detail="صلاحيات غير كافية")
     
     service = EmployeePerformanceService(db)
-    return service.get_all_activities(start_date, end_date, role, page, page_size)
+    return _activities_response(
+        request, service.get_all_activities(start_date, end_date, role, page, page_size)
+    )
 
 
 # ======== إحصائيات سريعة ========
@@ -279,7 +297,7 @@ async def get_all_activities(
 @router.get("/quick-stats/")
 async def get_quick_stats(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """إحصائيات سريعة للموظف الحالي"""
     service = EmployeePerformanceService(db)
@@ -0,0 +1,146 @@
+"""
+تصدير الجداول الكبيرة (CSV / NDJSON) بالتدفق
+Streaming exports with the same filters as the list endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from ..database import open_read_session
+from ..models.booking import Booking
+from ..models.customer import Customer
+from ..models.employee_performance import EmployeeActivityLog
+from ..models.project import Project
+from ..models.transaction import Transaction
+from ..models.unit import Unit
+from ..models.user import User
+from ..schemas.booking import BookingResponse
+from ..schemas.customer import CustomerResponse
+from ..schemas.employee_performance import ActivityLogResponse
+from ..schemas.transaction import TransactionResponse
+from ..utils.dependencies import get_current_user
+from ..utils.export_stream import ExportFormat, export_response
+from ..utils.fast_response import parse_fields, schema_columns, schema_fields, wants
+from .bookings import BOOKING_LIST_COLUMNS
+from .customers import CUSTOMER_SORTS, _customer_filters
+from .transactions import TRANSACTION_LIST_COLUMNS, _transaction_conditions
+
+router = APIRouter(prefix="/api/exports", tags=["التصدير"])
+
+FORMAT_QUERY = Query("csv", description="صيغة الملف: csv أو ndjson")
+COMPRESS_QUERY = Query(None, description="ضغط gzip (افتراضياً حسب Accept-Encoding)")
+
+# كل حقول CustomerResponse أعمدة أو تعبيرات SQL في النموذج (visitor_type / customer_status)
+CUSTOMER_EXPORT_COLUMNS = {name: getattr(Customer, name) for name in schema_fields(CustomerResponse)}
+
+ACTIVITY_EXPORT_COLUMNS = {
+    "activity_type": EmployeeActivityLog.activity_type,
+    "entity_type": EmployeeActivityLog.entity_type,
+    "entity_id": EmployeeActivityLog.entity_id,
+    "description": EmployeeActivityLog.description,
+    "amount": EmployeeActivityLog.amount,
+    "id": EmployeeActivityLog.id,
+    "employee_id": EmployeeActivityLog.employee_id,
+    "employee_name": func.coalesce(User.first_name, "") + " " + func.coalesce(User.last_name, ""),
+    "metadata_json": EmployeeActivityLog.metadata_json,
+    "created_at": EmployeeActivityLog.created_at,
+}
+
+
+@router.get("/bookings")
+@router.get("/bookings/")
+async def export_bookings(
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,guest_name)"),
+    format: ExportFormat = FORMAT_QUERY,
+    compress: Optional[bool] = COMPRESS_QUERY,
+    current_user: User = Depends(get_current_user)
+):
+    """تصدير الحجوزات (نفس أعمدة وترتيب GET /api/bookings)"""
+    selected = parse_fields(fields, BookingResponse)
+    query = select(*schema_columns(BookingResponse, BOOKING_LIST_COLUMNS, selected)).select_from(Booking)
+    if wants(selected, "unit_name", "project_id", "project_name"):
+        query = query.outerjoin(Unit, Booking.unit_id == Unit.id)
+    if wants(selected, "project_id", "project_name"):
+        query = query.outerjoin(Project, Unit.project_id == Project.id)
+    query = query.order_by(Booking.check_in_date.desc(), Booking.id.desc())
+    return export_response(request, query, open_read_session, "bookings", format, compress)
+
+
+@router.get("/customers")
+@router.get("/customers/")
+async def export_customers(
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,name,phone)"),
+    visitor_type: Optional[Literal["مميز", "عادي"]] = None,
+    customer_status: Optional[Literal["new", "old"]] = None,
+    is_banned: Optional[bool] = None,
+    sort: Literal["created_at", "completed_booking_count", "booking_count", "total_revenue", "name"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    format: ExportFormat = FORMAT_QUERY,
+    compress: Optional[bool] = COMPRESS_QUERY,
+    current_user: User = Depends(get_current_user)
+):
+    """تصدير العملاء بنفس تصفية وترتيب GET /api/customers"""
+    selected = parse_fields(fields, CustomerResponse)
+    sort_column, _ = CUSTOMER_SORTS[sort]
+    ordering = [sort_column.desc(), Customer.id.desc()] if order == "desc" else [sort_column.asc(), Customer.id.asc()]
+    query = (
+        select(*schema_columns(CustomerResponse, CUSTOMER_EXPORT_COLUMNS, selected))
+        .where(*_customer_filters(visitor_type, customer_status, is_banned))
+        .order_by(*ordering)
+    )
+    return export_response(request, query, open_read_session, "customers", format, compress)
+
+
+@router.get("/transactions")
+@router.get("/transactions/")
+async def export_transactions(
+    request: Request,
+    project_id: Optional[str] = None,
+    type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: ExportFormat = FORMAT_QUERY,
+    compress: Optional[bool] = COMPRESS_QUERY,
+    current_user: User = Depends(get_current_user)
+):
+    """تصدير المعاملات المالية بنفس تصفية GET /api/transactions"""
+    query = (
+        select(*schema_columns(TransactionResponse, TRANSACTION_LIST_COLUMNS))
+        .outerjoin(Project, Transaction.project_id == Project.id)
+        .outerjoin(Unit, Transaction.unit_id == Unit.id)
+        .where(*_transaction_conditions(project_id, type, start_date, end_date))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+    )
+    return export_response(request, query, open_read_session, "transactions", format, compress)
+
+
+@router.get("/activities")
+@router.get("/activities/")
+async def export_activities(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    role: Optional[str] = None,
+    format: ExportFormat = FORMAT_QUERY,
+    compress: Optional[bool] = COMPRESS_QUERY,
+    current_user: User = Depends(get_current_user)
+):
+    """تصدير سجل أنشطة الموظفين بنفس تصفية GET /api/employee-performance/all-activities (للمدير فقط)"""
+    if not current_user.is_admin_or_higher:
+        raise HTTPException(status_code=403, detail="صلاحيات غير كافية")
+
+    query = (
+        select(*schema_columns(ActivityLogResponse, ACTIVITY_EXPORT_COLUMNS))
+        .join(User, EmployeeActivityLog.employee_id == User.id)
+    )
+    if start_date:
+        query = query.where(EmployeeActivityLog.created_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.where(EmployeeActivityLog.created_at <= datetime.combine(end_date, datetime.max.time()))
+    if role:
+        query = query.where(User.role == role)
+    query = query.order_by(EmployeeActivityLog.created_at.desc(), EmployeeActivityLog.id.desc())
+    return export_response(request, query, open_read_session, "activities", format, compress)
@@ -1,58 +1,234 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import case, func, select
+from datetime import date, datetime
+from typing import List, Optional
 
-from ..database import get_db
+from ..database import get_db, get_read_db
+from ..models.booking import Booking, BookingStatus
 from ..models.owner import Owner
 from ..models.project import Project
+from ..models.transaction import Transaction, TransactionType
 from ..models.unit import Unit
-from ..schemas.owner import OwnerResponse, OwnerCreate, OwnerUpdate, OwnerSimple
+from ..schemas.owner import OwnerResponse, OwnerCreate, OwnerUpdate, OwnerSimple, OwnerPortfolio
 from ..schemas.project import OwnerProjectSummary
 from ..utils.dependencies import get_current_user, require_owners_agent
 from ..models.user import User
 from ..services.employee_performance_service import log_owner_created, EmployeePerformanceService
 from ..models.employee_performance import ActivityType
+from ..utils.fast_response import FastJSONResponse, list_response, schema_columns, serialize_rows
+from ..utils.etag import check_not_modified, etag_headers
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPage, decode_cursor, keyset_condition
 
 router = APIRouter(prefix="/api/owners", tags=["الملاك"])
 
 
+# عدد المشاريع والوحدات لكل مالك في استعلام مجمع واحد (بدلاً من تحميل المشاريع ووحداتها)
+_owner_counts = (
+    select(
+        Project.owner_id,
+        func.count(func.distinct(Project.id)).label("project_count"),
+        func.count(Unit.id).label("unit_count"),
+    )
+    .outerjoin(Unit, Unit.project_id == Project.id)
+    .group_by(Project.owner_id)
+    .subquery()
+)
+
+# أعمدة قائمة الملاك بأسماء حقول OwnerResponse (مسار التحويل السريع)
+OWNER_LIST_COLUMNS = {
+    "owner_name": Owner.owner_name,
+    "owner_mobile_phone": Owner.owner_mobile_phone,
+    "paypal_email": Owner.paypal_email,
+    "note": Owner.note,
+    "id": Owner.id,
+    "created_at": Owner.created_at,
+    "updated_at": Owner.updated_at,
+    "project_count": func.coalesce(_owner_counts.c.project_count, 0),
+    "unit_count": func.coalesce(_owner_counts.c.unit_count, 0),
+}
+
+
+def _get_owner_response(db: Session, owner_id: str) -> Optional[OwnerResponse]:
+    """مالك واحد مع عدد مشاريعه ووحداته في استعلام واحد (استعلامات فرعية مرتبطة)"""
+    columns = {
+        **OWNER_LIST_COLUMNS,
+        "project_count": select(func.count(Project.id)).where(Project.owner_id == Owner.id).scalar_subquery(),
+        "unit_count": (
+            select(func.count(Unit.id))
+            .join(Project, Unit.project_id == Project.id)
+            .where(Project.owner_id == Owner.id)
+            .scalar_subquery()
+        ),
+    }
+    row = db.execute(
+        select(*schema_columns(OwnerResponse, columns)).where(Owner.id == owner_id)
+    ).mappings().first()
+    return OwnerResponse(**row) if row else None
+
+
+# حالات الحجز التي تشغل الوحدة اليوم (نفس تعريف لوحة التحكم)
+OCCUPYING_STATUSES = (BookingStatus.CONFIRMED.value, BookingStatus.CHECKED_IN.value)
+# حالات الحجز المحسوبة في الإيرادات (كل ما لم يُلغَ)
+REVENUE_STATUSES = (
+    BookingStatus.CONFIRMED.value, BookingStatus.CHECKED_IN.value,
+    BookingStatus.CHECKED_OUT.value, BookingStatus.COMPLETED.value,
+)
+
+
+def _portfolio_query(owners, today: date):
+    """
+    ملخص المحفظة لكل مالك في owners (CTE بأعمدة id, owner_name, owner_mobile_phone, created_at)
+    كل مقياس استعلام فرعي مجمع حسب المالك ومقصور على ملاك الصفحة، فيبقى عدد الاستعلامات واحداً
+    """
+    page_ids = select(owners.c.id)
+    month_start = today.replace(day=1)
+
+    counts = (
+        select(
+            Project.owner_id,
+            func.count(func.distinct(Project.id)).label("project_count"),
+            func.count(Unit.id).label("unit_count"),
+        )
+        .outerjoin(Unit, Unit.project_id == Project.id)
+        .where(Project.owner_id.in_(page_ids))
+        .group_by(Project.owner_id)
+        .subquery("owner_counts")
+    )
+    occupancy = (
+        select(Project.owner_id, func.count(func.distinct(Booking.unit_id)).label("occupied_units"))
+        .join(Unit, Unit.project_id == Project.id)
+        .join(Booking, Booking.unit_id == Unit.id)
+        .where(
+            Project.owner_id.in_(page_ids),
+            Booking.check_in_date <= today,
+            Booking.check_out_date > today,
+            Booking.status.in_(OCCUPYING_STATUSES),
+        )
+        .group_by(Project.owner_id)
+        .subquery("owner_occupancy")
+    )
+    revenue = (
+        select(Project.owner_id, func.sum(Booking.total_price).label("month_revenue"))
+        .join(Unit, Unit.project_id == Project.id)
+        .join(Booking, Booking.unit_id == Unit.id)
+        .where(
+            Project.owner_id.in_(page_ids),
+            Booking.check_in_date >= month_start,
+            Booking.check_in_date <= today,
+            Booking.status.in_(REVENUE_STATUSES),
+        )
+        .group_by(Project.owner_id)
+        .subquery("owner_revenue")
+    )
+    finance = (
+        select(
+            Project.owner_id,
+            func.sum(case((Transaction.type == TransactionType.INCOME.value, Transaction.amount), else_=0)).label("income"),
+            func.sum(case((Transaction.type == TransactionType.EXPENSE.value, Transaction.amount), else_=0)).label("expense"),
+        )
+        .join(Transaction, Transaction.project_id == Project.id)
+        .where(Project.owner_id.in_(page_ids))
+        .group_by(Project.owner_id)
+        .subquery("owner_finance")
+    )
+
+    income = func.coalesce(finance.c.income, 0)
+    expense = func.coalesce(finance.c.expense, 0)
+    columns = {
+        "id": owners.c.id,
+        "owner_name": owners.c.owner_name,
+        "owner_mobile_phone": owners.c.owner_mobile_phone,
+        "project_count": func.coalesce(counts.c.project_count, 0),
+        "unit_count": func.coalesce(counts.c.unit_count, 0),
+        "occupied_units": func.coalesce(occupancy.c.occupied_units, 0),
+        "month_revenue": func.coalesce(revenue.c.month_revenue, 0),
+        "total_income": income,
+        "total_expense": expense,
+        "net_income": income - expense,
+    }
+    return (
+        select(*schema_columns(OwnerPortfolio, columns))
+        .add_columns(owners.c.created_at.label("cursor_created_at"), owners.c.id.label("cursor_id"))
+        .select_from(owners)
+        .outerjoin(counts, counts.c.owner_id == owners.c.id)
+        .outerjoin(occupancy, occupancy.c.owner_id == owners.c.id)
+        .outerjoin(revenue, revenue.c.owner_id == owners.c.id)
+        .outerjoin(finance, finance.c.owner_id == owners.c.id)
+        .order_by(owners.c.created_at.desc(), owners.c.id.desc())
+    )
+
+
+def _owner_portfolio_items(result) -> List[dict]:
+    items = serialize_rows(result, OwnerPortfolio)
+    for item in items:
+        if item["unit_count"]:
+            item["occupancy_rate"] = round(item["occupied_units"] / item["unit_count"] * 100, 1)
+    return items
+
+
+def _owners_cte(where, limit: int):
+    return (
+        select(Owner.id, Owner.owner_name, Owner.owner_mobile_phone, Owner.created_at)
+        .where(*where)
+        .order_by(Owner.created_at.desc(), Owner.id.desc())
+        .limit(limit)
+        .cte("portfolio_owners")
+    )
+
+
 @router.get("")
 @router.get("/", response_model=List[OwnerResponse])
 async def get_all_owners(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة جميع الملاك"""
-    owners = db.query(Owner).order_by(Owner.created_at.desc()).all()
-    
-    # Add project and unit counts
-    result = []
-    for owner in owners:
-        owner_dict = {
-            "id": owner.id,
-            "owner_name": owner.owner_name,
-            "owner_mobile_phone": owner.owner_mobile_phone,
-            "paypal_email": owner.paypal_email,
-            "note": owner.note,
-            "created_at": owner.created_at,
-            "updated_at": owner.updated_at,
-            "project_count": len(owner.projects),
-            "unit_count": sum(len(p.units) for p in owner.projects)
-        }
-        result.append(OwnerResponse(**owner_dict))
-    
-    return result
+    rows = db.execute(
+        select(*schema_columns(OwnerResponse, OWNER_LIST_COLUMNS))
+        .outerjoin(_owner_counts, _owner_counts.c.owner_id == Owner.id)
+        .order_by(Owner.created_at.desc())
+    )
+    return FastJSONResponse(serialize_rows(rows, OwnerResponse))
 
 
 @router.get("/select")
 @router.get("/select/", response_model=List[OwnerSimple])
 async def get_owners_for_select(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة مبسطة للملاك (للـ Dropdown)"""
-    owners = db.query(Owner).all()
-    return [OwnerSimple(id=o.id, name=o.owner_name) for o in owners]
+    etag, not_modified = check_not_modified(request, db, ("owners",))
+    if not_modified:
+        return not_modified
+    
+    rows = db.execute(select(*schema_columns(OwnerSimple, {"id": Owner.id, "name": Owner.owner_name})))
+    return FastJSONResponse(serialize_rows(rows, OwnerSimple), headers=etag_headers(etag))
+
+
+@router.get("/portfolio")
+@router.get("/portfolio/", response_model=List[OwnerPortfolio])
+async def get_owners_portfolio(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_owners_agent)
+):
+    """
+    ملخص محافظ الملاك (الأحدث أولاً): المشاريع، الوحدات، الإشغال اليوم،
+    إيرادات الحجوزات منذ بداية الشهر، والدخل والمصروفات من الحركات المالية
+    استعلام واحد لكل صفحة مهما كان عدد الملاك
+    """
+    where = []
+    if cursor:
+        where.append(keyset_condition((Owner.created_at, Owner.id), decode_cursor(cursor, (datetime, str))))
+    # صف إضافي لمعرفة وجود صفحة تالية
+    owners = _owners_cte(where, limit + 1)
+    page = KeysetPage(db.execute(_portfolio_query(owners, date.today())), limit, ("cursor_created_at", "cursor_id"))
+    return list_response(request, _owner_portfolio_items(page), OwnerPortfolio, headers=page.headers())
 
 
 @router.get("/{owner_id}")
@@ -63,24 +239,31 @@ async def get_owner(
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على بيانات مالك محدد"""
-    owner = db.query(Owner).filter(Owner.id == owner_id).first()
+    owner = _get_owner_response(db, owner_id)
     if not owner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="المالك غير موجود"
         )
-    
-    return OwnerResponse(
-        id=owner.id,
-        owner_name=owner.owner_name,
-        owner_mobile_phone=owner.owner_mobile_phone,
-        paypal_email=owner.paypal_email,
-        note=owner.note,
-        created_at=owner.created_at,
-        updated_at=owner.updated_at,
-        project_count=len(owner.projects),
-        unit_count=sum(len(p.units) for p in owner.projects)
-    )
+    return owner
+
+
+@router.get("/{owner_id}/portfolio")
+@router.get("/{owner_id}/portfolio/", response_model=OwnerPortfolio)
+async def get_owner_portfolio(
+    owner_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_owners_agent)
+):
+    """ملخص محفظة مالك محدد"""
+    owners = _owners_cte([Owner.id == owner_id], 1)
+    items = _owner_portfolio_items(db.execute(_portfolio_query(owners, date.today())))
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="المالك غير موجود"
+        )
+    return FastJSONResponse(items[0])
 
 
 @router.get("/{owner_id}/projects")
@@ -91,22 +274,31 @@ async def get_owner_projects(
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على مشاريع مالك محدد"""
-    owner = db.query(Owner).filter(Owner.id == owner_id).first()
-    if not owner:
+    if db.execute(select(Owner.id).where(Owner.id == owner_id)).first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="المالك غير موجود"
         )
     
-    return [
-        OwnerProjectSummary(
-            project_name=p.name,
-            city=p.city or "",
-            district=p.district or "",
-            unit_count=len(p.units)
-        )
-        for p in owner.projects
-    ]
+    unit_counts = (
+        select(Unit.project_id, func.count(Unit.id).label("unit_count"))
+        .join(Project, Unit.project_id == Project.id)
+        .where(Project.owner_id == owner_id)
+        .group_by(Unit.project_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(*schema_columns(OwnerProjectSummary, {
+            "project_name": Project.name,
+            "city": func.coalesce(Project.city, ""),
+            "district": func.coalesce(Project.district, ""),
+            "unit_count": func.coalesce(unit_counts.c.unit_count, 0),
+        }))
+        .outerjoin(unit_counts, unit_counts.c.project_id == Project.id)
+        .where(Project.owner_id == owner_id)
+        .order_by(Project.created_at)
+    )
+    return FastJSONResponse(serialize_rows(rows, OwnerProjectSummary))
 
 
 @router.post("")
@@ -179,17 +371,7 @@ async def update_owner(
         description=f"تعديل مالك: {owner.owner_name}"
     )
     
-    return OwnerResponse(
-        id=owner.id,
-        owner_name=owner.owner_name,
-        owner_mobile_phone=owner.owner_mobile_phone,
-        paypal_email=owner.paypal_email,
-        note=owner.note,
-        created_at=owner.created_at,
-        updated_at=owner.updated_at,
-        project_count=len(owner.projects),
-        unit_count=sum(len(p.units) for p in owner.projects)
-    )
+    return _get_owner_response(db, owner.id)
 
 
 @router.delete("/{owner_id}")
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import func, select
+from typing import List, Optional
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.project import Project
 from ..models.owner import Owner
 from ..models.unit import Unit
@@ -11,54 +12,105 @@ from ..utils.dependencies import get_current_user, require_owners_agent
 from ..models.user import User
 from ..services.employee_performance_service import log_project_created, EmployeePerformanceService
 from ..models.employee_performance import ActivityType
+from ..utils.fast_response import (
+    FastJSONResponse, UNKNOWN, list_response, parse_fields, schema_columns, serialize_rows, wants
+)
+from ..utils.etag import check_not_modified, etag_headers
 
 router = APIRouter(prefix="/api/projects", tags=["المشاريع"])
 
 
+# عدد الوحدات لكل مشروع في استعلام مجمع واحد (بدلاً من تحميل كل الوحدات)
+_unit_counts = (
+    select(Unit.project_id, func.count(Unit.id).label("unit_count"))
+    .group_by(Unit.project_id)
+    .subquery()
+)
+
+# أعمدة قائمة المشاريع بأسماء حقول ProjectResponse (مسار التحويل السريع)
+PROJECT_LIST_COLUMNS = {
+    "owner_id": Project.owner_id,
+    "name": Project.name,
+    "city": Project.city,
+    "district": Project.district,
+    "security_guard_phone": Project.security_guard_phone,
+    "property_manager_phone": Project.property_manager_phone,
+    "map_url": Project.map_url,
+    "contract_no": Project.contract_no,
+    "contract_status": Project.contract_status,
+    "contract_duration": Project.contract_duration,
+    "commission_percent": Project.commission_percent,
+    "bank_name": Project.bank_name,
+    "bank_iban": Project.bank_iban,
+    "id": Project.id,
+    "owner_name": func.coalesce(Owner.owner_name, UNKNOWN),
+    "unit_count": func.coalesce(_unit_counts.c.unit_count, 0),
+    "created_at": Project.created_at,
+    "updated_at": Project.updated_at,
+}
+
+
+def _get_project_response(db: Session, project_id: str) -> Optional[ProjectResponse]:
+    """
+    مشروع واحد مع اسم المالك وعدد الوحدات في استعلام واحد
+    (عدد الوحدات كاستعلام فرعي مرتبط يستخدم فهرس ix_units_project_id بدلاً من تحميل الوحدات)
+    """
+    columns = {
+        **PROJECT_LIST_COLUMNS,
+        "unit_count": select(func.count(Unit.id)).where(Unit.project_id == Project.id).scalar_subquery(),
+    }
+    row = db.execute(
+        select(*schema_columns(ProjectResponse, columns))
+        .outerjoin(Owner, Project.owner_id == Owner.id)
+        .where(Project.id == project_id)
+    ).mappings().first()
+    return ProjectResponse(**row) if row else None
+
+
 @router.get("")
 @router.get("/", response_model=List[ProjectResponse])
 async def get_all_projects(
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,name)"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة جميع المشاريع"""
-    projects = db.query(Project).order_by(Project.created_at.desc()).all()
+    selected = parse_fields(fields, ProjectResponse)
+    etag, not_modified = check_not_modified(request, db, ("projects", "owners", "units"))
+    if not_modified:
+        return not_modified
     
-    result = []
-    for project in projects:
-        result.append(ProjectResponse(
-            id=project.id,
-            owner_id=project.owner_id,
-            name=project.name,
-            city=project.city,
-            district=project.district,
-            security_guard_phone=project.security_guard_phone,
-            property_manager_phone=project.property_manager_phone,
-            map_url=project.map_url,
-            contract_no=project.contract_no,
-            contract_status=project.contract_status,
-            contract_duration=project.contract_duration,
-            commission_percent=project.commission_percent,
-            bank_name=project.bank_name,
-            bank_iban=project.bank_iban,
-            owner_name=project.owner.owner_name if project.owner else "غير معروف",
-            unit_count=len(project.units),
-            created_at=project.created_at,
-            updated_at=project.updated_at
-        ))
+    query = select(*schema_columns(ProjectResponse, PROJECT_LIST_COLUMNS, selected)).select_from(Project)
+    if wants(selected, "owner_name"):
+        query = query.outerjoin(Owner, Project.owner_id == Owner.id)
+    if wants(selected, "unit_count"):
+        query = query.outerjoin(_unit_counts, _unit_counts.c.project_id == Project.id)
     
-    return result
+    rows = db.execute(query.order_by(Project.created_at.desc()))
+    return list_response(
+        request,
+        serialize_rows(rows, ProjectResponse, selected),
+        ProjectResponse,
+        selected,
+        headers=etag_headers(etag)
+    )
 
 
 @router.get("/select")
 @router.get("/select/", response_model=List[ProjectSimple])
 async def get_projects_for_select(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة مبسطة للمشاريع (للـ Dropdown)"""
-    projects = db.query(Project).all()
-    return [ProjectSimple(id=p.id, name=p.name) for p in projects]
+    etag, not_modified = check_not_modified(request, db, ("projects",))
+    if not_modified:
+        return not_modified
+    
+    rows = db.execute(select(*schema_columns(ProjectSimple, {"id": Project.id, "name": Project.name})))
+    return FastJSONResponse(serialize_rows(rows, ProjectSimple), headers=etag_headers(etag))
 
 
 @router.get("/{project_id}")
@@ -69,33 +121,13 @@ async def get_project(
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على بيانات مشروع محدد"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = _get_project_response(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="المشروع غير موجود"
         )
-    
-    return ProjectResponse(
-        id=project.id,
-        owner_id=project.owner_id,
-        name=project.name,
-        city=project.city,
-        district=project.district,
-        security_guard_phone=project.security_guard_phone,
-        property_manager_phone=project.property_manager_phone,
-        map_url=project.map_url,
-        contract_no=project.contract_no,
-        contract_status=project.contract_status,
-        contract_duration=project.contract_duration,
-        commission_percent=project.commission_percent,
-        bank_name=project.bank_name,
-        bank_iban=project.bank_iban,
-        owner_name=project.owner.owner_name if project.owner else "غير معروف",
-        unit_count=len(project.units),
-        created_at=project.created_at,
-        updated_at=project.updated_at
-    )
+    return project
 
 
 @router.post("")
@@ -197,26 +229,7 @@ async def update_project(
         description=f"تعديل مشروع: {project.name}"
     )
     
-    return ProjectResponse(
-        id=project.id,
-        owner_id=project.owner_id,
-        name=project.name,
-        city=project.city,
-        district=project.district,
-        security_guard_phone=project.security_guard_phone,
-        property_manager_phone=project.property_manager_phone,
-        map_url=project.map_url,
-        contract_no=project.contract_no,
-        contract_status=project.contract_status,
-        contract_duration=project.contract_duration,
-        commission_percent=project.commission_percent,
-        bank_name=project.bank_name,
-        bank_iban=project.bank_iban,
-        owner_name=project.owner.owner_name if project.owner else "غير معروف",
-        unit_count=len(project.units),
-        created_at=project.created_at,
-        updated_at=project.updated_at
-    )
+    return _get_project_response(db, project.id)
 
 
 @router.delete("/{project_id}")
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import List
+
+from ..database import get_db, get_read_db
+from ..models.owner import Owner
+from ..models.owner_settlement import OwnerSettlement
+from ..schemas.settlement import OwnerSettlementResponse, SettlementRunResult
+from ..utils.dependencies import require_admin, require_owners_agent
+from ..models.user import User
+from ..utils.fast_response import list_response, schema_columns, serialize_rows
+from ..services.settlements import month_bounds, run_settlements
+
+router = APIRouter(prefix="/api/settlements", tags=["تسويات الملاك"])
+
+
+# أعمدة قائمة التسويات المحفوظة بأسماء حقول OwnerSettlementResponse
+SETTLEMENT_LIST_COLUMNS = {
+    "owner_id": OwnerSettlement.owner_id,
+    "owner_name": Owner.owner_name,
+    "month": OwnerSettlement.month,
+    "booking_count": OwnerSettlement.booking_count,
+    "gross_revenue": OwnerSettlement.gross_revenue,
+    "commission": OwnerSettlement.commission,
+    "expenses": OwnerSettlement.expenses,
+    "net_payout": OwnerSettlement.net_payout,
+    "projects": OwnerSettlement.projects,
+    "generated_at": OwnerSettlement.generated_at,
+}
+
+
+@router.get("")
+@router.get("/", response_model=List[OwnerSettlementResponse])
+async def get_settlements(
+    request: Request,
+    year: int = Query(..., ge=1, le=9999, description="السنة"),
+    month: int = Query(..., ge=1, le=12, description="الشهر (1-12)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_owners_agent)
+):
+    """تسويات الملاك المحفوظة لشهر محدد (تُنشأ أو تُحدث بـ POST /api/settlements/run)"""
+    start, _ = month_bounds(year, month)
+    rows = db.execute(
+        select(*schema_columns(OwnerSettlementResponse, SETTLEMENT_LIST_COLUMNS))
+        .join(Owner, Owner.id == OwnerSettlement.owner_id)
+        .where(OwnerSettlement.month == start)
+        .order_by(Owner.owner_name, OwnerSettlement.owner_id)
+    )
+    return list_response(request, serialize_rows(rows, OwnerSettlementResponse), OwnerSettlementResponse)
+
+
+@router.post("/run")
+@router.post("/run/", response_model=SettlementRunResult)
+async def run_month_settlements(
+    year: int = Query(..., ge=1, le=9999, description="السنة"),
+    month: int = Query(..., ge=1, le=12, description="الشهر (1-12)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    حساب تسويات الشهر لكل الملاك (الإيرادات، العمولة، المصروفات، صافي المستحق)
+    لا يُعاد إنشاء كشف مالك لم تتغير بياناته منذ آخر تشغيل
+    """
+    # الحساب وإنشاء الكشوف متزامن: في مجموعة خيوط حتى لا يحجب حلقة الأحداث
+    return SettlementRunResult(**await run_in_threadpool(run_settlements, db, year, month))
+
+
+@router.get("/{owner_id}/statement", response_class=PlainTextResponse)
+@router.get("/{owner_id}/statement/", response_class=PlainTextResponse)
+async def get_owner_statement(
+    owner_id: str,
+    year: int = Query(..., ge=1, le=9999, description="السنة"),
+    month: int = Query(..., ge=1, le=12, description="الشهر (1-12)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(require_owners_agent)
+):
+    """كشف حساب المالك النصي لشهر محدد"""
+    start, _ = month_bounds(year, month)
+    statement = db.execute(
+        select(OwnerSettlement.statement)
+        .where(OwnerSettlement.owner_id == owner_id, OwnerSettlement.month == start)
+    ).scalar()
+    if statement is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="كشف التسوية غير موجود"
+        )
+    return PlainTextResponse(statement)
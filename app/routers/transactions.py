@@ -1,69 +1,176 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from ..database import get_db
-from ..models.transaction import Transaction
+from ..database import get_db, get_read_db
+from ..models.transaction import Transaction, TransactionType
 from ..models.project import Project
 from ..models.unit import Unit
 from ..models.booking import Booking
+from ..models.monthly_pnl import MonthlyPnl
 from ..schemas.transaction import (
-    TransactionResponse, TransactionCreate, TransactionUpdate, 
-    FinancialSummary, TeamAchievement, DailyChallenge, WeeklyPerformance, MonthlyHarvest
+    TransactionResponse, TransactionCreate, TransactionUpdate, TransactionLedgerEntry,
+    FinancialSummary, FinancialReportRow, TeamAchievement, DailyChallenge, WeeklyPerformance, MonthlyHarvest
 )
 from ..utils.dependencies import get_current_user
 from ..models.user import User
+from ..utils.fast_response import UNKNOWN, list_response, schema_columns, schema_fields, serialize_rows
+from ..services.monthly_pnl import ledger_month, month_start
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPage, decode_cursor, keyset_condition
 
 router = APIRouter(prefix="/api/transactions", tags=["المعاملات المالية"])
 
 
+# أعمدة قائمة المعاملات بأسماء حقول TransactionResponse (مسار التحويل السريع)
+TRANSACTION_LIST_COLUMNS = {
+    "project_id": Transaction.project_id,
+    "unit_id": Transaction.unit_id,
+    "description": Transaction.description,
+    "date": Transaction.date,
+    "amount": Transaction.amount,
+    "type": Transaction.type,
+    "category": Transaction.category,
+    "id": Transaction.id,
+    "project_name": func.coalesce(Project.name, UNKNOWN),
+    "unit_name": Unit.unit_name,
+    "created_at": Transaction.created_at,
+}
+
+
+# المبلغ بإشارته في الرصيد: الدخل موجب والصرف سالب
+SIGNED_AMOUNT = case(
+    (Transaction.type == TransactionType.INCOME.value, Transaction.amount), else_=-Transaction.amount
+)
+
+
+def _transaction_conditions(
+    project_id: Optional[str] = None,
+    type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> list:
+    """شروط تصفية المعاملات (القائمة والتصدير): المشروع والنوع ونطاق التاريخ"""
+    conditions = []
+    if project_id:
+        conditions.append(Transaction.project_id == project_id)
+    if type:
+        conditions.append(Transaction.type == type)
+    if start_date:
+        conditions.append(Transaction.date >= start_date)
+    if end_date:
+        conditions.append(Transaction.date <= end_date)
+    return conditions
+
+
+def _with_running_balance(page_query, conditions: list):
+    """
+    الرصيد التراكمي لكل صف في الصفحة بدالة نافذة على صفوف الصفحة فقط:
+    رصيد الصف = مجموع المعاملات المطابقة التي تلي المؤشر، أي الصفحة وكل ما هو أقدم منها (استعلام فرعي مجمع)
+    ناقص المعاملات الأحدث منه في نفس الصفحة (SUM OVER بالترتيب التنازلي)
+    """
+    page = page_query.add_columns(SIGNED_AMOUNT.label("signed_amount")).subquery("ledger_page")
+    opening = select(func.coalesce(func.sum(SIGNED_AMOUNT), 0)).where(*conditions).scalar_subquery()
+    ordering = (page.c.date.desc(), page.c.id.desc())
+    newer = func.sum(page.c.signed_amount).over(order_by=ordering, rows=(None, 0)) - page.c.signed_amount
+    return (
+        select(*[page.c[name] for name in schema_fields(TransactionResponse)], (opening - newer).label("running_balance"))
+        .order_by(*ordering)
+    )
+
+
 @router.get("")
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/", response_model=List[TransactionLedgerEntry])
 async def get_all_transactions(
+    request: Request,
     project_id: Optional[str] = None,
     type: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="حجم الصفحة (ترقيم بالمؤشر)"),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    with_balance: bool = Query(False, description="إضافة الرصيد التراكمي running_balance لكل معاملة"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على قائمة المعاملات المالية مع فلترة اختيارية"""
-    query = db.query(Transaction)
-    
-    if project_id:
-        query = query.filter(Transaction.project_id == project_id)
-    if type:
-        query = query.filter(Transaction.type == type)
+    """
+    الحصول على قائمة المعاملات المالية مع فلترة اختيارية (الأحدث أولاً)
+    limit / cursor اختياريان: ترقيم بالمؤشر على (date, id) مع X-Next-Cursor
+    """
+    conditions = _transaction_conditions(project_id, type, start_date, end_date)
+    if cursor:
+        conditions.append(keyset_condition((Transaction.date, Transaction.id), decode_cursor(cursor, (date, str))))
+    
+    query = (
+        select(*schema_columns(TransactionResponse, TRANSACTION_LIST_COLUMNS))
+        .outerjoin(Project, Transaction.project_id == Project.id)
+        .outerjoin(Unit, Transaction.unit_id == Unit.id)
+        .where(*conditions)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+    )
+    paginated = limit is not None or cursor is not None
+    limit = limit or DEFAULT_PAGE_SIZE
+    if paginated:
+        # صف إضافي لمعرفة وجود صفحة تالية
+        query = query.limit(limit + 1)
+    schema = TransactionResponse
+    if with_balance:
+        query, schema = _with_running_balance(query, conditions), TransactionLedgerEntry
+    
+    headers = {}
+    rows = db.execute(query)
+    if paginated:
+        rows = KeysetPage(rows, limit, ("date", "id"))
+        headers = rows.headers()
+    return list_response(request, serialize_rows(rows, schema), schema, headers=headers)
+
+
+# أبعاد التقرير المالي وعمود كل بعد
+REPORT_DIMENSIONS = {"project": "project_id", "unit": "unit_id", "category": "category", "month": "month"}
+
+
+def _pnl_source(dialect_name: str, start_date: Optional[date], end_date: Optional[date]):
+    """
+    أعمدة التجميع وشروط الفترة: من ملخص monthly_pnl إذا كانت الفترة أشهراً كاملة
+    (أو غير محددة)، وإلا من دفتر المعاملات مباشرة بتجميع واحد
+    """
+    whole_months = (start_date is None or start_date.day == 1) and \
+        (end_date is None or (end_date + timedelta(days=1)).day == 1)
+    if whole_months:
+        columns = {
+            "project_id": MonthlyPnl.project_id,
+            "unit_id": func.nullif(MonthlyPnl.unit_id, ""),
+            "category": func.nullif(MonthlyPnl.category, ""),
+            "month": MonthlyPnl.month,
+            "income": func.sum(MonthlyPnl.income),
+            "expense": func.sum(MonthlyPnl.expense),
+            "transaction_count": func.sum(MonthlyPnl.transaction_count),
+        }
+        conditions = []
+        if start_date:
+            conditions.append(MonthlyPnl.month >= start_date)
+        if end_date:
+            conditions.append(MonthlyPnl.month <= month_start(end_date))
+        return columns, conditions
+    
+    income = Transaction.type == TransactionType.INCOME.value
+    columns = {
+        "project_id": Transaction.project_id,
+        "unit_id": Transaction.unit_id,
+        "category": Transaction.category,
+        "month": ledger_month(dialect_name),
+        "income": func.sum(case((income, Transaction.amount), else_=0)),
+        "expense": func.sum(case((~income, Transaction.amount), else_=0)),
+        "transaction_count": func.count(),
+    }
+    conditions = []
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        conditions.append(Transaction.date >= start_date)
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    transactions = query.order_by(Transaction.date.desc()).all()
-    
-    result = []
-    for t in transactions:
-        project = t.project
-        unit = t.unit
-        
-        result.append(TransactionResponse(
-            id=t.id,
-            project_id=t.project_id,
-            unit_id=t.unit_id,
-            description=t.description,
-            date=t.date,
-            amount=t.amount,
-            type=t.type,
-            category=t.category,
-            project_name=project.name if project else "غير معروف",
-            unit_name=unit.unit_name if unit else None,
-            created_at=t.created_at
-        ))
-    
-    return result
+        conditions.append(Transaction.date <= end_date)
+    return columns, conditions
 
 
 @router.get("/summary")
@@ -72,26 +179,18 @@ async def get_financial_summary(
     project_id: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على ملخص مالي"""
-    query = db.query(Transaction)
-    
+    """الحصول على ملخص مالي (الدخل والصرف في استعلام واحد)"""
+    columns, conditions = _pnl_source(db.get_bind().dialect.name, start_date, end_date)
     if project_id:
-        query = query.filter(Transaction.project_id == project_id)
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    income = query.filter(Transaction.type == "دخل").with_entities(
-        func.coalesce(func.sum(Transaction.amount), 0)
-    ).scalar() or Decimal("0")
+        conditions.append(columns["project_id"] == project_id)
     
-    expense = query.filter(Transaction.type == "صرف").with_entities(
-        func.coalesce(func.sum(Transaction.amount), 0)
-    ).scalar() or Decimal("0")
+    income, expense = db.execute(
+        select(func.coalesce(columns["income"], 0), func.coalesce(columns["expense"], 0)).where(*conditions)
+    ).one()
+    income, expense = Decimal(income or 0), Decimal(expense or 0)
     
     return FinancialSummary(
         total_income=income,
@@ -100,10 +199,71 @@ async def get_financial_summary(
     )
 
 
+@router.get("/report")
+@router.get("/report/", response_model=List[FinancialReportRow])
+async def get_financial_report(
+    request: Request,
+    group_by: str = Query("project,unit,category,month", description="أبعاد التجميع: project,unit,category,month"),
+    project_id: Optional[str] = None,
+    unit_id: Optional[str] = None,
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    تقرير الدخل والصرف والصافي مجمعاً حسب المشروع والوحدة والتصنيف والشهر (أو بعضها)
+    استعلام GROUP BY واحد على ملخص monthly_pnl (أو على الدفتر إذا لم تكن الفترة أشهراً كاملة)
+    """
+    dimensions = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in dimensions if name not in REPORT_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"حقل تجميع غير معروف: {', '.join(unknown)}"
+        )
+    keys = [REPORT_DIMENSIONS[name] for name in dict.fromkeys(dimensions)]
+    
+    columns, conditions = _pnl_source(db.get_bind().dialect.name, start_date, end_date)
+    for key, value in (("project_id", project_id), ("unit_id", unit_id), ("category", category)):
+        if value:
+            conditions.append(columns[key] == value)
+    
+    grouped = (
+        select(
+            *[columns[key].label(key) for key in keys],
+            *[func.coalesce(columns[name], 0).label(name) for name in ("income", "expense", "transaction_count")],
+        )
+        .where(*conditions)
+        .group_by(*[columns[key] for key in keys])
+        .subquery("pnl")
+    )
+    report_columns = {key: grouped.c[key] for key in keys}
+    source = grouped
+    if "project_id" in keys:
+        report_columns["project_name"] = func.coalesce(Project.name, UNKNOWN)
+        source = source.outerjoin(Project, Project.id == grouped.c.project_id)
+    if "unit_id" in keys:
+        report_columns["unit_name"] = Unit.unit_name
+        source = source.outerjoin(Unit, Unit.id == grouped.c.unit_id)
+    report_columns.update({
+        "income": grouped.c.income,
+        "expense": grouped.c.expense,
+        "net": grouped.c.income - grouped.c.expense,
+        "transaction_count": grouped.c.transaction_count,
+    })
+    ordering = [report_columns[name] for name in ("month", "project_name", "unit_name", "category") if name in report_columns]
+    rows = db.execute(
+        select(*schema_columns(FinancialReportRow, report_columns)).select_from(source).order_by(*ordering)
+    )
+    return list_response(request, serialize_rows(rows, FinancialReportRow), FinancialReportRow)
+
+
 @router.get("/team-achievement")
 @router.get("/team-achievement/", response_model=TeamAchievement)
 async def get_team_achievement(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """رحلة إنجاز الفريق - إحصائيات يومية وأسبوعية وشهرية"""
@@ -1,55 +1,237 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import String, cast, func, literal, select, union_all
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.unit import Unit
 from ..models.project import Project
-from ..schemas.unit import UnitResponse, UnitCreate, UnitUpdate, UnitSimple, UnitForSelect
+from ..models.owner import Owner
+from ..schemas.unit import (
+    UnitResponse, UnitCreate, UnitUpdate, UnitSimple, UnitForSelect, UnitStatus, UnitType, UnitSearchResponse
+)
 from ..utils.dependencies import get_current_user, require_owners_agent
 from ..models.user import User
+from ..services.unit_amenities import amenities_filter, amenity_values, normalize_amenities, uses_jsonb
 from ..services.employee_performance_service import log_unit_created, EmployeePerformanceService
 from ..models.employee_performance import ActivityType
+from ..utils.fast_response import (
+    FastJSONResponse, UNKNOWN, list_response, parse_fields, schema_columns, serialize_rows, wants
+)
+from ..utils.etag import check_not_modified, etag_headers
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, KeysetPage, decode_cursor, keyset_condition
 
 router = APIRouter(prefix="/api/units", tags=["الوحدات"])
 
 
+# أعمدة قائمة الوحدات بأسماء حقول UnitResponse (مسار التحويل السريع)
+UNIT_LIST_COLUMNS = {
+    "id": Unit.id,
+    "project_id": Unit.project_id,
+    "unit_name": Unit.unit_name,
+    "unit_type": Unit.unit_type,
+    "rooms": Unit.rooms,
+    "floor_number": Unit.floor_number,
+    "unit_area": Unit.unit_area,
+    "status": Unit.status,
+    "price_days_of_week": Unit.price_days_of_week,
+    "price_in_weekends": Unit.price_in_weekends,
+    "amenities": Unit.amenities,
+    "description": Unit.description,
+    "permit_no": Unit.permit_no,
+    "project_name": func.coalesce(Project.name, UNKNOWN),
+    "owner_name": func.coalesce(Owner.owner_name, UNKNOWN),
+    "city": Project.city,
+    "created_at": Unit.created_at,
+    "updated_at": Unit.updated_at,
+}
+
+UNIT_LIST_FIXUPS = {"amenities": lambda value: value or []}
+
+# ترتيب القائمة ومؤشر الصفحات: الأحدث أولاً، والمعرف لفك التعادل (فهرس ix_units_created_at_id)
+UNIT_CURSOR_COLUMNS = (Unit.created_at, Unit.id)
+
+# حقول البحث التي تُحسب لها أعداد (facets) بالإضافة إلى المرافق
+UNIT_FACETS = {
+    "unit_type": Unit.unit_type,
+    "city": Project.city,
+    "status": Unit.status,
+    "rooms": Unit.rooms,
+}
+
+
+def _apply_unit_filters(
+    query,
+    status_filter: Optional[UnitStatus] = None,
+    unit_type: Optional[UnitType] = None,
+    city: Optional[str] = None,
+    project_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    rooms: Optional[int] = None,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None
+):
+    """شروط التصفية المشتركة بين القائمة والبحث (city و owner_id تحتاج JOIN مع Project)"""
+    if status_filter:
+        query = query.where(Unit.status == status_filter.value)
+    if unit_type:
+        query = query.where(Unit.unit_type == unit_type.value)
+    if city:
+        query = query.where(Project.city == city)
+    if project_id:
+        query = query.where(Unit.project_id == project_id)
+    if owner_id:
+        query = query.where(Project.owner_id == owner_id)
+    if rooms is not None:
+        query = query.where(Unit.rooms == rooms)
+    if min_price is not None:
+        query = query.where(Unit.price_days_of_week >= min_price)
+    if max_price is not None:
+        query = query.where(Unit.price_days_of_week <= max_price)
+    return query
+
+
+def _unit_page(db: Session, query, limit: Optional[int], cursor: Optional[str]) -> KeysetPage:
+    """صفحة من القائمة مرتبة بالأحدث أولاً تبدأ بعد المؤشر"""
+    if cursor:
+        query = query.where(keyset_condition(UNIT_CURSOR_COLUMNS, decode_cursor(cursor, (datetime, str))))
+    limit = limit or DEFAULT_PAGE_SIZE
+    # LIMIT في SQL: المشغل (psycopg2) يحمل كل نتيجة الاستعلام للذاكرة قبل fetchmany
+    query = query.add_columns(
+        Unit.created_at.label("cursor_created_at"), Unit.id.label("cursor_id")
+    ).order_by(Unit.created_at.desc(), Unit.id.desc()).limit(limit + 1)
+    return KeysetPage(db.execute(query), limit, ("cursor_created_at", "cursor_id"))
+
+
 @router.get("")
 @router.get("/", response_model=List[UnitResponse])
 async def get_all_units(
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,unit_name)"),
+    status_filter: Optional[UnitStatus] = Query(None, alias="status"),
+    unit_type: Optional[UnitType] = None,
+    city: Optional[str] = None,
+    project_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    rooms: Optional[int] = Query(None, ge=0),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="أقل سعر لأيام الأسبوع"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="أعلى سعر لأيام الأسبوع"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="حجم الصفحة (بدونه ترجع كل الوحدات)"),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    الحصول على قائمة الوحدات (الأحدث أولاً) مع التصفية وترقيم الصفحات بالمؤشر
+    استعلام واحد مع أسماء المشروع والمالك مهما كان عدد الوحدات
+    """
+    selected = parse_fields(fields, UnitResponse)
+    etag, not_modified = check_not_modified(request, db, ("units", "projects", "owners"))
+    if not_modified:
+        return not_modified
+    
+    query = select(*schema_columns(UnitResponse, UNIT_LIST_COLUMNS, selected)).select_from(Unit)
+    if wants(selected, "project_name", "owner_name", "city") or city or owner_id:
+        query = query.outerjoin(Project, Unit.project_id == Project.id)
+    if wants(selected, "owner_name"):
+        query = query.outerjoin(Owner, Project.owner_id == Owner.id)
+    query = _apply_unit_filters(
+        query, status_filter, unit_type, city, project_id, owner_id, rooms, min_price, max_price
+    )
+    
+    headers = etag_headers(etag)
+    if limit is None and cursor is None:
+        rows = db.execute(query.order_by(Unit.created_at.desc(), Unit.id.desc()))
+    else:
+        rows = _unit_page(db, query, limit, cursor)
+        headers.update(rows.headers())
+    
+    return list_response(
+        request,
+        serialize_rows(rows, UnitResponse, selected, fixups=UNIT_LIST_FIXUPS),
+        UnitResponse,
+        selected,
+        headers=headers
+    )
+
+
+@router.get("/search")
+@router.get("/search/", response_model=UnitSearchResponse)
+async def search_units(
+    request: Request,
+    amenities: Optional[str] = Query(None, description="المرافق المطلوبة كلها مفصولة بفاصلة (مثال: مسبح,واي فاي)"),
+    fields: Optional[str] = Query(None, description="الحقول المطلوبة مفصولة بفاصلة (مثال: id,unit_name)"),
+    status_filter: Optional[UnitStatus] = Query(None, alias="status"),
+    unit_type: Optional[UnitType] = None,
+    city: Optional[str] = None,
+    project_id: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    rooms: Optional[int] = Query(None, ge=0),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="أقل سعر لأيام الأسبوع"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="أعلى سعر لأيام الأسبوع"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="قيمة X-Next-Cursor من الصفحة السابقة"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """الحصول على قائمة جميع الوحدات"""
-    units = db.query(Unit).order_by(Unit.created_at.desc()).all()
+    """
+    البحث في الوحدات مع أعداد النتائج لكل نوع ومدينة وحالة وعدد غرف ومرفق
+    مثال: فلل بمسبح في الرياض ← ?unit_type=فيلا&city=الرياض&amenities=مسبح
+    الأعداد تُحسب لكل النتائج المطابقة في استعلام واحد، والنتائج نفسها صفحة بالمؤشر
+    """
+    selected = parse_fields(fields, UnitResponse)
+    wanted_amenities = normalize_amenities((amenities or "").split(","))
+    etag, not_modified = check_not_modified(request, db, ("units", "projects", "owners"))
+    if not_modified:
+        return not_modified
     
-    result = []
-    for unit in units:
-        project = unit.project
-        owner_name = project.owner.owner_name if project and project.owner else "غير معروف"
-        
-        result.append(UnitResponse(
-            id=unit.id,
-            project_id=unit.project_id,
-            unit_name=unit.unit_name,
-            unit_type=unit.unit_type,
-            rooms=unit.rooms,
-            floor_number=unit.floor_number,
-            unit_area=unit.unit_area,
-            status=unit.status,
-            price_days_of_week=unit.price_days_of_week,
-            price_in_weekends=unit.price_in_weekends,
-            amenities=unit.amenities or [],
-            description=unit.description,
-            permit_no=unit.permit_no,
-            project_name=project.name if project else "غير معروف",
-            owner_name=owner_name,
-            city=project.city if project else None,
-            created_at=unit.created_at,
-            updated_at=unit.updated_at
-        ))
+    dialect = db.get_bind().dialect.name
+    
+    def filtered(query):
+        query = _apply_unit_filters(
+            query, status_filter, unit_type, city, project_id, owner_id, rooms, min_price, max_price
+        )
+        if wanted_amenities:
+            query = query.where(amenities_filter(wanted_amenities, dialect))
+        return query
     
-    return result
+    # الأعداد: مجموعة واحدة من الوحدات المطابقة ثم GROUP BY لكل حقل مجمعة بـ UNION ALL
+    matched_columns = [Unit.id, *(column.label(name) for name, column in UNIT_FACETS.items())]
+    if uses_jsonb(dialect):
+        matched_columns.append(Unit.amenities)
+    matched = filtered(
+        select(*matched_columns).select_from(Unit).outerjoin(Project, Unit.project_id == Project.id)
+    ).cte("matched")
+    amenity = amenity_values(matched, dialect)
+    facet_query = union_all(*(
+        select(literal(name).label("facet"), cast(matched.c[name], String).label("value"), func.count().label("count"))
+        .group_by(matched.c[name])
+        for name in UNIT_FACETS
+    ), select(literal("amenity"), amenity.c.value, func.count()).group_by(amenity.c.value))
+    
+    facets = {name: [] for name in (*UNIT_FACETS, "amenity")}
+    for facet, value, count in db.execute(facet_query):
+        facets[facet].append({"value": value, "count": count})
+    for counts in facets.values():
+        counts.sort(key=lambda item: (-item["count"], item["value"] or ""))
+    
+    query = select(*schema_columns(UnitResponse, UNIT_LIST_COLUMNS, selected)).select_from(Unit)
+    query = query.outerjoin(Project, Unit.project_id == Project.id)
+    if wants(selected, "owner_name"):
+        query = query.outerjoin(Owner, Project.owner_id == Owner.id)
+    page = _unit_page(db, filtered(query), limit, cursor)
+    
+    return list_response(
+        request,
+        serialize_rows(page, UnitResponse, selected, fixups=UNIT_LIST_FIXUPS),
+        UnitResponse,
+        selected,
+        headers={**etag_headers(etag), **page.headers()},
+        # كل وحدة لها حالة واحدة، فمجموع أعداد الحالات = عدد النتائج
+        envelope={"total": sum(item["count"] for item in facets["status"]), "facets": facets}
+    )
 
 
 @router.get("/by-project/{project_id}")
@@ -79,20 +261,20 @@ async def get_units_by_project(
 @router.get("/select/{project_id}/", response_model=List[UnitForSelect])
 async def get_units_for_select(
     project_id: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """الحصول على قائمة مبسطة للوحدات (للـ Dropdown)"""
-    units = db.query(Unit).filter(Unit.project_id == project_id).all()
-    return [
-        UnitForSelect(
-            id=u.id,
-            unit_name=u.unit_name,
-            price_days_of_week=u.price_days_of_week,
-            price_in_weekends=u.price_in_weekends
-        )
-        for u in units
-    ]
+    etag, not_modified = check_not_modified(request, db, ("units",))
+    if not_modified:
+        return not_modified
+    
+    rows = db.execute(
+        select(*schema_columns(UnitForSelect, UNIT_LIST_COLUMNS))
+        .where(Unit.project_id == project_id)
+    )
+    return FastJSONResponse(serialize_rows(rows, UnitForSelect), headers=etag_headers(etag))
 
 
 @router.get("/{unit_id}")
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+
+
+class BatchRequestItem(BaseModel):
+    """طلب فرعي: مسار GET موجود مع معاملاته (مثال: /api/transactions?type=دخل)"""
+    id: Optional[str] = None  # معرف اختياري يُعاد كما هو مع النتيجة
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., min_length=1)
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    path: str
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
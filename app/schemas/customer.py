@@ -1,8 +1,11 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, TYPE_CHECKING, Any, Literal
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
 from enum import Enum
 
+from .booking import BookingResponse
+
 
 class GenderEnum(str, Enum):
     """أنواع الجنس"""
@@ -59,6 +62,25 @@ class CustomerWithBookings(CustomerResponse):
     bookings: List[Any] = []
 
 
+class CustomerBookingSummary(BaseModel):
+    """ملخص كل حجوزات العميل (لا الصفحة الحالية فقط)"""
+    total_bookings: int = 0
+    completed_bookings: int = 0  # الحجوزات المكتملة (مكتمل / خروج)
+    cancelled_bookings: int = 0  # الحجوزات الملغاة
+    total_nights: int = 0  # مجموع الليالي (بدون الملغاة)
+    total_spent: Decimal = Decimal("0")  # مجموع أسعار الحجوزات (بدون الملغاة)
+    first_check_in: Optional[date] = None  # أول إقامة
+    last_check_in: Optional[date] = None  # آخر إقامة
+
+
+class CustomerBookingHistory(BaseModel):
+    """سجل حجوزات العميل: الحجوزات مع أسماء الوحدات والمشاريع وملخص كل الحجوزات"""
+    customer: CustomerResponse
+    summary: CustomerBookingSummary
+    total_bookings: int = 0
+    bookings: List[BookingResponse] = []
+
+
 class CustomerStatsResponse(BaseModel):
     """إحصائيات العملاء"""
     total_customers: int = 0
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class SlowQueryResponse(BaseModel):
+    fingerprint: str
+    statement: str
+    param_types: Optional[str] = None
+    route: Optional[str] = None
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    last_ms: float
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    explained_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class SlowQueryDetail(SlowQueryResponse):
+    explain_plan: Optional[str] = None
@@ -62,6 +62,7 @@ class ActivityLogResponse(ActivityLogBase):
     id: str
     employee_id: str
     employee_name: Optional[str] = None
+    metadata_json: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from decimal import Decimal
 
 
 class OwnerBase(BaseModel):
@@ -38,3 +39,18 @@ class OwnerSimple(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class OwnerPortfolio(BaseModel):
+    """ملخص محفظة المالك: المشاريع والوحدات والإشغال والإيرادات والحركات المالية"""
+    id: str
+    owner_name: str
+    owner_mobile_phone: str
+    project_count: int = 0
+    unit_count: int = 0
+    occupied_units: int = 0
+    occupancy_rate: float = 0.0
+    month_revenue: Decimal = Decimal("0")
+    total_income: Decimal = Decimal("0")
+    total_expense: Decimal = Decimal("0")
+    net_income: Decimal = Decimal("0")
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime, date
+from decimal import Decimal
+
+
+class ProjectSettlement(BaseModel):
+    """تسوية مشروع واحد ضمن تسوية المالك"""
+    project_id: str
+    project_name: str
+    commission_percent: Decimal = Decimal("0")
+    bank_name: Optional[str] = None
+    bank_iban: Optional[str] = None
+    booking_count: int = 0
+    gross_revenue: Decimal = Decimal("0")  # إيرادات الحجوزات (بدون الملغاة)
+    commission: Decimal = Decimal("0")  # العمولة = الإيراد × النسبة
+    expenses: Decimal = Decimal("0")  # مصروفات المشروع في الشهر
+    net_payout: Decimal = Decimal("0")  # صافي المستحق للمالك
+
+
+class OwnerSettlementResponse(BaseModel):
+    """تسوية مالك لشهر"""
+    owner_id: str
+    owner_name: str = ""
+    month: date
+    booking_count: int = 0
+    gross_revenue: Decimal = Decimal("0")
+    commission: Decimal = Decimal("0")
+    expenses: Decimal = Decimal("0")
+    net_payout: Decimal = Decimal("0")
+    projects: List[ProjectSettlement] = []
+    generated_at: Optional[datetime] = None
+
+
+class SettlementRunResult(BaseModel):
+    """نتيجة تشغيل محرك التسويات"""
+    month: date
+    owners: int = 0  # الملاك الذين لهم تسوية هذا الشهر
+    regenerated: int = 0  # أعيد إنشاء كشوفهم (بيانات جديدة أو متغيرة)
+    unchanged: int = 0  # كشوفهم المحفوظة ما زالت صحيحة
+    removed: int = 0  # لم تعد لهم حركة في الشهر
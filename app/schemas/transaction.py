@@ -44,12 +44,31 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionLedgerEntry(TransactionResponse):
+    """معاملة في الدفتر مع الرصيد التراكمي (الدخل - الصرف حتى هذه المعاملة ضمن نفس التصفية)"""
+    running_balance: Decimal = Decimal("0")
+
+
 class FinancialSummary(BaseModel):
     total_income: Decimal = Decimal("0")
     total_expense: Decimal = Decimal("0")
     net_profit: Decimal = Decimal("0")
 
 
+class FinancialReportRow(BaseModel):
+    """صف في التقرير المالي: الحقول غير المجمعة عليها تبقى فارغة"""
+    project_id: Optional[str] = None
+    project_name: Optional[str] = None
+    unit_id: Optional[str] = None
+    unit_name: Optional[str] = None
+    category: Optional[str] = None
+    month: Optional[date] = None  # أول يوم في الشهر
+    income: Decimal = Decimal("0")
+    expense: Decimal = Decimal("0")
+    net: Decimal = Decimal("0")
+    transaction_count: int = 0
+
+
 class DailyChallenge(BaseModel):
     """تحدي اليوم"""
     unit_occupancy: int = 0  # إشغال الوحدات
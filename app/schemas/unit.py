@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
 from enum import Enum
@@ -89,3 +89,15 @@ class UnitForSelect(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+
+class UnitSearchResponse(BaseModel):
+    """نتائج البحث (صفحة) + عدد كل القيم في كل النتائج المطابقة"""
+    total: int
+    facets: Dict[str, List[FacetCount]]  # unit_type, city, status, rooms, amenity
+    items: List[UnitResponse]
@@ -0,0 +1,172 @@
+"""
+كاش أوصاف الوحدات المولدة بالذكاء الاصطناعي
+AI description cache: in-memory LRU + persistent table, TTL, single-flight
+
+المفتاح بصمة sha256 لطلب التوليد بعد التطبيع (ترتيب المرافق والمسافات وحالة الأحرف لا تغير المفتاح).
+- ذاكرة العامل (LRU بحجم ai_description_cache_size) ثم جدول ai_descriptions، بصلاحية ai_description_cache_seconds
+- الطلبات المتزامنة لنفس المفتاح في العامل تنتظر استدعاءً واحداً للمزود (single-flight)
+- المزود دالة async (prompt -> نص) يمررها المستدعي، فيمكن استبداله بمزود محلي في الاختبارات
+حذف الأوصاف المنتهية من الجدول:
+    python -m app.services.ai_descriptions
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.ai_description import AiDescription
+from ..utils.metrics import record_cache_access
+
+logger = logging.getLogger("mnam.ai")
+
+DescriptionGenerator = Callable[[str], Awaitable[str]]
+
+# مفتاح -> (الوصف، وقت انتهاء الصلاحية time.time())
+_memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_memory_lock = threading.Lock()
+# مفتاح -> استدعاء المزود الجاري (داخل حلقة أحداث العامل)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple, set)):
+        return sorted({_normalize(item) for item in value}, key=str)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def description_cache_key(fields: dict, namespace: str = "") -> str:
+    """بصمة طلب التوليد بعد التطبيع (namespace = النموذج/صيغة الـ prompt حتى يلغي تغييرها الكاش)"""
+    normalized = {name: _normalize(value) for name, value in fields.items()}
+    payload = orjson.dumps({"namespace": namespace, "fields": normalized}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _memory_get(key: str) -> Optional[str]:
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return entry[0]
+
+
+def _memory_put(key: str, description: str, expires_at: float) -> None:
+    size = settings.ai_description_cache_size
+    if size <= 0:
+        return
+    with _memory_lock:
+        _memory[key] = (description, expires_at)
+        _memory.move_to_end(key)
+        while len(_memory) > size:
+            _memory.popitem(last=False)
+
+
+def _store_get(key: str, ttl: float) -> Optional[Tuple[str, float]]:
+    db = SessionLocal()
+    try:
+        row = db.execute(
+            select(AiDescription.description, AiDescription.created_at).where(AiDescription.cache_key == key)
+        ).first()
+    finally:
+        db.close()
+    if row is None:
+        return None
+    age = (datetime.utcnow() - row.created_at).total_seconds()
+    if age >= ttl:
+        return None
+    return row.description, time.time() + ttl - age
+
+
+def _store_put(key: str, description: str) -> None:
+    db = SessionLocal()
+    try:
+        db.merge(AiDescription(cache_key=key, description=description, created_at=datetime.utcnow()))
+        db.commit()
+    except SQLAlchemyError as e:
+        # عامل آخر حفظ نفس المفتاح أو القاعدة غير متاحة: الوصف يُعاد للمستخدم على أي حال
+        db.rollback()
+        logger.warning("AI description cache write failed: %s", e)
+    finally:
+        db.close()
+
+
+async def _fill(key: str, prompt: str, generate: DescriptionGenerator, ttl: float) -> Tuple[str, str]:
+    if ttl > 0:
+        stored = await run_in_threadpool(_store_get, key, ttl)
+        if stored is not None:
+            _memory_put(key, *stored)
+            return stored[0], "store"
+    description = await generate(prompt)
+    if ttl > 0 and description:
+        _memory_put(key, description, time.time() + ttl)
+        await run_in_threadpool(_store_put, key, description)
+    return description, "upstream"
+
+
+def _finish(key: str, flight: asyncio.Future) -> None:
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    if not flight.cancelled():
+        flight.exception()  # الخطأ يصل لكل المنتظرين، ولا يُسجل كاستثناء غير مقروء إن لم يبق أحد
+
+
+async def cached_description(key: str, prompt: str, generate: DescriptionGenerator) -> Tuple[str, str]:
+    """
+    الوصف من الكاش أو من المزود، مع مصدره: memory / store / shared / upstream
+    الأخطاء لا تُحفظ: الطلب التالي يعيد المحاولة
+    """
+    ttl = settings.ai_description_cache_seconds
+    if ttl > 0:
+        description = _memory_get(key)
+        if description is not None:
+            record_cache_access("ai_descriptions", True)
+            return description, "memory"
+
+    flight = _inflight.get(key)
+    if flight is not None:
+        record_cache_access("ai_descriptions", True)
+        description, _ = await asyncio.shield(flight)
+        return description, "shared"
+
+    flight = asyncio.ensure_future(_fill(key, prompt, generate, ttl))
+    _inflight[key] = flight
+    flight.add_done_callback(lambda done: _finish(key, done))
+    # shield: انقطاع اتصال صاحب الطلب الأول لا يلغي الاستدعاء الذي ينتظره الآخرون
+    description, source = await asyncio.shield(flight)
+    record_cache_access("ai_descriptions", source == "store")
+    return description, source
+
+
+def purge_expired_descriptions(db: Session) -> int:
+    """حذف الأوصاف المنتهية الصلاحية من الجدول، يعيد عدد الصفوف المحذوفة"""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.ai_description_cache_seconds)
+    count = db.execute(delete(AiDescription).where(AiDescription.created_at < cutoff)).rowcount
+    db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    session = SessionLocal()
+    try:
+        print(f"🤖 Purged {purge_expired_descriptions(session)} expired AI descriptions")
+    finally:
+        session.close()
@@ -0,0 +1,219 @@
+"""
+البحث في العملاء بالاسم العربي ورقم الجوال
+Customer search: normalized search column, pg_trgm on PostgreSQL, FTS5 trigram on SQLite
+
+كل عميل له عمود customers.search_text: الاسم بعد توحيد الهمزات والتاء المربوطة والألف المقصورة
+وحذف التشكيل، متبوعاً بأرقام الجوال بصيغتها المحلية والدولية (0551234567 966551234567).
+- PostgreSQL: فهرس GIN بـ gin_trgm_ops يخدم LIKE '%...%' (بادئة ولاحقة ووسط الرقم)
+- SQLite: جدول FTS5 بمقسّم trigram (customers_fts) يُحدث بالـ triggers
+يُحسب العمود في ORM قبل كل إدخال/تعديل، والصفوف القديمة تُملأ عند بدء التشغيل.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, column, event, func, literal_column, select, table, text, update
+from sqlalchemy.orm import Session
+
+from ..models.customer import Customer
+from .startup_steps import run_once
+
+# أطول من ذلك لا يفيد في البحث
+MAX_SEARCH_TEXT = 300
+# أقصر مقطع يخدمه فهرس trigram (الأقصر يُبحث عنه بـ LIKE)
+MIN_TRIGRAM_TERM = 3
+# أقصى عدد من النتائج (الأعلى صلة) تُعرض صفحاتها (اسم شائع قد يطابق عشرات الآلاف)
+SEARCH_CANDIDATES = 1000
+# ترويسة تُرسل عندما تتجاوز المطابقات SEARCH_CANDIDATES (النتائج هي الأعلى صلة فقط: حدد البحث أكثر)
+TRUNCATED_HEADER = "X-Search-Truncated"
+# حجم دفعة ملء العمود للصفوف القديمة
+BACKFILL_BATCH = 5000
+
+_DIACRITICS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ى": "ي", "ئ": "ي", "ؤ": "و",
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ٠-٩
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ۰-۹
+})
+_NON_WORD = re.compile("[^0-9a-z\u0621-\u064A]+")
+_PHONE_QUERY = re.compile(r"^[\d\s+\-()]+$")
+# رمز الدولة: 00966 / +966 / 966 صيغ دولية لنفس الرقم المحلي 0...
+COUNTRY_CODE = "966"
+INTERNATIONAL_PREFIX = "00"
+
+customers_fts = table("customers_fts", column("rowid"), column("rank"))
+
+_SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5("
+    "search_text, content='customers', content_rowid='rowid', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN "
+    "INSERT INTO customers_fts(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN "
+    "INSERT INTO customers_fts(customers_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE OF search_text ON customers BEGIN "
+    "INSERT INTO customers_fts(customers_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); "
+    "INSERT INTO customers_fts(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+]
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """توحيد النص العربي للبحث: بدون تشكيل، أ/إ/آ → ا، ة → ه، ى → ي، أرقام عربية → لاتينية"""
+    value = _DIACRITICS.sub("", (value or "").lower()).translate(_LETTERS)
+    return _NON_WORD.sub(" ", value).strip()
+
+
+def phone_digits(value: str) -> str:
+    """
+    أرقام الجوال فقط؛ 00 تُحذف إذا تبعها رمز الدولة فقط (00966... → 966...)
+    وغير ذلك يبقى كما كُتب (0012 مقطع من رقم وليس بادئة دولية)
+    """
+    digits = re.sub(r"\D", "", value.translate(_LETTERS))
+    if digits.startswith(INTERNATIONAL_PREFIX + COUNTRY_CODE):
+        return digits[len(INTERNATIONAL_PREFIX):]
+    return digits
+
+
+def phone_variants(phone: Optional[str]) -> List[str]:
+    """الرقم بصيغتيه المحلية (05...) والدولية (9665...) حتى تطابق البادئة أياً كانت الصيغة"""
+    digits = phone_digits(phone or "")
+    if not digits:
+        return []
+    if digits.startswith(COUNTRY_CODE):
+        return [f"0{digits[len(COUNTRY_CODE):]}", digits]
+    if digits.startswith("0") and not digits.startswith(INTERNATIONAL_PREFIX):
+        return [digits, f"{COUNTRY_CODE}{digits[1:]}"]
+    return [digits]
+
+
+def customer_search_text(name: Optional[str], phone: Optional[str]) -> str:
+    return " ".join([normalize_text(name), *phone_variants(phone)]).strip()[:MAX_SEARCH_TEXT]
+
+
+def _set_search_text(mapper, connection, target: Customer) -> None:
+    target.search_text = customer_search_text(target.name, target.phone)
+
+
+def install_customer_search() -> None:
+    """حساب search_text مع كل إدخال/تعديل عبر ORM"""
+    for name in ("before_insert", "before_update"):
+        if not event.contains(Customer, name, _set_search_text):
+            event.listen(Customer, name, _set_search_text)
+
+
+def ensure_customer_search(db: Session) -> None:
+    """
+    إنشاء جدول FTS5 والـ triggers على SQLite (وإعادة بنائه إذا كانت الـ triggers جديدة)
+    وملء search_text للعملاء المضافين قبل هذه الميزة أو بإدخال جماعي
+    """
+    connection = db.connection()
+    sqlite = connection.dialect.name == "sqlite"
+    # بدون triggers يُملأ العمود أولاً ثم يُبنى الفهرس مرة واحدة (FTS5 يرفض حذف صفوف لم تُفهرس)
+    rebuild = sqlite and connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'customers_fts_ai'"
+    )).first() is None
+
+    filled = 0
+    while True:
+        rows = connection.execute(
+            select(Customer.id, Customer.name, Customer.phone)
+            .where(Customer.search_text.is_(None))
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            update(Customer.__table__)
+            .where(Customer.__table__.c.id == bindparam("customer_id"))
+            # updated_at كما هو: ليس تعديلاً من المستخدم
+            .values(search_text=bindparam("normalized"), updated_at=Customer.__table__.c.updated_at),
+            [{"customer_id": row.id, "normalized": customer_search_text(row.name, row.phone)} for row in rows],
+        )
+        filled += len(rows)
+
+    if sqlite:
+        for statement in _SQLITE_FTS:
+            connection.execute(text(statement))
+    if rebuild:
+        connection.execute(text("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')"))
+    db.commit()
+    if filled:
+        print(f"🔎 Indexed {filled} customers for search")
+    refreshed = run_once(db, "customer_search_international_phones", refresh_international_phones)
+    if refreshed:
+        print(f"🔎 Re-indexed {refreshed} customers with international phone numbers")
+
+
+def refresh_international_phones(connection) -> int:
+    """
+    إعادة حساب search_text لأرقام تبدأ بـ 00 (كانت 00 تُحذف قبل أي رمز دولة، فـ 0044... خُزن 44...)
+    """
+    rows = connection.execute(
+        select(Customer.id, Customer.name, Customer.phone)
+        .where(Customer.phone.like(f"{INTERNATIONAL_PREFIX}%"))
+    ).all()
+    if rows:
+        connection.execute(
+            update(Customer.__table__)
+            .where(Customer.__table__.c.id == bindparam("customer_id"))
+            .values(search_text=bindparam("normalized"), updated_at=Customer.__table__.c.updated_at),
+            [{"customer_id": row.id, "normalized": customer_search_text(row.name, row.phone)} for row in rows],
+        )
+    return len(rows)
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    مقاطع البحث بعد التوحيد؛ رقم الجوال المكتوب بمسافات أو + يُعامل كمقطع واحد
+    يلزم مقطع واحد على الأقل بطول MIN_TRIGRAM_TERM (الأقصر لا يخدمه الفهرس)
+    """
+    if _PHONE_QUERY.match(query) and re.search(r"\d", query):
+        return [phone_digits(query)]
+    return normalize_text(query).split()
+
+
+def _search_candidates(terms: List[str], dialect_name: str) -> Tuple[object, list]:
+    """
+    معرفات العملاء المطابقين (كل المقاطع موجودة) وترتيب الصلة:
+    1. مطابقة بداية كلمة (بداية الاسم أو بداية الرقم) قبل المطابقة في الوسط أو اللاحقة
+    2. التشابه: similarity على PostgreSQL، وعلى SQLite النص الأقصر أقرب للمقطع
+    """
+    indexed = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM]
+    short = [term for term in terms if len(term) < MIN_TRIGRAM_TERM]
+    word_prefix = case(
+        ((literal_column("' '") + Customer.search_text).like(f"% {terms[0]}%"), 0), else_=1
+    )
+    if dialect_name == "postgresql":
+        # LIKE '%...%' يستخدم فهرس ix_customers_search_trgm
+        candidates = select(Customer.id).where(*[Customer.search_text.like(f"%{term}%") for term in terms])
+        similarity = func.similarity(Customer.search_text, " ".join(terms)).desc()
+    else:
+        # المطابقة عبر جدول FTS، والمقاطع القصيرة بـ LIKE على الصفوف المطابقة فقط
+        candidates = (
+            select(Customer.id)
+            .select_from(customers_fts)
+            .join(Customer, literal_column("customers.rowid") == customers_fts.c.rowid)
+            .where(
+                literal_column("customers_fts").op("MATCH")(" ".join(f'"{term}"' for term in indexed)),
+                *[Customer.search_text.like(f"%{term}%") for term in short],
+            )
+        )
+        similarity = func.length(Customer.search_text)
+    return candidates, [word_prefix, similarity]
+
+
+def apply_customer_search(query, terms: List[str], dialect_name: str) -> Tuple[object, list]:
+    """
+    تصفية الاستعلام بالمطابقين وترتيب الصلة (يُضاف بعده Customer.name, Customer.id)
+    أعلى SEARCH_CANDIDATES مطابقة صلةً فقط: القطع بعد الترتيب بنفس مفتاحه، فلا تسقط أفضل النتائج
+    لاسم شائع (search_truncated يخبر العميل بوجود مطابقات أكثر)
+    """
+    candidates, rank = _search_candidates(terms, dialect_name)
+    top = candidates.order_by(*rank, Customer.name, Customer.id).limit(SEARCH_CANDIDATES)
+    return query.filter(Customer.id.in_(top)), rank
+
+
+def search_truncated(db: Session, terms: List[str]) -> bool:
+    """هل المطابقات أكثر من SEARCH_CANDIDATES؟ (عدّ بحد SEARCH_CANDIDATES + 1 فلا يمسح كل المطابقات)"""
+    candidates, _ = _search_candidates(terms, db.get_bind().dialect.name)
+    limited = candidates.limit(SEARCH_CANDIDATES + 1).subquery()
+    return db.execute(select(func.count()).select_from(limited)).scalar() > SEARCH_CANDIDATES
@@ -0,0 +1,195 @@
+"""
+إحصائيات العميل التراكمية
+Customer lifetime counters maintained by the booking lifecycle, plus bulk reconciliation
+
+customers.booking_count / completed_booking_count / total_revenue تُحدث داخل نفس معاملة الحجز
+مع كل إنشاء أو تغيير حالة أو سعر أو عميل أو حذف (عبر ORM)، فالقوائم والترتيب تقرأ الأعمدة مباشرة.
+- booking_count: كل حجوزات العميل
+- completed_booking_count / total_revenue: الحجوزات المكتملة (مكتمل / خروج) ومجموع أسعارها
+
+ما يتجاوز ORM (إدخال جماعي، حذف مباشر في القاعدة) يُصحح بـ reconcile_customer_stats:
+استعلام مجمع واحد يحدث الصفوف المنحرفة فقط.
+    python -m app.services.customer_stats
+
+قبل ربط العدادات بالحجوزات لم يكن completed_booking_count / total_revenue يُحدثان، فأول تشغيل بعد الترقية
+يصحح كل العملاء مرة واحدة (ensure_customer_stats) قبل أن تضيف الأحداث الفروق على هذا الأساس.
+
+العدادات و created_at مفاتيح ترتيب بالمؤشر في قائمة العملاء فلا تكون NULL:
+PostgreSQL يعبئها ويجعلها NOT NULL في run_migrations، وSQLite (بلا ALTER COLUMN) يعبئها ensure_customer_sort_keys.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, event, exists, func, or_, select, update
+from sqlalchemy.orm import Session, attributes, object_session
+from sqlalchemy.orm.util import identity_key
+
+from ..models.booking import Booking, BookingStatus
+from ..models.customer import Customer, LEGACY_CREATED_AT
+from .startup_steps import run_once
+
+COMPLETED_STATUSES = (BookingStatus.COMPLETED.value, BookingStatus.CHECKED_OUT.value)
+COUNTER_FIELDS = ("booking_count", "completed_booking_count", "total_revenue")
+# فرق الإيراد المقبول قبل اعتبار الصف منحرفاً (total_revenue عمود Float)
+REVENUE_TOLERANCE = 0.01
+
+_customers = Customer.__table__
+
+_apply_deltas = (
+    update(_customers)
+    .where(_customers.c.id == bindparam("customer_id"))
+    .values(
+        booking_count=func.coalesce(_customers.c.booking_count, 0) + bindparam("d_bookings"),
+        completed_booking_count=func.coalesce(_customers.c.completed_booking_count, 0) + bindparam("d_completed"),
+        total_revenue=func.coalesce(_customers.c.total_revenue, 0) + bindparam("d_revenue"),
+    )
+)
+
+
+def booking_contribution(status: Optional[str], price) -> Tuple[int, int, float]:
+    """مساهمة حجز واحد في عدادات عميله"""
+    completed = (status or BookingStatus.CONFIRMED.value) in COMPLETED_STATUSES
+    return 1, int(completed), float(price or 0) if completed else 0.0
+
+
+def _previous(target: Booking, name: str):
+    history = attributes.get_history(target, name)
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def _write(connection, target: Booking, deltas: Dict[str, List[float]]) -> None:
+    rows = [
+        {"customer_id": customer_id, "d_bookings": d[0], "d_completed": d[1], "d_revenue": d[2]}
+        for customer_id, d in deltas.items() if any(d)
+    ]
+    if not rows:
+        return
+    connection.execute(_apply_deltas, rows)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("customer_stats_changed", set()).update(row["customer_id"] for row in rows)
+
+
+def _add(deltas, customer_id, contribution, sign: int) -> None:
+    if customer_id:
+        for i, value in enumerate(contribution):
+            deltas[customer_id][i] += sign * value
+
+
+def _after_insert(mapper, connection, target: Booking) -> None:
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    _add(deltas, target.customer_id, booking_contribution(target.status, target.total_price), 1)
+    _write(connection, target, deltas)
+
+
+def _after_update(mapper, connection, target: Booking) -> None:
+    if not any(attributes.get_history(target, name).has_changes() for name in ("customer_id", "status", "total_price")):
+        return
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    old = booking_contribution(_previous(target, "status"), _previous(target, "total_price"))
+    _add(deltas, _previous(target, "customer_id"), old, -1)
+    _add(deltas, target.customer_id, booking_contribution(target.status, target.total_price), 1)
+    _write(connection, target, deltas)
+
+
+def _after_delete(mapper, connection, target: Booking) -> None:
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    _add(deltas, _previous(target, "customer_id"),
+         booking_contribution(_previous(target, "status"), _previous(target, "total_price")), -1)
+    _write(connection, target, deltas)
+
+
+def _after_flush_postexec(session: Session, flush_context) -> None:
+    """العدادات حُدثت في SQL مباشرة: تُعاد قراءتها لكائنات العملاء المحملة في الجلسة"""
+    changed = session.info.pop("customer_stats_changed", None)
+    for customer_id in changed or ():
+        customer = session.identity_map.get(identity_key(Customer, customer_id))
+        if customer is not None:
+            session.expire(customer, list(COUNTER_FIELDS))
+
+
+def install_customer_stats() -> None:
+    """ربط تحديث عدادات العميل بدورة حياة الحجز (إنشاء / تعديل / حذف)"""
+    for name, listener in (("after_insert", _after_insert), ("after_update", _after_update),
+                           ("after_delete", _after_delete)):
+        if not event.contains(Booking, name, listener):
+            event.listen(Booking, name, listener)
+    if not event.contains(Session, "after_flush_postexec", _after_flush_postexec):
+        event.listen(Session, "after_flush_postexec", _after_flush_postexec)
+
+
+def ensure_customer_sort_keys(db: Session) -> None:
+    """تعبئة مفاتيح الترتيب الفارغة في الجداول القديمة على SQLite (PostgreSQL: run_migrations)"""
+    if db.get_bind().dialect.name == "postgresql":
+        return
+    fixed = 0
+    for name, value in (*((name, 0) for name in COUNTER_FIELDS), ("created_at", LEGACY_CREATED_AT)):
+        fixed += db.execute(
+            update(_customers).where(_customers.c[name].is_(None)).values({name: value, "updated_at": _customers.c.updated_at})
+        ).rowcount
+    db.commit()
+    if fixed:
+        print(f"🔧 Backfilled {fixed} empty customer sort keys")
+
+
+def ensure_customer_stats(db: Session) -> None:
+    """تصحيح عدادات كل العملاء من جدول الحجوزات مرة واحدة عند أول تشغيل بعد الترقية"""
+    fixed = run_once(db, "customer_stats_reconcile", reconcile_customer_stats)
+    if fixed:
+        print(f"🔁 Reconciled customer stats: {fixed} customers fixed")
+
+
+def reconcile_customer_stats(connection) -> int:
+    """
+    إعادة حساب العدادات من جدول الحجوزات للصفوف المنحرفة فقط (تحديثان مجمعان)
+    يعيد عدد العملاء الذين صُححت عداداتهم
+    """
+    completed = Booking.status.in_(COMPLETED_STATUSES)
+    stats = (
+        select(
+            Booking.customer_id,
+            func.count().label("booking_count"),
+            func.sum(case((completed, 1), else_=0)).label("completed_booking_count"),
+            func.coalesce(func.sum(case((completed, Booking.total_price), else_=0)), 0).label("total_revenue"),
+        )
+        .where(Booking.customer_id.isnot(None))
+        .group_by(Booking.customer_id)
+        .subquery("booking_stats")
+    )
+    fixed = connection.execute(
+        update(_customers)
+        .where(
+            _customers.c.id == stats.c.customer_id,
+            or_(
+                func.coalesce(_customers.c.booking_count, -1) != stats.c.booking_count,
+                func.coalesce(_customers.c.completed_booking_count, -1) != stats.c.completed_booking_count,
+                func.abs(func.coalesce(_customers.c.total_revenue, 0) - stats.c.total_revenue) >= REVENUE_TOLERANCE,
+            ),
+        )
+        # updated_at كما هو: تصحيح وليس تعديلاً
+        .values(
+            booking_count=stats.c.booking_count,
+            completed_booking_count=stats.c.completed_booking_count,
+            total_revenue=stats.c.total_revenue,
+            updated_at=_customers.c.updated_at,
+        )
+    ).rowcount
+    # عملاء بلا حجوزات وعداداتهم ليست صفراً (أو NULL: أعمدة الترتيب بالمؤشر يجب ألا تكون فارغة)
+    fixed += connection.execute(
+        update(_customers)
+        .where(
+            ~exists().where(Booking.customer_id == _customers.c.id),
+            or_(*[
+                or_(_customers.c[name].is_(None), _customers.c[name] != 0) for name in COUNTER_FIELDS
+            ]),
+        )
+        .values(booking_count=0, completed_booking_count=0, total_revenue=0.0, updated_at=_customers.c.updated_at)
+    ).rowcount
+    return fixed
+
+
+if __name__ == "__main__":
+    from ..database import engine
+
+    with engine.begin() as conn:
+        print(f"🔁 Reconciled customer stats: {reconcile_customer_stats(conn)} customers fixed")
@@ -0,0 +1,182 @@
+"""
+ملخص الأرباح والخسائر الشهري
+Monthly P&L rollup maintained by the transaction lifecycle, plus full rebuild
+
+monthly_pnl (صف لكل مشروع ووحدة وتصنيف وشهر) يُحدث داخل نفس معاملة إضافة أو تعديل أو حذف
+المعاملة المالية (عبر ORM) بإضافة الفرق فقط (upsert)، فتقارير الدخل والصرف تقرأ الملخص بدل الدفتر.
+ما يتجاوز ORM (إدخال جماعي، حذف مباشر في القاعدة) يُصحح بإعادة البناء من جدول المعاملات:
+    python -m app.services.monthly_pnl
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, bindparam, case, cast, delete, event, func, insert, select, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+
+from ..models.monthly_pnl import MonthlyPnl
+from ..models.transaction import Transaction, TransactionType
+from .startup_steps import startup_lock
+
+KEY_FIELDS = ("project_id", "unit_id", "category", "month")
+TRACKED_FIELDS = ("project_id", "unit_id", "category", "date", "amount", "type")
+
+_rollup = MonthlyPnl.__table__
+
+_delete_empty = delete(_rollup).where(
+    *[_rollup.c[name] == bindparam(f"key_{name}") for name in KEY_FIELDS],
+    _rollup.c.transaction_count <= 0,
+)
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def ledger_month(dialect_name: str):
+    """أول يوم في شهر المعاملة كتعبير SQL (لتجميع الدفتر مباشرة)"""
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc("month", Transaction.date), Date)
+    return type_coerce(func.date(Transaction.date, "start of month"), Date)
+
+
+def transaction_contribution(type_, amount) -> Tuple[Decimal, Decimal, int]:
+    """مساهمة معاملة واحدة في صف الملخص: (دخل، صرف، عدد)"""
+    amount = Decimal(str(amount or 0))
+    if getattr(type_, "value", type_) == TransactionType.INCOME.value:
+        return amount, Decimal("0"), 1
+    return Decimal("0"), amount, 1
+
+
+def _key(values: Dict[str, object]) -> Optional[tuple]:
+    if not values["project_id"] or values["date"] is None:
+        return None
+    return values["project_id"], values["unit_id"] or "", values["category"] or "", month_start(values["date"])
+
+
+def _previous(target: Transaction, name: str):
+    history = attributes.get_history(target, name)
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def _current_values(target: Transaction) -> Dict[str, object]:
+    return {name: getattr(target, name) for name in TRACKED_FIELDS}
+
+
+def _previous_values(target: Transaction) -> Dict[str, object]:
+    return {name: _previous(target, name) for name in TRACKED_FIELDS}
+
+
+def _add(deltas, values: Dict[str, object], sign: int) -> None:
+    key = _key(values)
+    if key is not None:
+        for i, value in enumerate(transaction_contribution(values["type"], values["amount"])):
+            deltas[key][i] += sign * value
+
+
+def _upsert(connection):
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(_rollup)
+    return statement.on_conflict_do_update(
+        index_elements=list(KEY_FIELDS),
+        set_={
+            name: _rollup.c[name] + statement.excluded[name]
+            for name in ("income", "expense", "transaction_count")
+        },
+    )
+
+
+def _write(connection, deltas: Dict[tuple, List]) -> None:
+    rows = [
+        {**dict(zip(KEY_FIELDS, key)), "income": d[0], "expense": d[1], "transaction_count": d[2]}
+        for key, d in deltas.items() if any(d)
+    ]
+    if not rows:
+        return
+    connection.execute(_upsert(connection), rows)
+    # شهر لم تبق فيه معاملات لهذا المفتاح: يُحذف صفه
+    connection.execute(_delete_empty, [{f"key_{name}": row[name] for name in KEY_FIELDS} for row in rows])
+
+
+def _new_deltas():
+    return defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+
+
+def _after_insert(mapper, connection, target: Transaction) -> None:
+    deltas = _new_deltas()
+    _add(deltas, _current_values(target), 1)
+    _write(connection, deltas)
+
+
+def _after_update(mapper, connection, target: Transaction) -> None:
+    if not any(attributes.get_history(target, name).has_changes() for name in TRACKED_FIELDS):
+        return
+    deltas = _new_deltas()
+    _add(deltas, _previous_values(target), -1)
+    _add(deltas, _current_values(target), 1)
+    _write(connection, deltas)
+
+
+def _after_delete(mapper, connection, target: Transaction) -> None:
+    deltas = _new_deltas()
+    _add(deltas, _previous_values(target), -1)
+    _write(connection, deltas)
+
+
+def install_monthly_pnl() -> None:
+    """ربط تحديث monthly_pnl بدورة حياة المعاملة المالية (إضافة / تعديل / حذف)"""
+    for name, listener in (("after_insert", _after_insert), ("after_update", _after_update),
+                           ("after_delete", _after_delete)):
+        if not event.contains(Transaction, name, listener):
+            event.listen(Transaction, name, listener)
+
+
+def rebuild_monthly_pnl(connection) -> int:
+    """إعادة بناء الملخص كاملاً من جدول المعاملات بتجميع واحد (GROUP BY)، يعيد عدد الصفوف"""
+    income = Transaction.type == TransactionType.INCOME.value
+    month = ledger_month(connection.dialect.name)
+    unit_id = func.coalesce(Transaction.unit_id, "")
+    category = func.coalesce(Transaction.category, "")
+    grouped = (
+        select(
+            Transaction.project_id,
+            unit_id,
+            category,
+            month,
+            func.coalesce(func.sum(case((income, Transaction.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((~income, Transaction.amount), else_=0)), 0),
+            func.count(),
+        )
+        .where(and_(Transaction.project_id.isnot(None), Transaction.date.isnot(None)))
+        .group_by(Transaction.project_id, unit_id, category, month)
+    )
+    connection.execute(delete(_rollup))
+    return connection.execute(
+        insert(_rollup).from_select([*KEY_FIELDS, "income", "expense", "transaction_count"], grouped)
+    ).rowcount
+
+
+def ensure_monthly_pnl(db: Session) -> None:
+    """
+    بناء الملخص عند بدء التشغيل إذا كان فارغاً وفي الدفتر معاملات (قواعد بيانات قائمة)
+    القفل يسبق فحص الفراغ: عمال gunicorn يبدؤون معاً، فيبنيه واحد ويجده الباقون ممتلئاً بعد انتظاره
+    """
+    startup_lock(db.connection(), "monthly_pnl")
+    if db.execute(select(MonthlyPnl.project_id).limit(1)).first() is not None:
+        db.commit()
+        return
+    if db.execute(select(Transaction.id).limit(1)).first() is None:
+        db.commit()
+        return
+    count = rebuild_monthly_pnl(db.connection())
+    db.commit()
+    print(f"📊 Built monthly P&L rollup: {count} rows")
+
+
+if __name__ == "__main__":
+    from ..database import engine
+
+    with engine.begin() as conn:
+        print(f"📊 Rebuilt monthly P&L rollup: {rebuild_monthly_pnl(conn)} rows")
@@ -0,0 +1,242 @@
+"""
+محرك تسويات الملاك الشهرية
+Monthly owner settlements: set-based totals, cached statements, optional process pool
+
+لكل مالك ومشروع في الشهر: إيرادات الحجوزات (حسب تاريخ الدخول، بدون الملغاة)، العمولة حسب
+Project.commission_percent، المصروفات من ملخص monthly_pnl، وصافي المستحق للمالك.
+- الأرقام لكل الملاك تُحسب باستعلام واحد مجمع (GROUP BY) مهما كان عددهم
+- لكل مالك بصمة (fingerprint) لمدخلات تسويته: من لم تتغير بصمته يبقى كشفه المحفوظ كما هو
+- كشوف الملاك المتغيرين تُنشأ في مجموعة عمليات (settlement_workers > 1) أو في نفس العملية
+- الحفظ upsert على (owner_id, month) فتشغيلان متزامنان لنفس الشهر لا يتعارضان على المفتاح
+    python -m app.services.settlements 2026 9
+"""
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.booking import Booking, BookingStatus
+from ..models.monthly_pnl import MonthlyPnl
+from ..models.owner import Owner
+from ..models.owner_settlement import OwnerSettlement
+from ..models.project import Project
+from ..models.unit import Unit
+
+CENT = Decimal("0.01")
+TOTAL_FIELDS = ("booking_count", "gross_revenue", "commission", "expenses", "net_payout")
+
+
+def month_bounds(year: int, month: int):
+    """أول يوم في الشهر وأول يوم في الشهر التالي (ديسمبر 9999: آخر تاريخ ممكن)"""
+    start = date(year, month, 1)
+    if (year, month) == (date.max.year, 12):
+        return start, date.max
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def _settlement_query(start: date, end: date):
+    """صف لكل مشروع له حجوزات أو مصروفات في الشهر، لكل الملاك في استعلام واحد"""
+    revenue = (
+        select(
+            Unit.project_id,
+            func.count(Booking.id).label("booking_count"),
+            func.sum(Booking.total_price).label("gross_revenue"),
+        )
+        .join(Booking, Booking.unit_id == Unit.id)
+        .where(
+            Booking.check_in_date >= start,
+            Booking.check_in_date < end,
+            Booking.status != BookingStatus.CANCELLED.value,
+        )
+        .group_by(Unit.project_id)
+        .subquery("project_revenue")
+    )
+    expenses = (
+        select(MonthlyPnl.project_id, func.sum(MonthlyPnl.expense).label("expenses"))
+        .where(MonthlyPnl.month == start)
+        .group_by(MonthlyPnl.project_id)
+        .subquery("project_expenses")
+    )
+    return (
+        select(
+            Owner.id.label("owner_id"),
+            Owner.owner_name,
+            Owner.owner_mobile_phone,
+            Project.id.label("project_id"),
+            Project.name.label("project_name"),
+            func.coalesce(Project.commission_percent, 0).label("commission_percent"),
+            Project.bank_name,
+            Project.bank_iban,
+            func.coalesce(revenue.c.booking_count, 0).label("booking_count"),
+            func.coalesce(revenue.c.gross_revenue, 0).label("gross_revenue"),
+            func.coalesce(expenses.c.expenses, 0).label("expenses"),
+        )
+        .join(Owner, Owner.id == Project.owner_id)
+        .outerjoin(revenue, revenue.c.project_id == Project.id)
+        .outerjoin(expenses, expenses.c.project_id == Project.id)
+        .where((revenue.c.project_id.isnot(None)) | (expenses.c.project_id.isnot(None)))
+        .order_by(Owner.owner_name, Owner.id, Project.name, Project.id)
+    )
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def build_settlements(rows, start: date) -> List[dict]:
+    """تجميع صفوف المشاريع في تسوية لكل مالك (العمولة مقربة لأقرب هللة لكل مشروع)"""
+    owners: Dict[str, dict] = {}
+    for row in rows:
+        gross, expenses = _money(row.gross_revenue), _money(row.expenses)
+        percent = Decimal(str(row.commission_percent))
+        commission = _money(gross * percent / 100)
+        project = {
+            "project_id": row.project_id,
+            "project_name": row.project_name,
+            "commission_percent": percent,
+            "bank_name": row.bank_name,
+            "bank_iban": row.bank_iban,
+            "booking_count": int(row.booking_count),
+            "gross_revenue": gross,
+            "commission": commission,
+            "expenses": expenses,
+            "net_payout": gross - commission - expenses,
+        }
+        owner = owners.setdefault(row.owner_id, {
+            "owner_id": row.owner_id,
+            "owner_name": row.owner_name,
+            "owner_mobile_phone": row.owner_mobile_phone,
+            "month": start,
+            **{name: 0 if name == "booking_count" else Decimal("0.00") for name in TOTAL_FIELDS},
+            "projects": [],
+        })
+        owner["projects"].append(project)
+        for name in TOTAL_FIELDS:
+            owner[name] += project[name]
+    return list(owners.values())
+
+
+def settlement_fingerprint(settlement: dict) -> str:
+    """بصمة مدخلات التسوية (الأرقام وبيانات المالك والبنك): تتغير فقط إذا تغير الكشف"""
+    payload = orjson.dumps(settlement, default=str, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def render_statement(settlement: dict) -> str:
+    """كشف حساب المالك النصي (دالة مستقلة حتى تعمل في عملية منفصلة)"""
+    lines = [
+        f"كشف تسوية المالك: {settlement['owner_name']}",
+        f"الجوال: {settlement['owner_mobile_phone']}",
+        f"الشهر: {settlement['month']:%Y-%m}",
+        "",
+    ]
+    for project in settlement["projects"]:
+        lines += [
+            f"المشروع: {project['project_name']}",
+            f"  عدد الحجوزات: {project['booking_count']}",
+            f"  إيرادات الحجوزات: {project['gross_revenue']}",
+            f"  العمولة ({project['commission_percent']}%): {project['commission']}",
+            f"  المصروفات: {project['expenses']}",
+            f"  صافي المستحق: {project['net_payout']}",
+            f"  البنك: {project['bank_name'] or '-'}  الآيبان: {project['bank_iban'] or '-'}",
+            "",
+        ]
+    lines += [
+        f"إجمالي الحجوزات: {settlement['booking_count']}",
+        f"إجمالي الإيرادات: {settlement['gross_revenue']}",
+        f"إجمالي العمولة: {settlement['commission']}",
+        f"إجمالي المصروفات: {settlement['expenses']}",
+        f"صافي المستحق للمالك: {settlement['net_payout']}",
+    ]
+    return "\n".join(lines)
+
+
+def render_statements(settlements: List[dict], workers: int = 0) -> List[str]:
+    """إنشاء الكشوف: في مجموعة عمليات إذا كان workers > 1 وأكثر من كشف، وإلا في نفس العملية"""
+    if workers > 1 and len(settlements) > 1:
+        chunksize = max(1, len(settlements) // (workers * 4))
+        # spawn وليس fork: العملية الأم قد تكون خادم الويب بخيوطه واتصالات قاعدة البيانات المفتوحة
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(render_statement, settlements, chunksize=chunksize))
+    return [render_statement(settlement) for settlement in settlements]
+
+
+def _upsert(connection):
+    """إدراج التسوية أو استبدالها إن سبق حفظها (تشغيل متزامن لنفس الشهر)"""
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(OwnerSettlement)
+    return statement.on_conflict_do_update(
+        index_elements=[OwnerSettlement.owner_id, OwnerSettlement.month],
+        set_={
+            name: statement.excluded[name]
+            for name in ("fingerprint", *TOTAL_FIELDS, "projects", "statement", "generated_at")
+        },
+    )
+
+
+def run_settlements(db: Session, year: int, month: int, workers: Optional[int] = None) -> dict:
+    """
+    حساب تسويات الشهر لكل الملاك وحفظ من تغيرت بصمته فقط
+    يعيد أعداد الملاك (الكل / أعيد إنشاؤهم / بدون تغيير / حُذفت تسويتهم)
+    """
+    if workers is None:
+        workers = settings.settlement_workers
+    start, end = month_bounds(year, month)
+    settlements = build_settlements(db.execute(_settlement_query(start, end)), start)
+    fingerprints = {settlement["owner_id"]: settlement_fingerprint(settlement) for settlement in settlements}
+
+    stored = dict(db.execute(
+        select(OwnerSettlement.owner_id, OwnerSettlement.fingerprint).where(OwnerSettlement.month == start)
+    ).all())
+    changed = [s for s in settlements if stored.get(s["owner_id"]) != fingerprints[s["owner_id"]]]
+    removed = [owner_id for owner_id in stored if owner_id not in fingerprints]
+
+    statements = render_statements(changed, workers)
+    if removed:
+        db.execute(delete(OwnerSettlement).where(
+            OwnerSettlement.month == start, OwnerSettlement.owner_id.in_(removed)
+        ))
+    if changed:
+        now = datetime.utcnow()
+        db.execute(_upsert(db.connection()), [
+            {
+                "owner_id": s["owner_id"],
+                "month": start,
+                "fingerprint": fingerprints[s["owner_id"]],
+                **{name: s[name] for name in TOTAL_FIELDS},
+                "projects": orjson.loads(orjson.dumps(s["projects"], default=str)),
+                "statement": statement,
+                "generated_at": now,
+            }
+            for s, statement in zip(changed, statements)
+        ])
+    db.commit()
+    return {
+        "month": start,
+        "owners": len(settlements),
+        "regenerated": len(changed),
+        "unchanged": len(settlements) - len(changed),
+        "removed": len(removed),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from ..database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        result = run_settlements(session, int(sys.argv[1]), int(sys.argv[2]))
+        print(f"💰 Settlements {result['month']:%Y-%m}: {result['owners']} owners, "
+              f"{result['regenerated']} regenerated, {result['unchanged']} unchanged, {result['removed']} removed")
+    finally:
+        session.close()
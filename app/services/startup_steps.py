@@ -0,0 +1,43 @@
+"""
+خطوات بدء التشغيل
+One-time data fix-ups at startup, serialized across workers
+
+gunicorn يشغل أكثر من عامل وكل عامل ينفذ lifespan في نفس الوقت، فخطوات بناء أو تصحيح البيانات القائمة:
+- تأخذ قفلاً على مستوى المعاملة (pg_advisory_xact_lock على PostgreSQL) فينفذها عامل واحد والباقي ينتظر
+- run_once تسجل اسم الخطوة في startup_steps داخل نفس المعاملة، فلا تتكرر مع كل تشغيل ولا في كل عامل
+"""
+from datetime import datetime
+from typing import Callable, Optional, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.startup_step import StartupStep
+
+T = TypeVar("T")
+
+
+def startup_lock(connection, name: str) -> None:
+    """قفل باسم الخطوة حتى نهاية المعاملة الحالية (SQLite: الكتابة متسلسلة أصلاً)"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_advisory_xact_lock(func.hashtext(name))))
+
+
+def run_once(db: Session, name: str, step: Callable[..., T]) -> Optional[T]:
+    """
+    تنفيذ step(connection) مرة واحدة لكل قاعدة بيانات وتسجيلها في نفس المعاملة
+    يعيد نتيجة الخطوة، أو None إذا كانت قد نُفذت من قبل
+    """
+    connection = db.connection()
+    startup_lock(connection, name)
+    if connection.execute(select(StartupStep.name).where(StartupStep.name == name)).first() is not None:
+        db.commit()
+        return None
+    result = step(connection)
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    connection.execute(
+        dialect_insert(StartupStep).values(name=name, applied_at=datetime.utcnow()).on_conflict_do_nothing()
+    )
+    db.commit()
+    return result
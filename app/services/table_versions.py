@@ -0,0 +1,125 @@
+"""
+أرقام إصدارات الجداول
+Per-table change versions (maintained on write, cached on read)
+
+كل معاملة ORM تغير صفوف أحد الجداول المتتبعة تزيد رقم إصداره داخل نفس المعاملة قبل الـ commit مباشرة
+(before_commit): الإصدار والبيانات يُثبتان أو يُلغيان معاً، فلا توجد كتابة ناجحة بإصدار قديم (304 ببيانات قديمة)
+ولا خطأ بعد نجاح الكتابة. صف الإصدار يُقفل من الزيادة حتى الـ commit فقط وليس طوال معاملة الكاتب.
+فيمكن حساب ETag للقوائم من رقم الإصدار فقط دون تحميل أي صف.
+الكتابة خارج ORM (insert / update / delete مباشرة في Core أو SQL) لا تمر بالأحداث:
+يجب أن يستدعي مسارها bump_table_versions على نفس الاتصال قبل الـ commit.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Sequence
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.table_version import TableVersion
+from ..utils.metrics import record_cache_access
+
+# الجداول المرجعية التي تُحسب لها ETag (بيانات نادرة التغيير)
+VERSIONED_TABLES = ("owners", "projects", "units")
+
+_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+
+def _touched_tables(session: Session) -> set:
+    tables = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in VERSIONED_TABLES:
+            tables.add(table)
+    return tables
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    tables = _touched_tables(session)
+    if tables:
+        session.info.setdefault("touched_tables", set()).update(tables)
+
+
+def _before_commit(session: Session) -> None:
+    # التغييرات المعلقة تُكتب أولاً حتى تُسجل جداولها في after_flush
+    session.flush()
+    tables = session.info.get("touched_tables")
+    if tables:
+        bump_table_versions(session.connection(), tables)
+
+
+def _after_commit(session: Session) -> None:
+    tables = session.info.pop("touched_tables", None)
+    if tables:
+        invalidate(tables)
+
+
+def bump_table_versions(connection, tables: Iterable[str]) -> None:
+    """
+    زيادة إصدارات الجداول داخل معاملة الاتصال (تُثبت مع الكتابة نفسها)
+    تُستدعى تلقائياً قبل commit جلسات ORM، ويدوياً قبل commit أي كتابة جماعية خارج ORM
+    (كاش العامل لا يُلغى هنا: ينتهي خلال etag_version_cache_seconds)
+    """
+    # جدول جدول بترتيب ثابت: كاتبان على نفس الجداول يقفلان الصفوف بنفس الترتيب فلا يتعارضان (deadlock)
+    for table in sorted(set(tables) & set(VERSIONED_TABLES)):
+        connection.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name == table)
+            .values(version=TableVersion.version + 1)
+        )
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop("touched_tables", None)
+
+
+def install_table_versioning() -> None:
+    """ربط زيادة الإصدارات بكل جلسات ORM (تسجيل الجداول عند flush، والزيادة داخل المعاملة قبل commit)"""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+
+
+def ensure_table_versions(db: Session) -> None:
+    """إنشاء صفوف الإصدارات الناقصة (عند بدء التشغيل)"""
+    existing = set(db.execute(select(TableVersion.table_name)).scalars())
+    for table in VERSIONED_TABLES:
+        if table not in existing:
+            db.add(TableVersion(table_name=table, version=0))
+    db.commit()
+
+
+def invalidate(tables: Iterable[str]) -> None:
+    with _cache_lock:
+        for table in tables:
+            _cache.pop(table, None)
+
+
+def get_table_versions(db: Session, tables: Sequence[str]) -> Dict[str, int]:
+    """
+    أرقام إصدارات الجداول المطلوبة
+    تُحفظ في ذاكرة العامل لمدة etag_version_cache_seconds، والكتابة من نفس العامل تلغيها فوراً
+    """
+    now = time.monotonic()
+    ttl = settings.etag_version_cache_seconds
+    with _cache_lock:
+        cached = {t: _cache[t][0] for t in tables if t in _cache and now - _cache[t][1] < ttl}
+    if len(cached) == len(tables):
+        record_cache_access("table_versions", True)
+        return cached
+
+    record_cache_access("table_versions", False)
+    rows = db.execute(
+        select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(tables))
+    ).all()
+    versions = {table: 0 for table in tables}
+    versions.update({name: version for name, version in rows})
+    with _cache_lock:
+        for table, version in versions.items():
+            _cache[table] = (version, now)
+    return versions
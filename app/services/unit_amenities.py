@@ -0,0 +1,179 @@
+"""
+فهرس مرافق الوحدات للبحث والتصفية
+Amenity index: JSONB containment + GIN on PostgreSQL, normalized unit_amenities table elsewhere
+
+على PostgreSQL يُستخدم العمود units.amenities مباشرة كـ JSONB (فهرس GIN على التعبير amenities::jsonb).
+على SQLite يُحفظ كل مرفق كصف في unit_amenities ويُحدث مع كل flush يغير Unit.amenities.
+في الحالتين تُطبع القيمة عند الكتابة (normalize_amenities، و None ← [])، فالتصفية والأعداد متطابقة بين القاعدتين.
+"""
+from typing import Iterable, List, Optional
+
+import orjson
+from sqlalchemy import Text, bindparam, case, delete, event, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.sql.expression import cast
+
+from ..models.unit import Unit
+from ..models.unit_amenity import UnitAmenity
+from .startup_steps import run_once
+from .table_versions import bump_table_versions
+
+# محارف الفراغ التي تزيلها str.strip() في normalize_amenities (لتطبيع القيم القديمة في SQL)
+_WHITESPACE = " \t\n\r\f\v"
+
+
+def uses_jsonb(dialect_name: str) -> bool:
+    return dialect_name == "postgresql"
+
+
+def normalize_amenities(values: Optional[Iterable[str]]) -> List[str]:
+    """إزالة الفراغات والتكرار مع الحفاظ على الترتيب"""
+    seen = []
+    for value in values or ():
+        value = (value or "").strip()
+        if value and value not in seen:
+            seen.append(value)
+    return seen
+
+
+def _normalize_on_set(target: Unit, value, oldvalue, initiator):
+    return normalize_amenities(value)
+
+
+def _amenity_rows(unit: Unit) -> List[dict]:
+    return [{"unit_id": unit.id, "amenity": amenity} for amenity in normalize_amenities(unit.amenities)]
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    if uses_jsonb(session.get_bind().dialect.name):
+        return
+    cleared, rows = [], []
+    for obj in session.new:
+        if isinstance(obj, Unit):
+            rows.extend(_amenity_rows(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Unit) and attributes.get_history(obj, "amenities").has_changes():
+            cleared.append(obj.id)
+            rows.extend(_amenity_rows(obj))
+    for obj in session.deleted:
+        if isinstance(obj, Unit):
+            cleared.append(obj.id)
+    if not cleared and not rows:
+        return
+    connection = session.connection()
+    if cleared:
+        connection.execute(delete(UnitAmenity).where(UnitAmenity.unit_id.in_(cleared)))
+    if rows:
+        connection.execute(insert(UnitAmenity), rows)
+
+
+def install_amenity_index() -> None:
+    """تطبيع Unit.amenities عند كل إسناد، وربط تحديث unit_amenities بكل جلسات ORM"""
+    if not event.contains(Unit.amenities, "set", _normalize_on_set):
+        event.listen(Unit.amenities, "set", _normalize_on_set, retval=True)
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+def rebuild_unit_amenities(connection) -> int:
+    """إعادة بناء unit_amenities من units.amenities (بعد إدخال جماعي لا يمر بالـ ORM)"""
+    connection.execute(delete(UnitAmenity))
+    rows = [
+        {"unit_id": unit_id, "amenity": amenity}
+        for unit_id, amenities in connection.execute(select(Unit.id, Unit.amenities))
+        for amenity in normalize_amenities(amenities)
+    ]
+    if rows:
+        connection.execute(insert(UnitAmenity), rows)
+    return len(rows)
+
+
+def _parse_stored(raw: Optional[str]) -> List[str]:
+    """قيمة مخزنة (JSON أو نص قديم من عمود TEXT) ← قائمة مرافق مطبعة"""
+    try:
+        value = orjson.loads(raw) if raw else None
+    except orjson.JSONDecodeError:
+        return []
+    if not isinstance(value, list):
+        return []
+    return normalize_amenities(item for item in value if isinstance(item, str))
+
+
+def normalize_stored_amenities(connection) -> int:
+    """
+    تطبيع units.amenities المخزنة قبل التطبيع عند الكتابة (null، قيم ليست مصفوفة، فراغات وتكرار)
+    يقرأ العمود كنص حتى لا تفشل القيم القديمة غير الصالحة، ويعيد عدد الوحدات المعدلة
+    """
+    changed = []
+    for unit_id, raw in connection.execute(select(Unit.id, cast(Unit.amenities, Text))):
+        normalized = _parse_stored(raw)
+        try:
+            current = orjson.loads(raw) if raw else None
+        except orjson.JSONDecodeError:
+            current = None
+        if current != normalized:
+            changed.append({"unit_key": unit_id, "amenities": normalized})
+    if changed:
+        connection.execute(
+            update(Unit).where(Unit.id == bindparam("unit_key")).values(amenities=bindparam("amenities")),
+            changed,
+        )
+    return len(changed)
+
+
+def _normalize_legacy_amenities(connection) -> int:
+    normalized = normalize_stored_amenities(connection)
+    if normalized:
+        # تحديث مباشر خارج ORM: إصدار الوحدات يُزاد يدوياً في نفس المعاملة لتتغير ETag القوائم
+        bump_table_versions(connection, ["units"])
+    return normalized
+
+
+def ensure_unit_amenities(db: Session) -> None:
+    """
+    تطبيع المرافق المخزنة مرة واحدة بعد الترقية (الكتابة بعدها تُطبع في ORM)،
+    ثم على SQLite بناء الجدول إذا كان فارغاً والوحدات لها مرافق (قواعد بيانات قائمة)
+    """
+    normalized = run_once(db, "unit_amenities_normalized", _normalize_legacy_amenities)
+    if normalized:
+        print(f"🏷️  Normalized amenities of {normalized} units")
+    if uses_jsonb(db.get_bind().dialect.name):
+        return
+    if db.execute(select(UnitAmenity.unit_id).limit(1)).first() is not None:
+        return
+    if db.execute(select(Unit.id).limit(1)).first() is None:
+        return
+    count = rebuild_unit_amenities(db.connection())
+    db.commit()
+    print(f"🏷️  Indexed {count} unit amenities")
+
+
+def amenities_filter(amenities: List[str], dialect_name: str):
+    """شرط: الوحدة تحتوي كل المرافق المطلوبة"""
+    if uses_jsonb(dialect_name):
+        # amenities::jsonb @> '["مسبح", "واي فاي"]' - يستخدم فهرس ix_units_amenities_gin
+        return cast(Unit.amenities, JSONB).contains(amenities)
+    return Unit.id.in_(
+        select(UnitAmenity.unit_id)
+        .where(UnitAmenity.amenity.in_(amenities))
+        .group_by(UnitAmenity.unit_id)
+        .having(func.count() == len(amenities))
+    )
+
+
+def amenity_values(matched, dialect_name: str):
+    """(id, value) لكل مرفق في الوحدات المطابقة - لحساب عدد الوحدات لكل مرفق"""
+    if uses_jsonb(dialect_name):
+        # قيمة ليست مصفوفة (null أو قيمة قديمة) تُعامل كـ [] بدل خطأ "cannot extract elements from a scalar"،
+        # والقيم تُطبع كما في normalize_amenities (إزالة الفراغات والفارغ والتكرار لكل وحدة)
+        stored = cast(matched.c.amenities, JSONB)
+        elements = case((func.jsonb_typeof(stored) == "array", stored), else_=cast(literal("[]"), JSONB))
+        raw = select(
+            matched.c.id,
+            func.btrim(func.jsonb_array_elements_text(elements), _WHITESPACE).label("value")
+        ).select_from(matched).subquery("raw_amenity_values")
+        return select(raw.c.id, raw.c.value).where(raw.c.value != "").distinct().subquery("amenity_values")
+    return select(
+        UnitAmenity.unit_id.label("id"), UnitAmenity.amenity.label("value")
+    ).join(matched, matched.c.id == UnitAmenity.unit_id).subquery("amenity_values")
@@ -0,0 +1,52 @@
+"""
+سياق الطلب المجمع (POST /api/batch)
+Shared auth + DB session for batched sub-requests
+
+أثناء تنفيذ الطلبات الفرعية تعيد get_db / get_read_db الجلسة المشتركة بدلاً من
+فتح جلسة جديدة، وتعيد get_current_user المستخدم الذي تم التحقق منه مرة واحدة.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+_current_batch: ContextVar[Optional["BatchContext"]] = ContextVar("mnam_batch", default=None)
+
+
+class BatchContext:
+    """الجلسات والمستخدم المشتركة بين الطلبات الفرعية"""
+
+    def __init__(self, db: Session, user: Any):
+        self.db = db
+        self.user = user
+        self._read_db: Optional[Session] = None
+        self._lock = threading.Lock()
+
+    def read_db(self, factory: Callable[[], Session]) -> Session:
+        """جلسة القراءة المشتركة (تُنشأ مرة واحدة عند أول طلب فرعي يحتاجها)"""
+        with self._lock:
+            if self._read_db is None:
+                self._read_db = factory()
+            return self._read_db
+
+    def close(self) -> None:
+        """إغلاق جلسة القراءة إن كانت منفصلة (الجلسة الأساسية يغلقها get_db للطلب المجمع)"""
+        if self._read_db is not None and self._read_db is not self.db:
+            self._read_db.close()
+        self._read_db = None
+
+
+def get_batch_context() -> Optional[BatchContext]:
+    return _current_batch.get()
+
+
+@contextmanager
+def batch_scope(context: BatchContext):
+    token = _current_batch.set(context)
+    try:
+        yield context
+    finally:
+        _current_batch.reset(token)
+        context.close()
@@ -5,6 +5,7 @@ from typing import Optional
 from ..database import get_db
 from ..models.user import User, UserRole, ROLE_HIERARCHY
 from ..utils.security import verify_access_token
+from ..utils.batch_context import get_batch_context
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -14,6 +15,11 @@ async def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from JWT token"""
+    # داخل /api/batch: المستخدم تم التحقق منه مرة واحدة للطلب المجمع
+    batch = get_batch_context()
+    if batch is not None:
+        return batch.user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="لم يتم التحقق من الهوية",
@@ -0,0 +1,54 @@
+"""
+طلبات GET الشرطية (ETag / If-None-Match)
+Conditional GET helpers for reference-data listings
+"""
+import hashlib
+from typing import Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from ..services.table_versions import get_table_versions
+
+# المتصفح يعيد التحقق في كل مرة، ويحصل على 304 بدون جسم إذا لم تتغير البيانات
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, versions: dict) -> str:
+    """ETag قوي من أرقام إصدارات الجداول + شكل الطلب (المسار، المعاملات، الصيغة)"""
+    variant = "|".join((
+        request.url.path.rstrip("/"),
+        "&".join(sorted(request.url.query.split("&"))) if request.url.query else "",
+        request.headers.get("accept", ""),
+    ))
+    digest = hashlib.blake2b(variant.encode("utf-8"), digest_size=6).hexdigest()
+    tables = ".".join(f"{table[0]}{version}" for table, version in sorted(versions.items()))
+    return f'"{tables}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def check_not_modified(
+    request: Request,
+    db: Session,
+    tables: Sequence[str]
+) -> Tuple[str, Optional[Response]]:
+    """
+    حساب ETag للقائمة من إصدارات الجداول التي تعتمد عليها
+    يعيد (etag, Response 304) إذا تطابق If-None-Match، وإلا (etag, None)
+    """
+    etag = make_etag(request, get_table_versions(db, tables))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, Response(status_code=304, headers=etag_headers(etag))
+    return etag, None
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
@@ -0,0 +1,136 @@
+"""
+التصدير المتدفق (CSV / NDJSON)
+Streaming exports: server-side cursor → CSV / NDJSON chunks → optional on-the-fly gzip
+
+الصفوف تُقرأ على دفعات من مؤشر في الخادم (yield_per / stream_results) وتُكتب للعميل دفعة دفعة،
+فتبقى ذاكرة العامل ثابتة مهما كان عدد الصفوف. المولد يفتح جلسته الخاصة (جلسة Depends
+تُغلق مع انتهاء الـ endpoint) ويعمل في threadpool لأن StreamingResponse يمرر المولد المتزامن له.
+"""
+import csv
+import io
+import zlib
+from typing import Callable, Iterable, Iterator, List, Literal, Optional, Sequence
+
+from fastapi import Request
+from sqlalchemy import Date, DateTime
+from sqlalchemy.orm import Session
+from starlette.responses import StreamingResponse
+
+from .fast_response import dumps
+
+ExportFormat = Literal["csv", "ndjson"]
+
+# عدد الصفوف في كل دفعة من المؤشر (وفي كل جزء يُرسل للعميل)
+EXPORT_BATCH_SIZE = 2000
+GZIP_LEVEL = 6
+# بدايات الخلايا التي تفسرها برامج الجداول كمعادلة
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _date_columns(query) -> List[int]:
+    """مواضع أعمدة التاريخ في الاستعلام: تُكتب في CSV بصيغة ISO مثل JSON (باقي القيم يكتبها csv كما هي)"""
+    return [
+        i for i, column in enumerate(query.selected_columns)
+        if isinstance(column.type, (Date, DateTime))
+    ]
+
+
+def stream_partitions(query, open_session: Callable[[], Session]) -> Iterator[tuple]:
+    """(أسماء الأعمدة، دفعة صفوف) من مؤشر في الخادم، والجلسة تُغلق عند انتهاء التصدير أو انقطاعه"""
+    db = open_session()
+    try:
+        result = db.execute(query, execution_options={"yield_per": EXPORT_BATCH_SIZE})
+        keys = list(result.keys())
+        yield keys, []
+        for partition in result.partitions():
+            yield keys, partition
+    finally:
+        db.close()
+
+
+def _escape_formula(value):
+    """نص يبدأ بـ = + - @ يُسبق بـ ' حتى لا ينفذه Excel كمعادلة (CSV injection)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(partitions: Iterable[tuple], date_columns: Sequence[int] = ()) -> Iterator[bytes]:
+    """
+    CSV بترويسة أسماء الأعمدة (مع BOM حتى يقرأ Excel النص العربي)
+    النصوص التي تبدأ بـ = + - @ تُسبق بـ ' (NDJSON يبقى كما هو)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for keys, rows in partitions:
+        if not header_written:
+            buffer.write("\ufeff")
+            writer.writerow(keys)
+            header_written = True
+        rows = [[_escape_formula(value) for value in row] for row in rows]
+        for row in rows:
+            for i in date_columns:
+                if row[i] is not None:
+                    row[i] = row[i].isoformat()
+        writer.writerows(rows)
+        chunk = buffer.getvalue()
+        if chunk:
+            yield chunk.encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+
+def ndjson_chunks(partitions: Iterable[tuple]) -> Iterator[bytes]:
+    """سطر JSON لكل صف (نفس تمثيل القوائم: Decimal كنص والتواريخ بصيغة ISO)"""
+    for keys, rows in partitions:
+        if rows:
+            yield b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """ضغط gzip أثناء الإرسال (جزءاً جزءاً دون تجميع الملف)"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def export_response(
+    request: Request,
+    query,
+    open_session: Callable[[], Session],
+    filename: str,
+    export_format: ExportFormat = "csv",
+    compress: Optional[bool] = None
+) -> StreamingResponse:
+    """
+    استجابة تصدير متدفقة لاستعلام SELECT (الأعمدة بأسماء حقول الـ schema)
+    compress: None = حسب Accept-Encoding للعميل
+    """
+    partitions = stream_partitions(query, open_session)
+    if export_format == "csv":
+        chunks = csv_chunks(partitions, _date_columns(query))
+    else:
+        chunks = ndjson_chunks(partitions)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress is None:
+        compress = accepts_gzip(request)
+    if compress:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[export_format], headers=headers)
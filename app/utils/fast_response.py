@@ -0,0 +1,231 @@
+"""
+مسار سريع لتحويل نتائج القوائم إلى JSON
+Fast response serialization path
+
+بدلاً من بناء كائنات Pydantic لكل صف ثم إعادة التحقق منها عبر response_model،
+تُختار الأعمدة من SQL بنفس أسماء وترتيب حقول الـ schema وتُحول مباشرة إلى JSON
+عبر orjson. المخرجات مطابقة لمخرجات Pydantic (Decimal كنص، التواريخ بصيغة ISO).
+
+نفس الصفوف يمكن إرسالها بثلاث صيغ حسب ترويسة Accept أو المعامل ?format=
+- json: قائمة كائنات (الافتراضي)
+- columnar: أسماء الأعمدة مرة واحدة ثم القيم كمصفوفات
+- msgpack: نفس شكل json بترميز ثنائي مضغوط
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+
+import msgpack
+import orjson
+from fastapi import HTTPException, Request
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+# قيمة الاسم الافتراضية عند غياب المشروع/المالك/الوحدة
+UNKNOWN = "غير معروف"
+
+
+def _default(obj: Any) -> Any:
+    """الأنواع التي لا يدعمها orjson مباشرة - نفس تمثيل Pydantic"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """نفس تمثيل JSON: Decimal كنص والتواريخ بصيغة ISO"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    raise TypeError(f"Type is not msgpack serializable: {type(obj).__name__}")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse مبني على orjson للمحتوى الجاهز (dict / list)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+# ======== اختيار الصيغة (Content Negotiation) ========
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.mnam.columnar+json"
+
+RESPONSE_FORMATS = ("json", "columnar", "msgpack")
+
+_MEDIA_TYPE_FORMATS = {
+    "application/json": "json",
+    COLUMNAR_MEDIA_TYPE: "columnar",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+
+
+def negotiate_format(request: Request) -> str:
+    """
+    صيغة الاستجابة المطلوبة: ?format= أولاً ثم أول نوع مدعوم في Accept
+    (أي نوع غير معروف مثل */* يعني json)
+    """
+    requested = request.query_params.get("format")
+    if requested:
+        if requested not in RESPONSE_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"صيغة غير مدعومة، الصيغ المتاحة: {', '.join(RESPONSE_FORMATS)}"
+            )
+        return requested
+
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type = media_range.split(";", 1)[0].strip().lower()
+        if media_type in _MEDIA_TYPE_FORMATS:
+            return _MEDIA_TYPE_FORMATS[media_type]
+    return "json"
+
+
+def to_columnar(items: List[Dict[str, Any]], names: Tuple[str, ...]) -> Dict[str, Any]:
+    """{"columns": [...], "rows": [[...], ...]} - أسماء الحقول مرة واحدة فقط"""
+    return {"columns": list(names), "rows": [[item[name] for name in names] for item in items]}
+
+
+def list_response(
+    request: Request,
+    items: List[Dict[str, Any]],
+    schema: Type[BaseModel],
+    fields: Optional[Iterable[str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+    envelope: Optional[Dict[str, Any]] = None,
+    items_key: str = "items"
+) -> Response:
+    """
+    استجابة قائمة بالصيغة المطلوبة من العميل
+    items ناتجة عن serialize_rows / serialize_objects بنفس الـ schema
+    envelope: حقول إضافية تُرسل مع القائمة (مثل total_count) وتوضع القائمة تحت items_key
+    """
+    response_format = negotiate_format(request)
+    headers = {**(headers or {}), "Vary": "Accept"}
+
+    content: Any = items
+    if response_format == "columnar":
+        names = tuple(fields) if fields else schema_fields(schema)
+        content = to_columnar(items, names)
+    if envelope is not None:
+        content = {**envelope, items_key: content}
+
+    if response_format == "msgpack":
+        return MsgPackResponse(content, headers=headers)
+    if response_format == "columnar":
+        return FastJSONResponse(content, headers=headers, media_type=COLUMNAR_MEDIA_TYPE)
+    return FastJSONResponse(content, headers=headers)
+
+
+@lru_cache(maxsize=None)
+def schema_fields(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """أسماء حقول الـ schema بترتيبها في مخرجات Pydantic"""
+    return tuple(schema.model_fields)
+
+
+@lru_cache(maxsize=None)
+def schema_defaults(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """القيم الافتراضية للحقول غير الإلزامية"""
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in schema.model_fields.items()
+        if not field.is_required()
+    }
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    التحقق من معامل ?fields=a,b,c مقابل حقول الـ schema
+    يعيد الحقول بترتيب الـ schema (مع id دائماً)، أو None إذا لم تُطلب حقول محددة
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return None
+    known = schema_fields(schema)
+    unknown = requested.difference(known)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"حقول غير معروفة: {', '.join(sorted(unknown))}"
+        )
+    requested.add("id")
+    return tuple(name for name in known if name in requested)
+
+
+def wants(fields: Optional[Tuple[str, ...]], *names: str) -> bool:
+    """هل يحتاج الطلب أياً من هذه الحقول؟ (لإضافة JOIN فقط عند الحاجة)"""
+    return fields is None or any(name in fields for name in names)
+
+
+def schema_columns(
+    schema: Type[BaseModel],
+    columns: Mapping[str, Any],
+    fields: Optional[Iterable[str]] = None
+) -> List[Any]:
+    """أعمدة SELECT مسماة بأسماء حقول الـ schema (الحقول المتوفرة في columns فقط)"""
+    return [
+        columns[name].label(name)
+        for name in (fields or schema_fields(schema))
+        if name in columns
+    ]
+
+
+def serialize_rows(
+    result: Any,
+    schema: Type[BaseModel],
+    fields: Optional[Iterable[str]] = None,
+    fixups: Optional[Mapping[str, Callable[[Any], Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    تحويل صفوف SQL إلى قواميس بشكل الـ schema مرة واحدة فقط
+    الحقول غير المختارة في SQL تأخذ قيمتها الافتراضية من الـ schema
+    """
+    names = tuple(fields) if fields else schema_fields(schema)
+    defaults = schema_defaults(schema)
+    index = {key: i for i, key in enumerate(result.keys())}
+    getters = [(name, index.get(name), defaults.get(name)) for name in names]
+
+    items = [
+        {name: (row[i] if i is not None else default) for name, i, default in getters}
+        for row in result
+    ]
+    if fixups:
+        active = [(name, fix) for name, fix in fixups.items() if name in names]
+        for item in items:
+            for name, fix in active:
+                item[name] = fix(item[name])
+    return items
+
+
+def serialize_objects(
+    objects: Iterable[Any],
+    schema: Type[BaseModel],
+    fields: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """نفس serialize_rows لكائنات ORM محملة مسبقاً (الصفحات الصغيرة)"""
+    names = tuple(fields) if fields else schema_fields(schema)
+    defaults = schema_defaults(schema)
+    return [
+        {name: getattr(obj, name, defaults.get(name)) for name in names}
+        for obj in objects
+    ]
@@ -0,0 +1,190 @@
+"""
+مقاييس Prometheus
+Prometheus metrics (multi-process aware)
+
+عند التشغيل عبر gunicorn يضبط gunicorn.conf.py المتغير PROMETHEUS_MULTIPROC_DIR
+قبل تشغيل العمال، فتُكتب القيم في ملفات مشتركة ويجمعها /metrics من كل العمال.
+"""
+import asyncio
+import os
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .query_stats import get_current_stats
+
+MULTIPROCESS_MODE = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# ======== طلبات HTTP ========
+
+REQUEST_LATENCY = Histogram(
+    "mnam_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUEST_COUNT = Counter(
+    "mnam_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"]
+)
+
+QUERIES_PER_REQUEST = Histogram(
+    "mnam_db_queries_per_request",
+    "Database queries issued per HTTP request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+
+# ======== قاعدة البيانات ========
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "mnam_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "mnam_db_pool_overflow",
+    "Connections opened beyond pool_size",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_SIZE = Gauge(
+    "mnam_db_pool_size",
+    "Configured pool size",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+
+# ======== حلقة الأحداث ========
+
+EVENT_LOOP_LAG = Gauge(
+    "mnam_event_loop_lag_seconds",
+    "Delay between scheduled and actual wake-up of the event loop",
+    multiprocess_mode="livemax"
+)
+
+# ======== الكاش ========
+
+CACHE_REQUESTS = Counter(
+    "mnam_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"]
+)
+
+
+def record_cache_access(cache: str, hit: bool) -> None:
+    """تسجيل نتيجة البحث في كاش (نسبة الإصابة = hit / (hit + miss))"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def install_pool_metrics(engine: Engine, name: str = "primary") -> None:
+    """متابعة اتصالات الـ pool عبر أحداث SQLAlchemy"""
+    pool = engine.pool
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    overflow = DB_POOL_OVERFLOW.labels(name)
+    DB_POOL_SIZE.labels(name).set(pool.size() if hasattr(pool, "size") else 0)
+
+    def _update_overflow():
+        if hasattr(pool, "overflow"):
+            overflow.set(max(pool.overflow(), 0))
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+        _update_overflow()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+        _update_overflow()
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """قياس تأخر حلقة الأحداث (يُشغل كمهمة خلفية طوال عمر التطبيق)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(loop.time() - started - interval, 0.0))
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """توليد مخرجات /metrics (تجميع كل العمال في وضع multiprocess)"""
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    Middleware لتسجيل زمن الطلب وحالته حسب قالب المسار (route template)
+    يجب إضافته قبل QueryStatsMiddleware حتى يقرأ عدد استعلامات الطلب
+    """
+
+    def __init__(self, app, excluded_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = excluded_paths
+        # كاش لكائنات labels لتقليل الكلفة على المسار الساخن
+        self._latency_children: Dict[Tuple[str, str], object] = {}
+        self._count_children: Dict[Tuple[str, str, str], object] = {}
+        self._query_children: Dict[str, object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._observe(scope, status_code, loop.time() - started)
+
+    def _observe(self, scope, status_code: int, duration: float) -> None:
+        route = scope.get("route")
+        template = route.path if route is not None else "unmatched"
+        method = scope["method"]
+
+        key = (method, template)
+        latency = self._latency_children.get(key)
+        if latency is None:
+            latency = self._latency_children[key] = REQUEST_LATENCY.labels(method, template)
+        latency.observe(duration)
+
+        count_key = (method, template, str(status_code))
+        counter = self._count_children.get(count_key)
+        if counter is None:
+            counter = self._count_children[count_key] = REQUEST_COUNT.labels(*count_key)
+        counter.inc()
+
+        stats = get_current_stats()
+        if stats is not None:
+            queries = self._query_children.get(template)
+            if queries is None:
+                queries = self._query_children[template] = QUERIES_PER_REQUEST.labels(template)
+            queries.observe(stats.count)
@@ -0,0 +1,99 @@
+"""
+ترقيم الصفحات بالمؤشر (Keyset Pagination)
+Keyset pagination helpers: opaque cursors and row-value comparisons
+
+بدلاً من OFFSET (الذي يقرأ كل الصفوف السابقة) تبدأ كل صفحة بعد آخر صف في الصفحة السابقة
+حسب أعمدة الترتيب، فيبقى زمن الصفحة ثابتاً مهما كان عمقها ويستخدم فهرس أعمدة الترتيب.
+المؤشر يُرسل للعميل في ترويسة X-Next-Cursor ويعيده في ?cursor= لطلب الصفحة التالية.
+"""
+import base64
+import binascii
+import operator
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# عدد كل النتائج المطابقة (اختياري: يكلف استعلام عد إضافي)
+TOTAL_COUNT_HEADER = "X-Total-Count"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any, kind: type) -> Any:
+    if value is None:
+        return None
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    if kind is date:
+        return date.fromisoformat(value)
+    return kind(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """قيم أعمدة الترتيب لآخر صف → نص آمن للروابط"""
+    payload = orjson.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, kinds: Sequence[type]) -> Tuple[Any, ...]:
+    """عكس encode_cursor مع التحقق من الأنواع (400 إذا كان المؤشر تالفاً)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = orjson.loads(payload)
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError(cursor)
+        return tuple(_decode_value(value, kind) for value, kind in zip(values, kinds))
+    except (ValueError, TypeError, binascii.Error, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="مؤشر الصفحة غير صالح")
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+    """
+    الصفوف التي تأتي بعد values بترتيب columns، أي (a, b) < (va, vb) للترتيب التنازلي
+    مكتوبة كـ OR/AND حتى تعمل على كل القواعد وتستفيد من فهرس (a, b)
+    """
+    compare = operator.lt if descending else operator.gt
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [previous == prior for previous, prior in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal_prefix, compare(column, value)))
+    return or_(*clauses)
+
+
+class KeysetPage:
+    """
+    صفحة من نتيجة استعلام مرتب (يُطلب limit + 1 صف لمعرفة وجود صفحة تالية)
+    لها نفس واجهة Result المستخدمة في serialize_rows: keys() والتكرار على الصفوف
+    الاستعلام نفسه يجب أن يحمل LIMIT limit + 1: المشغل ونتائج ORM تجلب كل الصفوف قبل fetchmany
+    """
+
+    def __init__(self, result: Any, limit: int, cursor_keys: Sequence[str]):
+        self._keys = list(result.keys())
+        rows = result.fetchmany(limit + 1)
+        self.rows: List[Any] = rows[:limit]
+        self.next_cursor: Optional[str] = None
+        if len(rows) > limit:
+            last = self.rows[-1]._mapping
+            self.next_cursor = encode_cursor([last[key] for key in cursor_keys])
+
+    def keys(self) -> List[str]:
+        return self._keys
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def headers(self) -> dict:
+        return {NEXT_CURSOR_HEADER: self.next_cursor} if self.next_cursor else {}
@@ -0,0 +1,298 @@
+"""
+محلل أداء إحصائي (sampling profiler) لطلبات مختارة
+Opt-in per-request sampling profiler with an on-disk ring buffer
+
+يُفعّل للطلب عبر ترويسة X-Profile من مدير، أو لنسبة عشوائية من الطلبات (profiler_sample_rate).
+خيط منفصل يقرأ كل profiler_interval_ms مكدسات الخيوط التي تعمل للطلب فقط (حلقة الأحداث أثناء تنفيذ
+مهمة الطلب، وخيوط threadpool أثناء تنفيذها استعلاماً للطلب فقط) ويجمعها بصيغة collapsed
+(متوافقة مع flamegraph.pl و speedscope)، وتُحفظ مع أزمنة استعلامات الطلب في ملف JSON.
+عند عدم التفعيل لا يكلف الطلب سوى فحص الترويسة.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from ..config import settings
+from .query_stats import get_current_stats
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_RE = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+# معرف الخيط -> عدد الأعمال الجارية فيه للطلب المحلل (None خارج طلب محلل)، ينتقل مع السياق إلى threadpool
+_profiled_threads: ContextVar[Optional[Counter]] = ContextVar("mnam_profiled_threads", default=None)
+# مفتاح في connection.info: علامات الاستعلامات الجارية على الاتصال (تُزال بعد انتهائها أو فشلها)
+_SQL_MARKS = "mnam_profiled_marks"
+
+# دوال الانتظار: خيط متوقف عندها لا يعمل شيئاً فلا تُحسب عينته
+_IDLE_LEAVES = {
+    ("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(code, cache: Dict[object, str]) -> str:
+    label = cache.get(code)
+    if label is None:
+        filename = code.co_filename
+        # مسارات قصيرة: app/routers/x.py أو fastapi/routing.py أو lib/python3.x/...
+        for marker, skip in (("/site-packages/", 15), ("/app/", 1), ("/lib/python3", 1)):
+            index = filename.rfind(marker)
+            if index != -1:
+                filename = filename[index + skip:]
+                break
+        label = cache[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+    return label
+
+
+def _mark_sql_thread(conn, cursor, statement, parameters, context, executemany) -> None:
+    threads = _profiled_threads.get()
+    if threads is not None:
+        ident = threading.get_ident()
+        threads[ident] += 1
+        conn.info.setdefault(_SQL_MARKS, []).append((threads, ident))
+
+
+def _unmark(conn) -> None:
+    marks = conn.info.get(_SQL_MARKS) if conn is not None else None
+    if marks:
+        threads, ident = marks.pop()
+        threads[ident] -= 1
+        if threads[ident] <= 0:
+            del threads[ident]
+
+
+def _unmark_sql_thread(conn, cursor, statement, parameters, context, executemany) -> None:
+    _unmark(conn)
+
+
+def _unmark_failed_sql(exception_context) -> None:
+    _unmark(exception_context.connection)
+
+
+# خيط threadpool يُحسب للطلب فقط أثناء تنفيذه استعلاماً له: بعد عودته للمجموعة قد يخدم طلباً آخر
+event.listen(Engine, "before_cursor_execute", _mark_sql_thread)
+event.listen(Engine, "after_cursor_execute", _unmark_sql_thread)
+event.listen(Engine, "handle_error", _unmark_failed_sql)
+
+
+class SamplingProfiler:
+    """
+    خيط يأخذ عينة من مكدسات خيوط الطلب على فترات ثابتة
+    threads: الخيوط التي تعمل للطلب الآن (تتغير أثناء الطلب)، والخيوط الأخرى تخدم طلبات أخرى فلا تُحسب
+    """
+
+    def __init__(self, interval: float, threads: Counter, loop_thread: int, task: "asyncio.Task"):
+        self.interval = interval
+        self.threads = threads
+        # خيط حلقة الأحداث مشترك بين الطلبات: يُحسب فقط وهو ينفذ مهمة الطلب المحلل
+        self.loop_thread = loop_thread
+        self.task = task
+        self._loop = task.get_loop()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # الخيوط التي دخلت عيناتها في التحليل
+        self.sampled_threads: Set[int] = set()
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mnam-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            threads = tuple(self.threads)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or thread_id not in threads:
+                    continue
+                if thread_id == self.loop_thread and asyncio.current_task(self._loop) is not self.task:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                self.sampled_threads.add(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, self._labels))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """حلقة ملفات على القرص: تُحذف أقدم الملفات عند تجاوز max_profiles (مشتركة بين العمال)"""
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = Path(directory or os.path.join(tempfile.gettempdir(), "mnam-profiles"))
+        self.max_profiles = max_profiles
+
+    def _files(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.json"), reverse=True)
+
+    def save(self, profile: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / f"{profile['id']}.json"
+        temp = target.with_suffix(".tmp")
+        temp.write_text(json.dumps(profile, ensure_ascii=False))
+        os.replace(temp, target)
+        for old in self._files()[self.max_profiles:]:
+            old.unlink(missing_ok=True)
+
+    def list(self) -> List[dict]:
+        """بيانات الملفات بدون المكدسات (الأحدث أولاً)"""
+        summaries = []
+        for path in self._files():
+            try:
+                profile = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            profile.pop("stacks", None)
+            profile.pop("sql", None)
+            summaries.append(profile)
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+
+profile_store = ProfileStore(settings.profiler_dir, settings.profiler_max_profiles)
+
+
+def to_collapsed(profile: dict) -> str:
+    """صيغة flamegraph: سطر لكل مكدس "frame;frame;frame count" """
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+async def _is_admin_token(scope) -> bool:
+    """التحقق من أن صاحب ترويسة X-Profile مدير (يُستدعى فقط عند وجود الترويسة)"""
+    from ..database import SessionLocal
+    from ..models.user import User, UserRole
+    from .security import verify_access_token
+
+    authorization = ""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    scheme, _, token = authorization.partition(" ")
+    payload = verify_access_token(token) if scheme.lower() == "bearer" else None
+    if not payload or not payload.get("sub"):
+        return False
+
+    def _load_role():
+        db = SessionLocal()
+        try:
+            return db.query(User.role, User.is_active).filter(User.id == payload["sub"]).first()
+        finally:
+            db.close()
+
+    user = await run_in_threadpool(_load_role)
+    return bool(user and user.is_active and user.role in (UserRole.ADMIN.value, UserRole.SYSTEM_OWNER.value))
+
+
+class ProfilerMiddleware:
+    """
+    Middleware لتحليل الطلبات المختارة
+    يجب إضافته قبل QueryStatsMiddleware (أي داخله) حتى يسجل أزمنة استعلامات الطلب
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0, interval_ms: float = 5.0, store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        if any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            if await _is_admin_token(scope):
+                trigger = "header"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sampled"
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self._profile(scope, receive, send, trigger)
+
+    async def _profile(self, scope, receive, send, trigger: str) -> None:
+        profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        stats = get_current_stats()
+        if stats is not None:
+            stats.timings = []
+        # خيط حلقة الأحداث دائماً ضمن الخيوط (ويُصفى بمهمة الطلب)
+        threads = Counter({threading.get_ident(): 1})
+        threads_token = _profiled_threads.set(threads)
+        started_at = datetime.now()
+        started = time.perf_counter()
+        profiler = SamplingProfiler(self.interval, threads, threading.get_ident(), asyncio.current_task()).start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            _profiled_threads.reset(threads_token)
+            duration = time.perf_counter() - started
+            route = scope.get("route")
+            profile = {
+                "id": profile_id,
+                "trigger": trigger,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status_code,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round(duration * 1000, 2),
+                "interval_ms": self.interval * 1000,
+                "samples": profiler.samples,
+                "threads": len(profiler.sampled_threads),
+                "pid": os.getpid(),
+                "query_count": stats.count if stats else None,
+                "db_time_ms": stats.total_time_ms if stats else None,
+                "sql": [{"statement": shape, "ms": ms} for shape, ms in (stats.timings or [])] if stats else [],
+                "stacks": dict(profiler.stacks.most_common()),
+            }
+            await run_in_threadpool(self.store.save, profile)
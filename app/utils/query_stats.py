@@ -0,0 +1,221 @@
+"""
+قياس استعلامات قاعدة البيانات لكل طلب
+Per-request SQL instrumentation with N+1 detection
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("mnam.sql")
+
+# إحصائيات الطلب الحالي (None خارج نطاق أي طلب)
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("mnam_query_stats", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST_RE = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_POSTCOMPILE_RE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """تجاوز عدد الاستعلامات المسموح به للطلب (وضع الاختبار فقط)"""
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """
+    تحويل الاستعلام إلى شكله العام (Shape):
+    إزالة القيم الحرفية وتوحيد قوائم IN والمسافات
+    حتى تتطابق الاستعلامات المتكررة التي تختلف في القيم فقط
+    """
+    shape = _STRING_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _POSTCOMPILE_RE.sub("(?)", shape)
+    shape = _PARAM_LIST_RE.sub("(?)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """إحصائيات استعلامات طلب واحد"""
+
+    __slots__ = ("count", "total_time", "shapes", "timings", "scope")
+
+    # الحد الأقصى لأزمنة الاستعلامات المفصلة المحفوظة للطلب الواحد
+    MAX_TIMINGS = 500
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, int] = {}
+        # أزمنة كل استعلام على حدة - تُفعّل فقط للطلبات التي يتم تحليلها (profiler)
+        self.timings: Optional[List[Tuple[str, float]]] = None
+        # ASGI scope للطلب (لمعرفة المسار الذي نفذ الاستعلام)
+        self.scope: Optional[dict] = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        shape = normalize_statement(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if self.timings is not None and len(self.timings) < self.MAX_TIMINGS:
+            self.timings.append((shape, round(duration * 1000, 3)))
+
+    @property
+    def total_time_ms(self) -> float:
+        return round(self.total_time * 1000, 2)
+
+    def n_plus_one_suspects(self, threshold: int) -> List[Tuple[str, int]]:
+        """الاستعلامات المتطابقة التي تكررت threshold مرة أو أكثر (اشتباه N+1)"""
+        return sorted(
+            ((shape, count) for shape, count in self.shapes.items() if count >= threshold),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+
+def get_current_stats() -> Optional[QueryStats]:
+    """إحصائيات الطلب الحالي إن وجدت"""
+    return _current_stats.get()
+
+
+def current_route() -> Optional[str]:
+    """قالب مسار الطلب الحالي (مثل /api/units/{unit_id}) أو None خارج نطاق HTTP"""
+    stats = _current_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    return getattr(route, "path", None) or stats.scope.get("path")
+
+
+def install_query_instrumentation(engine: Engine) -> None:
+    """ربط أحداث SQLAlchemy بالمحرك لقياس عدد الاستعلامات وزمنها"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+
+@contextmanager
+def track_queries():
+    """
+    تجميع الاستعلامات داخل كتلة كود (خارج نطاق HTTP)
+    مثال:
+        with track_queries() as stats:
+            ...
+        print(stats.count)
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int):
+    """فشل الاختبار إذا تجاوزت الكتلة عدد الاستعلامات المسموح"""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries, got {stats.count}: "
+            f"{stats.n_plus_one_suspects(2)[:3]}"
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware لتجميع إحصائيات الاستعلامات لكل طلب:
+    - التطوير: ترويسات X-DB-Query-Count / X-DB-Time-Ms / X-DB-N1-Suspects
+    - الإنتاج: سجل منظم (JSON) عبر logger "mnam.sql"
+    - الاختبار: رفع QueryBudgetExceeded عند تجاوز الحد (X-DB-Query-Budget أو الحد العام)
+    """
+
+    def __init__(
+        self,
+        app,
+        expose_headers: bool = True,
+        log_results: bool = False,
+        n_plus_one_threshold: int = 5,
+        enforce_budget: bool = False,
+        query_budget: int = 0
+    ):
+        self.app = app
+        self.expose_headers = expose_headers
+        self.log_results = log_results
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.enforce_budget = enforce_budget
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        stats.scope = scope
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.expose_headers:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = str(stats.total_time_ms)
+                suspects = stats.n_plus_one_suspects(self.n_plus_one_threshold)
+                if suspects:
+                    headers["X-DB-N1-Suspects"] = str(len(suspects))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+
+        if self.log_results and stats.count:
+            self._log(scope, stats)
+        if self.enforce_budget:
+            self._check_budget(scope, stats)
+
+    def _log(self, scope, stats: QueryStats) -> None:
+        route = scope.get("route")
+        suspects = stats.n_plus_one_suspects(self.n_plus_one_threshold)
+        logger.info(json.dumps({
+            "event": "sql_stats",
+            "method": scope["method"],
+            "route": getattr(route, "path", scope["path"]),
+            "query_count": stats.count,
+            "db_time_ms": stats.total_time_ms,
+            "n_plus_one_suspects": [
+                {"statement": shape[:300], "count": count} for shape, count in suspects
+            ],
+        }, ensure_ascii=False))
+
+    def _check_budget(self, scope, stats: QueryStats) -> None:
+        budget = self.query_budget
+        for name, value in scope.get("headers", []):
+            if name == b"x-db-query-budget":
+                budget = int(value)
+                break
+        if budget and stats.count > budget:
+            raise QueryBudgetExceeded(
+                f"{scope['method']} {scope['path']} issued {stats.count} queries "
+                f"(budget {budget}); repeated: {stats.n_plus_one_suspects(2)[:3]}"
+            )
@@ -0,0 +1,218 @@
+"""
+سجل الاستعلامات البطيئة
+Slow-query log: deduplicated by statement fingerprint, with background EXPLAIN capture
+
+كل استعلام يتجاوز slow_query_threshold_ms يُجمع في الذاكرة حسب شكله العام (fingerprint)،
+وخيط خلفي يكتب التجميع إلى جدول slow_queries كل slow_query_flush_seconds
+ويلتقط خطة التنفيذ للأشكال الجديدة: EXPLAIN (ANALYZE, BUFFERS) على PostgreSQL، على نفس المحرك
+الذي نفذ الاستعلام (الأساسي أو النسخة المتماثلة). لا شيء من ذلك يحدث داخل الطلب نفسه سوى مقارنة الزمن بالحد.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import case, event, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from ..config import settings
+from .query_stats import current_route, normalize_statement
+
+logger = logging.getLogger("mnam.sql")
+
+# إعادة التقاط الخطة بعد هذه المدة (تتغير الخطط مع نمو البيانات)
+EXPLAIN_MAX_AGE = timedelta(hours=24)
+# مهلة EXPLAIN ANALYZE (ينفذ الاستعلام فعلياً)
+EXPLAIN_TIMEOUT_MS = 30000
+
+_TYPE_NAMES = {str: "str", int: "int", float: "float", bool: "bool", Decimal: "decimal",
+               date: "date", datetime: "datetime", bytes: "bytes", type(None): "null"}
+
+# أنواع الاستعلامات التي تُسجل (DDL عند بدء التشغيل ليس مما يُفهرس)
+_LOGGED_STATEMENTS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# استعلامات خيط الكتابة نفسه لا تُسجل (حتى لا يسجل السجل نفسه)
+_local = threading.local()
+
+
+def fingerprint(shape: str) -> str:
+    return hashlib.blake2b(shape.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def describe_parameters(parameters, executemany: bool) -> str:
+    """أنواع المعاملات بدون قيمها: "str,int,date" (أو "executemany[n]:..." للدفعات)"""
+    if executemany:
+        sample = parameters[0] if parameters else ()
+        return f"executemany[{len(parameters)}]:{describe_parameters(sample, False)}"
+    values = parameters.values() if isinstance(parameters, dict) else (parameters or ())
+    return ",".join(_TYPE_NAMES.get(type(value), type(value).__name__) for value in values)[:500]
+
+
+class SlowQueryLog:
+    """تجميع الاستعلامات البطيئة في الذاكرة وكتابتها من خيط خلفي"""
+
+    def __init__(self, threshold_ms: float, flush_interval: float):
+        self.threshold = threshold_ms / 1000
+        self.flush_interval = flush_interval
+        self.engine: Optional[Engine] = None
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def install(self, engine: Engine) -> None:
+        """ربط أحداث المحرك؛ أول محرك (الأساسي) هو الذي يُكتب فيه السجل، وEXPLAIN على المحرك الذي نفذ الاستعلام"""
+        if not self.enabled:
+            return
+        if self.engine is None:
+            self.engine = engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._mnam_slow_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_mnam_slow_started", None)
+        if started is None or getattr(_local, "busy", False):
+            return
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.record(statement, parameters, executemany, duration, conn.engine)
+
+    def record(self, statement: str, parameters, executemany: bool, duration: float,
+               engine: Optional[Engine] = None) -> None:
+        shape = normalize_statement(statement)
+        if not shape.upper().startswith(_LOGGED_STATEMENTS):
+            return
+        key = fingerprint(shape)
+        ms = duration * 1000
+        route = current_route()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = {
+                    "statement": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "param_types": describe_parameters(parameters, executemany),
+                    # مثال واحد بقيمه الحقيقية لالتقاط الخطة (لا يُحفظ في الجدول)
+                    "sample": None if executemany else (engine or self.engine, statement, parameters),
+                }
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["last_ms"] = ms
+            entry["route"] = route or entry.get("route")
+            entry["last_seen"] = datetime.utcnow()
+        self._ensure_thread()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="mnam-slow-queries", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"⚠️  Slow-query log flush failed: {e}")
+
+    def flush(self) -> None:
+        """كتابة التجميع المعلق إلى الجدول والتقاط الخطط الناقصة"""
+        if self.engine is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        _local.busy = True
+        try:
+            for key, entry in pending.items():
+                if self._upsert(key, entry) and entry["sample"] is not None:
+                    self._explain(key, entry)
+        finally:
+            _local.busy = False
+
+    def _upsert(self, key: str, entry: dict) -> bool:
+        """زيادة العداد أو إنشاء الصف - يعيد True إذا كانت الخطة ناقصة أو قديمة"""
+        from ..models.slow_query import SlowQuery
+
+        values = dict(
+            count=SlowQuery.count + entry["count"],
+            total_ms=SlowQuery.total_ms + entry["total_ms"],
+            max_ms=case((SlowQuery.max_ms < entry["max_ms"], entry["max_ms"]), else_=SlowQuery.max_ms),
+            last_ms=entry["last_ms"],
+            last_seen=entry["last_seen"],
+            route=entry["route"],
+            param_types=entry["param_types"],
+        )
+        for _ in range(2):
+            with self.engine.begin() as conn:
+                explained_at = conn.execute(
+                    select(SlowQuery.explained_at).where(SlowQuery.fingerprint == key)
+                ).first()
+                if explained_at is not None:
+                    conn.execute(update(SlowQuery).where(SlowQuery.fingerprint == key).values(**values))
+                    return explained_at[0] is None or datetime.utcnow() - explained_at[0] > EXPLAIN_MAX_AGE
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(SlowQuery).values(
+                        fingerprint=key, statement=entry["statement"], param_types=entry["param_types"],
+                        route=entry["route"], count=entry["count"], total_ms=entry["total_ms"],
+                        max_ms=entry["max_ms"], last_ms=entry["last_ms"],
+                        first_seen=entry["last_seen"], last_seen=entry["last_seen"],
+                    ))
+                return True
+            except IntegrityError:
+                # عامل آخر أنشأ الصف في نفس اللحظة - نعيد المحاولة كتحديث
+                continue
+        return False
+
+    def _explain(self, key: str, entry: dict) -> None:
+        from ..models.slow_query import SlowQuery
+
+        engine, statement, parameters = entry["sample"]
+        dialect = engine.dialect.name
+        try:
+            # الخطة من الخادم الذي نفذ الاستعلام فعلاً (النسخة المتماثلة للقراءات الموجهة إليها)
+            with engine.connect() as conn:
+                transaction = conn.begin()
+                try:
+                    if dialect == "postgresql":
+                        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                        # ANALYZE ينفذ الاستعلام، لذلك للقراءة فقط؛ الكتابة تُشرح بدون تنفيذ
+                        is_read = entry["statement"].lstrip().upper().startswith(("SELECT", "WITH"))
+                        options = "ANALYZE, BUFFERS" if is_read else "VERBOSE"
+                        rows = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).all()
+                        plan = "\n".join(row[0] for row in rows)
+                    elif dialect == "sqlite":
+                        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                        plan = "\n".join(row[-1] for row in rows)
+                    else:
+                        return
+                finally:
+                    transaction.rollback()
+            with self.engine.begin() as conn:
+                conn.execute(
+                    update(SlowQuery).where(SlowQuery.fingerprint == key)
+                    .values(explain_plan=plan, explained_at=datetime.utcnow())
+                )
+        except Exception as e:
+            logger.warning(f"⚠️  EXPLAIN failed for slow query {key}: {e}")
+
+
+slow_query_log = SlowQueryLog(settings.slow_query_threshold_ms, settings.slow_query_flush_seconds)
+
+
+def install_slow_query_log(engine: Engine) -> None:
+    """تسجيل الاستعلامات التي تتجاوز slow_query_threshold_ms (0 = معطل)"""
+    slow_query_log.install(engine)
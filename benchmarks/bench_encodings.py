@@ -0,0 +1,101 @@
+"""
+مقارنة صيغ الاستجابة للقوائم الكبيرة: json / columnar / msgpack
+(حجم الجسم قبل وبعد gzip وزمن الترميز) لنفس الصفوف ونفس الـ schema.
+
+التشغيل:
+    python -m benchmarks.bench_encodings [--rows 10000] [--repeat 5]
+"""
+import argparse
+import gzip
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from starlette.requests import Request
+
+from app.schemas.booking import BookingResponse
+from app.schemas.employee_performance import ActivityLogResponse
+from app.schemas.transaction import TransactionResponse
+from app.schemas.unit import UnitResponse
+from app.utils.fast_response import RESPONSE_FORMATS, UNKNOWN, list_response, schema_defaults, schema_fields
+
+
+def make_rows(schema, rows: int, sample: dict):
+    """صفوف بشكل serialize_rows: قيم العينة + الافتراضي من الـ schema"""
+    defaults = schema_defaults(schema)
+    return [
+        {name: (sample[name](i) if name in sample else defaults.get(name)) for name in schema_fields(schema)}
+        for i in range(rows)
+    ]
+
+
+NOW = datetime(2025, 6, 1, 12, 30, 15, 123456)
+
+SAMPLES = {
+    "units": (UnitResponse, {
+        "id": lambda i: str(uuid.UUID(int=i)), "project_id": lambda i: str(uuid.UUID(int=i % 50)),
+        "unit_name": lambda i: f"وحدة {i}", "unit_type": lambda i: "شقة", "rooms": lambda i: 2,
+        "floor_number": lambda i: 1, "unit_area": lambda i: 120.0, "status": lambda i: "متاحة",
+        "price_days_of_week": lambda i: Decimal("300.00"), "price_in_weekends": lambda i: Decimal("450.00"),
+        "amenities": lambda i: ["واي فاي", "مسبح"], "project_name": lambda i: UNKNOWN,
+        "owner_name": lambda i: UNKNOWN, "city": lambda i: "الرياض",
+        "created_at": lambda i: NOW, "updated_at": lambda i: NOW,
+    }),
+    "bookings": (BookingResponse, {
+        "id": lambda i: str(uuid.UUID(int=i)), "unit_id": lambda i: str(uuid.UUID(int=i % 500)),
+        "guest_name": lambda i: f"ضيف {i}", "guest_phone": lambda i: f"05{i:08d}",
+        "check_in_date": lambda i: date(2025, 1, 1) + timedelta(days=i % 365),
+        "check_out_date": lambda i: date(2025, 1, 3) + timedelta(days=i % 365),
+        "total_price": lambda i: Decimal("750.00"), "status": lambda i: "مؤكد",
+        "project_id": lambda i: str(uuid.UUID(int=i % 50)), "project_name": lambda i: UNKNOWN,
+        "unit_name": lambda i: UNKNOWN, "created_at": lambda i: NOW, "updated_at": lambda i: NOW,
+    }),
+    "transactions": (TransactionResponse, {
+        "id": lambda i: str(uuid.UUID(int=i)), "project_id": lambda i: str(uuid.UUID(int=i % 50)),
+        "description": lambda i: "إيجار", "date": lambda i: date(2025, 1, 1) + timedelta(days=i % 365),
+        "amount": lambda i: Decimal("1250.00"), "type": lambda i: "دخل", "project_name": lambda i: UNKNOWN,
+        "created_at": lambda i: NOW,
+    }),
+    "activities": (ActivityLogResponse, {
+        "id": lambda i: str(uuid.UUID(int=i)), "employee_id": lambda i: str(uuid.UUID(int=i % 20)),
+        "activity_type": lambda i: "booking_created", "entity_type": lambda i: "booking",
+        "entity_id": lambda i: str(uuid.UUID(int=i + 1)), "description": lambda i: "إنشاء حجز",
+        "amount": lambda i: 750.0, "created_at": lambda i: NOW,
+    }),
+}
+
+
+def fake_request(response_format: str) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/bench",
+        "query_string": f"format={response_format}".encode(), "headers": [],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, (schema, sample) in SAMPLES.items():
+        items = make_rows(schema, args.rows, sample)
+        json_size = None
+        for response_format in RESPONSE_FORMATS:
+            request = fake_request(response_format)
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                body = list_response(request, items, schema).body
+                best = min(best, time.perf_counter() - started)
+            json_size = json_size or len(body)
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            print(f"{name:12s} {response_format:9s} {len(body) / 1024:9.1f} KiB "
+                  f"({len(body) / json_size:4.0%}) | gzip {gzipped / 1024:8.1f} KiB | "
+                  f"encode {best * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
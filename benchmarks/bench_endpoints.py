@@ -0,0 +1,235 @@
+"""
+قياس زمن نقاط الـ API الساخنة وعدد استعلاماتها على بيانات مولّدة، ومقارنتها بخط أساس محفوظ
+Endpoint benchmark suite with stored baseline (p50 / p95 / query count)
+
+يشغل التطبيق داخل نفس العملية (TestClient) على قاعدة بيانات مولّدة عبر benchmarks.seed،
+ويقرأ عدد الاستعلامات من ترويسة X-DB-Query-Count. يفشل (exit 1) إذا:
+- زاد p95 عن خط الأساس بأكثر من --tolerance (وبأكثر من 1ms حتى لا يُحسب التذبذب)
+- زاد عدد الاستعلامات عن خط الأساس
+
+التشغيل (يحتاج httpx من requirements-dev.txt):
+    python -m benchmarks.bench_endpoints                      # قاعدة مؤقتة بالحجم الافتراضي
+    python -m benchmarks.bench_endpoints --save-baseline      # تحديث benchmarks/baseline.json
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.bench_endpoints --units 1000 --bookings 500000 --years 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+_tmpdir = tempfile.mkdtemp(prefix="mnam-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app import database  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Booking, Customer, Owner, Project, Transaction, Unit, User  # noqa: E402
+from app.models.booking import BookingStatus  # noqa: E402
+from benchmarks import seed  # noqa: E402
+from benchmarks.stats import percentile  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# (الاسم، الطريقة، المسار، جسم الطلب) - القيم بين {} تُملأ من البيانات المولّدة
+ENDPOINTS = [
+    ("users_me", "GET", "/api/users/me/", None),
+    ("dashboard_summary", "GET", "/api/dashboard/summary", None),
+    ("owners_list", "GET", "/api/owners", None),
+    ("owners_select", "GET", "/api/owners/select", None),
+    ("owner_detail", "GET", "/api/owners/{owner_id}", None),
+    ("owner_projects", "GET", "/api/owners/{owner_id}/projects", None),
+    ("projects_list", "GET", "/api/projects", None),
+    ("projects_select", "GET", "/api/projects/select", None),
+    ("project_detail", "GET", "/api/projects/{project_id}", None),
+    ("units_list", "GET", "/api/units", None),
+    ("units_list_fields", "GET", "/api/units?fields=unit_name,status", None),
+    ("units_by_project", "GET", "/api/units/by-project/{project_id}", None),
+    ("units_select", "GET", "/api/units/select/{project_id}", None),
+    ("unit_detail", "GET", "/api/units/{unit_id}", None),
+    ("bookings_list", "GET", "/api/bookings", None),
+    ("bookings_monthly", "GET", "/api/bookings/monthly?year={year}&month={month}", None),
+    ("booking_detail", "GET", "/api/bookings/{booking_id}", None),
+    ("booking_availability", "GET",
+     "/api/bookings/check-availability?unit_id={unit_id}&check_in_date={today}&check_out_date={today}", None),
+    ("customers_list", "GET", "/api/customers", None),
+    ("customer_detail", "GET", "/api/customers/{customer_id}", None),
+    ("customer_bookings", "GET", "/api/customers/{customer_id}/bookings", None),
+    ("transactions_list", "GET", "/api/transactions?project_id={project_id}", None),
+    ("transaction_detail", "GET", "/api/transactions/{transaction_id}", None),
+    ("transactions_summary", "GET", "/api/transactions/summary", None),
+    ("team_achievement", "GET", "/api/transactions/team-achievement", None),
+    ("ep_my_dashboard", "GET", "/api/employee-performance/my-dashboard", None),
+    ("ep_team_overview", "GET", "/api/employee-performance/team-overview", None),
+    ("ep_employee_dashboard", "GET", "/api/employee-performance/employee/{employee_id}/dashboard", None),
+    ("ep_all_activities", "GET", "/api/employee-performance/all-activities", None),
+    ("ep_quick_stats", "GET", "/api/employee-performance/quick-stats", None),
+    # نقاط الترقيم بالمؤشر والبحث والتقارير والتسويات والتصدير
+    ("units_page", "GET", "/api/units?limit=50", None),
+    ("units_search", "GET", "/api/units/search?amenities={amenity}&limit=50", None),
+    ("owners_portfolio", "GET", "/api/owners/portfolio?limit=50", None),
+    ("owner_portfolio", "GET", "/api/owners/{owner_id}/portfolio", None),
+    ("customers_page_vip", "GET", "/api/customers?visitor_type=مميز&sort=total_revenue&limit=50", None),
+    ("customers_stats", "GET", "/api/customers/stats", None),
+    ("customers_search_name", "GET", "/api/customers/search?q={customer_name}", None),
+    ("customers_search_phone", "GET", "/api/customers/search?q={customer_phone_suffix}", None),
+    ("customer_bookings_page", "GET", "/api/customers/{customer_id}/bookings?limit=20", None),
+    ("transactions_ledger_page", "GET", "/api/transactions?limit=50&with_balance=true", None),
+    ("transactions_report", "GET", "/api/transactions/report?group_by=project,month", None),
+    # التشغيل الأول يحسب كل الكشوف، والتكرارات تقيس مسار "بدون تغيير" (البصمات)
+    ("settlements_run", "POST", "/api/settlements/run?year={year}&month={month}", None),
+    ("settlements_list", "GET", "/api/settlements?year={year}&month={month}", None),
+    ("settlement_statement", "GET", "/api/settlements/{settlement_owner_id}/statement?year={year}&month={month}", None),
+    ("export_transactions_csv", "GET", "/api/exports/transactions?project_id={project_id}&format=csv", None),
+    ("export_customers_ndjson", "GET", "/api/exports/customers?visitor_type=مميز&format=ndjson", None),
+    ("batch_app_open", "POST", "/api/batch", {"requests": [
+        {"path": "/api/users/me/"}, {"path": "/api/dashboard/summary"},
+        {"path": "/api/transactions/team-achievement"}, {"path": "/api/projects/select"},
+        {"path": "/api/owners/select"}, {"path": "/api/employee-performance/quick-stats"},
+    ]}),
+]
+
+
+def sample_ids() -> Dict[str, str]:
+    """معرفات حقيقية من البيانات المولّدة لملء المسارات"""
+    db = database.SessionLocal()
+    try:
+        unit = db.execute(select(Unit.id, Unit.project_id).limit(1)).one()
+        project = db.get(Project, unit.project_id)
+        customer = db.execute(
+            select(Customer.id, Customer.name, Customer.phone).order_by(Customer.booking_count.desc()).limit(1)
+        ).one()
+        today = date.today()
+        month_start = today.replace(day=1)
+        # مالك له حجوزات هذا الشهر (له كشف تسوية بعد settlements_run)
+        settlement_owner_id = db.execute(
+            select(Project.owner_id)
+            .join(Unit, Unit.project_id == Project.id)
+            .join(Booking, Booking.unit_id == Unit.id)
+            .where(Booking.check_in_date >= month_start, Booking.status != BookingStatus.CANCELLED.value)
+            .order_by(Booking.check_in_date)
+            .limit(1)
+        ).scalar()
+        return {
+            "unit_id": unit.id,
+            "project_id": project.id,
+            "owner_id": project.owner_id,
+            "booking_id": db.execute(select(Booking.id).where(Booking.unit_id == unit.id).limit(1)).scalar(),
+            "customer_id": customer.id,
+            "customer_name": customer.name.split()[0],
+            "customer_phone_suffix": customer.phone[-4:],
+            "settlement_owner_id": settlement_owner_id or project.owner_id,
+            "amenity": seed.AMENITIES[1],
+            "transaction_id": db.execute(select(Transaction.id).limit(1)).scalar(),
+            "employee_id": db.execute(select(User.id).where(User.username == "bench_agent_1")).scalar(),
+            "year": str(today.year),
+            "month": str(today.month),
+            "today": today.isoformat(),
+        }
+    finally:
+        db.close()
+
+
+def measure(client: TestClient, headers: dict, method: str, path: str, body, iterations: int, warmup: int):
+    latencies = []
+    query_counts = []
+    status = 0
+    for i in range(warmup + iterations):
+        started = time.perf_counter()
+        response = client.request(method, path, headers=headers, json=body)
+        elapsed = time.perf_counter() - started
+        status = response.status_code
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            query_counts.append(int(response.headers.get("x-db-query-count", 0)))
+    return {
+        "status": status,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "queries": int(statistics.median(query_counts)),
+    }
+
+
+def compare(name: str, result: dict, baseline: Optional[dict], tolerance: float) -> str:
+    if result["status"] >= 400:
+        return f"ERROR {result['status']}"
+    if baseline is None:
+        return "new"
+    problems = []
+    allowed = baseline["p95_ms"] * (1 + tolerance)
+    if result["p95_ms"] > allowed and result["p95_ms"] - baseline["p95_ms"] > 1.0:
+        problems.append(f"p95 +{(result['p95_ms'] / baseline['p95_ms'] - 1):.0%}")
+    if result["queries"] > baseline["queries"]:
+        problems.append(f"queries {baseline['queries']}→{result['queries']}")
+    return "REGRESSION " + ", ".join(problems) if problems else "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--bookings", type=int, default=30000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="الزيادة المسموحة في p95 (0.25 = 25%%)")
+    parser.add_argument("--only", default="", help="تشغيل النقاط التي يحتوي اسمها على هذا النص فقط")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--reseed", action="store_true", help="إعادة توليد البيانات حتى لو كانت القاعدة ممتلئة")
+    args = parser.parse_args()
+
+    database.engine.echo = False
+    if database.replica_engine is not None:
+        database.replica_engine.echo = False
+
+    scale = seed.Scale(units=args.units, bookings=args.bookings, years=args.years,
+                       projects=max(args.units // 10, 1), owners=max(args.units // 20, 1))
+    if args.reseed or not seed.has_data():
+        if args.reseed:
+            seed.reset()
+        started = time.perf_counter()
+        counts = seed.generate(scale)
+        print(f"✅ Seeded {counts.get('bookings', 0):,} bookings / {counts.get('units', 0):,} units "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    meta = {"units": args.units, "bookings": args.bookings, "years": args.years,
+            "database": database.engine.dialect.name}
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get("endpoints", {}) if stored.get("meta") == meta else {}
+    if stored and not baseline:
+        print(f"⚠️  Baseline was recorded with {stored.get('meta')} - comparison skipped")
+
+    ids = sample_ids()
+    results = {}
+    failed = False
+    with TestClient(app) as client:
+        token = client.post("/api/auth/login", data={"username": "admin", "password": "admin"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        print(f"{'endpoint':24s} {'p50 ms':>9s} {'p95 ms':>9s} {'queries':>8s}  status")
+        for name, method, template, body in ENDPOINTS:
+            if args.only and args.only not in name:
+                continue
+            result = measure(client, headers, method, template.format(**ids), body, args.iterations, args.warmup)
+            verdict = compare(name, result, baseline.get(name), args.tolerance)
+            failed |= verdict.startswith(("REGRESSION", "ERROR"))
+            results[name] = {key: result[key] for key in ("p50_ms", "p95_ms", "queries")}
+            print(f"{name:24s} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['queries']:8d}  {verdict}")
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        args.baseline.write_text(json.dumps({"meta": meta, "endpoints": merged}, indent=2, sort_keys=True) + "\n")
+        print(f"💾 Baseline saved to {args.baseline}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+مقارنة مسار التحويل السريع (orjson من صفوف SQL) بالمسار السابق
+(ORM + تحميل كسول للعلاقات + Pydantic + إعادة التحقق عبر response_model)
+لقوائم الوحدات والحجوزات.
+
+التشغيل:
+    python -m benchmarks.bench_list_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+_tmpdir = tempfile.mkdtemp(prefix="mnam-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Booking, Owner, Project, Unit  # noqa: E402
+from app.routers.bookings import get_all_bookings  # noqa: E402
+from app.routers.units import get_all_units  # noqa: E402
+from app.schemas.booking import BookingResponse  # noqa: E402
+from app.schemas.unit import UnitResponse  # noqa: E402
+
+engine.echo = False
+
+
+def seed(rows: int) -> None:
+    """وحدات وحجوزات بعدد rows موزعة على 50 مشروع"""
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    owners = [{"id": str(uuid.uuid4()), "owner_name": f"مالك {i}", "owner_mobile_phone": "0500000000",
+               "created_at": now, "updated_at": now} for i in range(10)]
+    projects = [{"id": str(uuid.uuid4()), "owner_id": owners[i % 10]["id"], "name": f"مشروع {i}",
+                 "city": "الرياض", "created_at": now, "updated_at": now} for i in range(50)]
+    units = [{"id": str(uuid.uuid4()), "project_id": projects[i % 50]["id"], "unit_name": f"وحدة {i}",
+              "unit_type": "شقة", "rooms": 2, "floor_number": 1, "unit_area": 120.0, "status": "متاحة",
+              "price_days_of_week": Decimal("300.00"), "price_in_weekends": Decimal("450.00"),
+              "amenities": ["واي فاي", "مسبح"], "created_at": now, "updated_at": now} for i in range(rows)]
+    bookings = [{"id": str(uuid.uuid4()), "unit_id": units[i % rows]["id"], "guest_name": f"ضيف {i}",
+                 "guest_phone": f"05{i:08d}", "check_in_date": date(2025, 1, 1) + timedelta(days=i % 365),
+                 "check_out_date": date(2025, 1, 3) + timedelta(days=i % 365), "total_price": Decimal("750.00"),
+                 "status": "مؤكد", "created_at": now, "updated_at": now} for i in range(rows)]
+    with engine.begin() as conn:
+        conn.execute(insert(Owner), owners)
+        conn.execute(insert(Project), projects)
+        conn.execute(insert(Unit), units)
+        conn.execute(insert(Booking), bookings)
+
+
+def legacy_units(db) -> bytes:
+    """المسار السابق: ORM + تحميل كسول + Pydantic + response_model"""
+    result = []
+    for unit in db.query(Unit).order_by(Unit.created_at.desc()).all():
+        project = unit.project
+        result.append(UnitResponse(
+            id=unit.id, project_id=unit.project_id, unit_name=unit.unit_name, unit_type=unit.unit_type,
+            rooms=unit.rooms, floor_number=unit.floor_number, unit_area=unit.unit_area, status=unit.status,
+            price_days_of_week=unit.price_days_of_week, price_in_weekends=unit.price_in_weekends,
+            amenities=unit.amenities or [], description=unit.description, permit_no=unit.permit_no,
+            project_name=project.name if project else "غير معروف",
+            owner_name=project.owner.owner_name if project and project.owner else "غير معروف",
+            city=project.city if project else None, created_at=unit.created_at, updated_at=unit.updated_at
+        ))
+    return _fastapi_encode(result, UnitResponse)
+
+
+def legacy_bookings(db) -> bytes:
+    result = []
+    for booking in db.query(Booking).order_by(Booking.check_in_date.desc()).all():
+        unit = booking.unit
+        project = unit.project if unit else None
+        result.append(BookingResponse(
+            id=booking.id, unit_id=booking.unit_id, guest_name=booking.guest_name,
+            guest_phone=booking.guest_phone, check_in_date=booking.check_in_date,
+            check_out_date=booking.check_out_date, total_price=booking.total_price, status=booking.status,
+            notes=booking.notes, project_id=project.id if project else "",
+            project_name=project.name if project else "غير معروف",
+            unit_name=unit.unit_name if unit else "غير معروف",
+            created_at=booking.created_at, updated_at=booking.updated_at
+        ))
+    return _fastapi_encode(result, BookingResponse)
+
+
+def _fastapi_encode(items, schema) -> bytes:
+    """ما يفعله FastAPI مع response_model: تحقق ثم تحويل ثم json.dumps"""
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(items, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fake_request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    body = b""
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            body = fn(db)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            db.close()
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    cases = [
+        ("units", legacy_units, lambda db: asyncio.run(
+            get_all_units(fake_request("/api/units"), db=db, current_user=None)).body),
+        ("bookings", legacy_bookings, lambda db: asyncio.run(
+            get_all_bookings(fake_request("/api/bookings"), db=db, current_user=None)).body),
+    ]
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, legacy, fast in cases:
+        legacy_time, legacy_body = timed(legacy, args.repeat)
+        fast_time, fast_body = timed(fast, args.repeat)
+        same = json.loads(legacy_body) == json.loads(fast_body)
+        print(f"{name:10s} legacy {legacy_time * 1000:8.1f} ms | fast {fast_time * 1000:8.1f} ms | "
+              f"x{legacy_time / fast_time:5.1f} | identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
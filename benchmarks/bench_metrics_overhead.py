@@ -0,0 +1,70 @@
+"""
+قياس كلفة MetricsMiddleware و QueryStatsMiddleware على المسار الساخن
+Measures per-request overhead of the monitoring middleware.
+
+التشغيل:
+    python -m benchmarks.bench_metrics_overhead [--requests 20000]
+
+يستدعي تطبيق ASGI مباشرة (بدون شبكة أو TestClient) حتى يظهر فرق الـ middleware فقط.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from app.utils.metrics import MetricsMiddleware
+from app.utils.query_stats import QueryStatsMiddleware
+
+
+def build_app(with_monitoring: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    if with_monitoring:
+        app.add_middleware(MetricsMiddleware)
+        app.add_middleware(QueryStatsMiddleware, expose_headers=True)
+    return app
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    """تنفيذ الطلبات بالتتابع وإرجاع متوسط الزمن لكل طلب (ميكروثانية)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/items/42", "raw_path": b"/api/items/42",
+        "root_path": "", "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # تسخين (بناء الـ middleware stack وكاش الـ labels)
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    baseline = asyncio.run(drive(build_app(False), args.requests))
+    monitored = asyncio.run(drive(build_app(True), args.requests))
+    print(f"baseline:   {baseline:8.1f} µs/request")
+    print(f"monitored:  {monitored:8.1f} µs/request")
+    print(f"overhead:   {monitored - baseline:8.1f} µs/request ({(monitored / baseline - 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
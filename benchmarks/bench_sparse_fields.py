@@ -0,0 +1,67 @@
+"""
+كلفة القوائم الكاملة مقابل ?fields= (أعمدة أقل وبدون JOIN غير لازم)
+لقوائم الوحدات والحجوزات والمشاريع.
+
+التشغيل:
+    python -m benchmarks.bench_sparse_fields [--rows 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.requests import Request
+
+from benchmarks.bench_list_serialization import seed  # noqa: F401 (يضبط قاعدة بيانات مؤقتة)
+from app.database import SessionLocal
+from app.routers.bookings import get_all_bookings
+from app.routers.projects import get_all_projects
+from app.routers.units import get_all_units
+from app.utils.query_stats import track_queries
+
+CASES = [
+    ("units", get_all_units, "/api/units", [None, "unit_name", "unit_name,project_name", "unit_name,owner_name"]),
+    ("bookings", get_all_bookings, "/api/bookings", [None, "guest_name,check_in_date", "guest_name,unit_name"]),
+    ("projects", get_all_projects, "/api/projects", [None, "name", "name,unit_count"]),
+]
+
+
+def fake_request(path: str, fields) -> Request:
+    query = f"fields={fields}".encode() if fields else b""
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query, "headers": []})
+
+
+def run(handler, path: str, fields, repeat: int):
+    best_total = best_db = float("inf")
+    body = b""
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            with track_queries() as stats:
+                started = time.perf_counter()
+                response = asyncio.run(handler(fake_request(path, fields), fields=fields, db=db, current_user=None))
+                elapsed = time.perf_counter() - started
+            body = response.body
+            best_total = min(best_total, elapsed)
+            best_db = min(best_db, stats.total_time)
+        finally:
+            db.close()
+    return best_total, best_db, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, handler, path, variants in CASES:
+        for fields in variants:
+            total, db_time, body = run(handler, path, fields, args.repeat)
+            print(f"{name:9s} fields={fields or '*':24s} total {total * 1000:8.1f} ms | "
+                  f"db {db_time * 1000:8.1f} ms | {len(body) / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
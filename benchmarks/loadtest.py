@@ -0,0 +1,366 @@
+"""
+اختبار حمل محلي متعدد العمليات بسيناريوهات استخدام واقعية
+Local multi-process load test against the gunicorn/uvicorn deployment
+
+1. يولّد بيانات في قاعدة محلية (benchmarks.seed) إذا كانت فارغة
+2. يشغل التطبيق بنفس أمر Procfile (gunicorn + UvicornWorker) على 127.0.0.1
+3. يشغل عمليات توليد حمل (--agents)، كل عملية تدير مستخدمين افتراضيين يختار كل منهم
+   سيناريو حسب الأوزان (--mix) وينفذ خطواته بأوزانها مع زمن تفكير بين الطلبات
+4. يرفع عدد المستخدمين المتزامنين على مراحل (--stages) ويطبع لكل مرحلة:
+   الإنتاجية (req/s) و p50/p95/p99 ونسبة الأخطاء لكل نقطة
+
+يعمل بالكامل بدون إنترنت (يحتاج httpx من requirements-dev.txt)، فيمكن مقارنة عدد العمال وإعدادات الـ pool:
+    python -m benchmarks.loadtest --workers 2 --stages 10:20,25:20,50:20
+    python -m benchmarks.loadtest --workers 4 --env DB_POOL_SIZE=10 --json results-w4.json
+    python -m benchmarks.loadtest --database-url postgresql://localhost/mnam_bench --mix booking_rush=1
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.stats import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# خطوات كل سيناريو: (الوزن، الاسم، الطريقة، المسار) - القيم بين {} تُختار عشوائياً من البيانات
+SCENARIOS: Dict[str, dict] = {
+    # موظف الاستقبال صباحاً: الوصول والمغادرة، بحث عن عميل، توفر الوحدات وتسجيل الدخول
+    "front_desk_morning": {
+        "user": "bench_agent_1",
+        "think": 0.3,
+        "steps": [
+            (10, "dashboard_summary", "GET", "/api/dashboard/summary"),
+            (8, "bookings_monthly", "GET", "/api/bookings/monthly?year={year}&month={month}"),
+            (6, "customer_by_phone", "GET", "/api/customers/phone/{customer_phone}"),
+            (6, "booking_detail", "GET", "/api/bookings/{booking_id}"),
+            (5, "units_select", "GET", "/api/units/select/{project_id}"),
+            (4, "check_availability", "GET",
+             "/api/bookings/check-availability?unit_id={unit_id}&check_in_date={future_in}&check_out_date={future_out}"),
+            (3, "booking_check_in", "PATCH", "/api/bookings/{booking_id}/status"),
+            (2, "my_dashboard", "GET", "/api/employee-performance/my-dashboard"),
+        ],
+    },
+    # ضغط الحجوزات: قوائم الوحدات وفحص التوفر وإنشاء حجوزات جديدة
+    "booking_rush": {
+        "user": "bench_agent_2",
+        "think": 0.1,
+        "steps": [
+            (8, "units_list", "GET", "/api/units?fields=unit_name,status,project_name,price_days_of_week"),
+            (8, "check_availability", "GET",
+             "/api/bookings/check-availability?unit_id={unit_id}&check_in_date={future_in}&check_out_date={future_out}"),
+            (5, "create_booking", "POST", "/api/bookings"),
+            (3, "projects_select", "GET", "/api/projects/select"),
+            (3, "customers_list", "GET", "/api/customers?fields=name,phone"),
+        ],
+    },
+    # شاشة المدير: لوحات الأداء والتقارير تُحدث باستمرار
+    "manager_dashboard_wall": {
+        "user": "admin",
+        "think": 1.0,
+        "steps": [
+            (4, "dashboard_summary", "GET", "/api/dashboard/summary"),
+            (3, "team_achievement", "GET", "/api/transactions/team-achievement"),
+            (3, "transactions_summary", "GET", "/api/transactions/summary"),
+            (2, "team_overview", "GET", "/api/employee-performance/team-overview"),
+            (2, "quick_stats", "GET", "/api/employee-performance/quick-stats"),
+            (1, "all_activities", "GET", "/api/employee-performance/all-activities"),
+        ],
+    },
+}
+
+
+# ======== تجهيز البيانات والخادم ========
+
+def prepare_data(args) -> dict:
+    """توليد البيانات عند الحاجة وجمع عينات المعرفات للسيناريوهات"""
+    os.environ["DATABASE_URL"] = args.database_url
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+
+    from app import database
+    from app.main import app
+    from app.models import Booking, Customer, Unit
+    from benchmarks import seed
+
+    database.engine.echo = False
+    # تشغيل بدء التطبيق مرة واحدة هنا: عمال gunicorn على قاعدة جديدة يتسابقون على إنشاء المستخدمين الافتراضيين
+    with TestClient(app):
+        pass
+    if not seed.has_data():
+        started = time.perf_counter()
+        seed.generate(seed.Scale(units=args.units, bookings=args.bookings, years=args.years,
+                                 projects=max(args.units // 10, 1), owners=max(args.units // 20, 1)))
+        print(f"✅ Seeded database in {time.perf_counter() - started:.1f}s")
+
+    with database.engine.connect() as conn:
+        units = conn.execute(select(Unit.id, Unit.project_id).limit(500)).all()
+        bookings = conn.execute(
+            select(Booking.id).where(Booking.check_in_date >= date.today()).limit(500)
+        ).scalars().all()
+        phones = conn.execute(
+            select(Customer.phone).order_by(Customer.booking_count.desc()).limit(500)
+        ).scalars().all()
+    database.engine.dispose()
+    return {"units": [tuple(row) for row in units], "bookings": list(bookings), "phones": list(phones)}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port: int, log_path: Path) -> subprocess.Popen:
+    """نفس أمر Procfile مع عدد العمال المطلوب"""
+    env = dict(os.environ, DATABASE_URL=args.database_url, ENVIRONMENT="production")
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    command = [
+        sys.executable, "-m", "gunicorn", "app.main:app",
+        "-w", str(args.workers), "-k", "uvicorn.workers.UvicornWorker",
+        "--bind", f"127.0.0.1:{port}", "--timeout", "120", "-c", str(ROOT / "gunicorn.conf.py"),
+    ]
+    log = open(log_path, "w")
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                               start_new_session=True)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ Server exited during startup - see {log_path}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    stop_server(process)
+    raise SystemExit(f"❌ Server did not become healthy - see {log_path}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def login_all(base_url: str, password: str) -> Dict[str, str]:
+    """تسجيل الدخول مرة واحدة لكل مستخدم سيناريو (bcrypt مكلف ولا يُقاس ضمن الحمل)"""
+    tokens = {}
+    for user in {scenario["user"] for scenario in SCENARIOS.values()}:
+        user_password = "admin" if user == "admin" else password
+        response = httpx.post(f"{base_url}/api/auth/login", data={"username": user, "password": user_password})
+        response.raise_for_status()
+        tokens[user] = response.json()["access_token"]
+    return tokens
+
+
+# ======== مولد الحمل (يعمل داخل كل عملية agent) ========
+
+def _render(path: str, sample: dict, rnd: random.Random) -> Tuple[str, dict]:
+    unit_id, project_id = rnd.choice(sample["units"])
+    future_in = date.today() + timedelta(days=rnd.randint(120, 1500))
+    values = {
+        "unit_id": unit_id, "project_id": project_id,
+        "booking_id": rnd.choice(sample["bookings"]) if sample["bookings"] else "missing",
+        "customer_phone": rnd.choice(sample["phones"]) if sample["phones"] else "0500000000",
+        "future_in": future_in.isoformat(),
+        "future_out": (future_in + timedelta(days=rnd.randint(1, 4))).isoformat(),
+        "year": date.today().year, "month": date.today().month,
+    }
+    return path.format(**values), values
+
+
+def _body(name: str, values: dict, rnd: random.Random):
+    if name == "create_booking":
+        return {
+            "project_id": values["project_id"], "unit_id": values["unit_id"],
+            "guest_name": "ضيف اختبار حمل", "guest_phone": f"059{rnd.randrange(10 ** 7):07d}",
+            "check_in_date": values["future_in"], "check_out_date": values["future_out"],
+            "total_price": "850.00",
+        }
+    if name == "booking_check_in":
+        return {"status": "دخول"}
+    return None
+
+
+async def _virtual_user(client, scenario: dict, token: str, sample: dict, deadline: float,
+                        rnd: random.Random, think_scale: float, results: list) -> None:
+    weights = [step[0] for step in scenario["steps"]]
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.monotonic() < deadline:
+        _, name, method, template = rnd.choices(scenario["steps"], weights=weights)[0]
+        path, values = _render(template, sample, rnd)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, headers=headers, json=_body(name, values, rnd))
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        results.append((name, (time.perf_counter() - started) * 1000, status))
+        if think_scale:
+            await asyncio.sleep(rnd.expovariate(1 / (scenario["think"] * think_scale)))
+
+
+async def _run_agent(base_url, users: List[str], tokens, sample, duration, seed, think_scale, timeout):
+    rnd = random.Random(seed)
+    results: list = []
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=len(users) or 1, max_keepalive_connections=len(users) or 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(
+            _virtual_user(client, SCENARIOS[name], tokens[SCENARIOS[name]["user"]], sample, deadline,
+                          random.Random(rnd.random()), think_scale, results)
+            for name in users
+        ))
+    return results
+
+
+def _agent_main(queue, *agent_args) -> None:
+    queue.put(asyncio.run(_run_agent(*agent_args)))
+
+
+# ======== المراحل والتقرير ========
+
+def assign_users(concurrency: int, mix: Dict[str, float], rnd: random.Random) -> List[str]:
+    names = list(mix)
+    return rnd.choices(names, weights=[mix[name] for name in names], k=concurrency)
+
+
+def run_stage(args, base_url, tokens, sample, concurrency: int, duration: float, stage_seed: int):
+    rnd = random.Random(stage_seed)
+    users = assign_users(concurrency, args.mix, rnd)
+    agents = max(1, min(args.agents, concurrency))
+    queue = multiprocessing.Queue()
+    processes = []
+    for index in range(agents):
+        process = multiprocessing.Process(target=_agent_main, args=(
+            queue, base_url, users[index::agents], tokens, sample, duration,
+            stage_seed * 1000 + index, args.think_scale, args.request_timeout,
+        ))
+        process.start()
+        processes.append(process)
+    results = []
+    for _ in processes:
+        results.extend(queue.get())
+    for process in processes:
+        process.join()
+    return results
+
+
+def summarize(results, duration: float) -> Dict[str, dict]:
+    grouped = defaultdict(list)
+    for name, latency, status in results:
+        grouped[name].append((latency, status))
+        grouped["TOTAL"].append((latency, status))
+    summary = {}
+    for name, samples in grouped.items():
+        latencies = [latency for latency, _ in samples]
+        summary[name] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / duration, 1),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            # أخطاء الخادم والاتصال؛ أخطاء 4xx (مثل تعارض الحجز) تُعرض منفصلة
+            "error_rate": round(sum(1 for _, s in samples if s == 0 or s >= 500) / len(samples), 4),
+            "client_error_rate": round(sum(1 for _, s in samples if 400 <= s < 500) / len(samples), 4),
+        }
+    return summary
+
+
+def print_stage(concurrency: int, summary: Dict[str, dict]) -> None:
+    print(f"\n== {concurrency} concurrent users ==")
+    print(f"{'endpoint':22s} {'reqs':>7s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'err%':>6s} {'4xx%':>6s}")
+    for name in sorted(summary, key=lambda n: (n == "TOTAL", n)):
+        row = summary[name]
+        print(f"{name:22s} {row['requests']:7d} {row['rps']:8.1f} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+              f"{row['p99_ms']:8.1f} {row['error_rate'] * 100:6.2f} {row['client_error_rate'] * 100:6.2f}")
+
+
+def parse_stages(value: str) -> List[Tuple[int, float]]:
+    """"10:30,25:30" → [(10 مستخدمين، 30 ثانية)، (25، 30)]"""
+    stages = []
+    for part in value.split(","):
+        users, _, seconds = part.partition(":")
+        stages.append((int(users), float(seconds or 30)))
+    return stages
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (available: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="الافتراضي: SQLite مؤقت يُولّد له بيانات")
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--bookings", type=int, default=30000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2, help="عدد عمال gunicorn (Procfile: 2)")
+    parser.add_argument("--env", action="append", default=[], help="متغيرات بيئة للخادم، مثل DB_POOL_SIZE=10")
+    parser.add_argument("--agents", type=int, default=max(1, min(4, os.cpu_count() or 1)),
+                        help="عدد عمليات توليد الحمل")
+    parser.add_argument("--stages", type=parse_stages, default=parse_stages("5:20,15:20,30:20"),
+                        help="مراحل رفع الحمل users:seconds مفصولة بفاصلة")
+    parser.add_argument("--mix", type=parse_mix,
+                        default=parse_mix("front_desk_morning=5,booking_rush=3,manager_dashboard_wall=1"))
+    parser.add_argument("--think-scale", type=float, default=1.0, help="0 = بدون زمن تفكير (أقصى حمل)")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--password", default=None, help="كلمة مرور موظفي البيانات المولّدة")
+    parser.add_argument("--json", type=Path, default=None, help="حفظ النتائج للمقارنة بين الإعدادات")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="mnam-load-"))
+    args.database_url = args.database_url or f"sqlite:///{workdir}/load.db"
+    sample = prepare_data(args)
+    from benchmarks.seed import BENCH_PASSWORD
+
+    port = free_port()
+    log_path = workdir / "server.log"
+    print(f"🚀 Starting gunicorn with {args.workers} workers on port {port} (log: {log_path})")
+    server = start_server(args, port, log_path)
+    report = {"workers": args.workers, "env": args.env, "mix": args.mix, "stages": []}
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        tokens = login_all(base_url, args.password or BENCH_PASSWORD)
+        for index, (concurrency, duration) in enumerate(args.stages):
+            results = run_stage(args, base_url, tokens, sample, concurrency, duration, index + 1)
+            summary = summarize(results, duration)
+            print_stage(concurrency, summary)
+            report["stages"].append({"users": concurrency, "seconds": duration, "endpoints": summary})
+    finally:
+        stop_server(server)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"💾 Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
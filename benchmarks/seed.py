@@ -0,0 +1,369 @@
+"""
+مولّد بيانات تجريبية بحجم قابل للضبط
+Synthetic dataset generator (owners → projects → units → multi-year bookings)
+
+يملأ قاعدة البيانات المحددة في DATABASE_URL (نفس إعداد التطبيق) بـ:
+- ملاك ومشاريع ووحدات بأنواع وأسعار متنوعة
+- حجوزات على عدة سنوات لكل وحدة بدون تداخل: الوصول يتركز يوم الخميس، الصيف والإجازات أكثر
+  إشغالاً، والسعر يُحسب لكل ليلة (ليالي الخميس والجمعة بسعر نهاية الأسبوع)
+- عملاء يتكرر بعضهم كثيراً، مع عدادات الحجوزات والإيراد متسقة مع الحجوزات
+- معاملات مالية (دخل لكل حجز مكتمل + مصروفات شهرية لكل مشروع) وسجل أنشطة الموظفين
+
+النتيجة حتمية لنفس --seed. الكتابة على دفعات حتى لا تُحمل كل الصفوف في الذاكرة.
+
+التشغيل:
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --units 1000 --bookings 500000 --years 3
+"""
+import argparse
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from app.database import Base, SessionLocal, create_tables, engine
+from app.models import (
+    ActivityType, Booking, Customer, EmployeeActivityLog, Owner, Project, Transaction, Unit, User
+)
+from app.models.user import UserRole
+from app.services.customer_search import customer_search_text, ensure_customer_search
+from app.services.monthly_pnl import ensure_monthly_pnl
+from app.services.table_versions import VERSIONED_TABLES, bump_table_versions, ensure_table_versions
+from app.services.unit_amenities import rebuild_unit_amenities, uses_jsonb
+from app.utils.security import hash_password
+
+CHUNK_SIZE = 5000
+
+# كلمة مرور حسابات الموظفين التجريبية (bench_owners_1, bench_agent_1, ...)
+BENCH_PASSWORD = "bench123"
+
+CITIES = ["الرياض", "جدة", "الدمام", "أبها", "الطائف", "العلا", "الخبر", "مكة"]
+DISTRICTS = ["النرجس", "الملقا", "الشاطئ", "الحمراء", "الروضة", "السلامة", "العليا"]
+UNIT_TYPES = [("شقة", 40), ("استوديو", 15), ("فيلا", 12), ("شاليه", 12), ("استراحة", 8),
+              ("دوبلكس", 6), ("بيت ريفي", 4), ("مخيم", 3)]
+AMENITIES = ["واي فاي", "مسبح", "موقف سيارات", "مطبخ", "غسالة", "ملعب أطفال", "شواء", "جاكوزي"]
+FIRST_NAMES = ["محمد", "عبدالله", "فهد", "سارة", "نورة", "خالد", "ريم", "سلطان", "هند", "ماجد", "لمى"]
+LAST_NAMES = ["العتيبي", "القحطاني", "الشهري", "الحربي", "الدوسري", "الغامدي", "الزهراني", "المطيري"]
+EXPENSE_CATEGORIES = [("تنظيف", 150, 600), ("صيانة", 200, 2500), ("كهرباء ومياه", 300, 1200)]
+
+# توزيع يوم الوصول (Monday=0): الخميس الأعلى ثم الأربعاء والجمعة
+CHECK_IN_WEEKDAY_WEIGHTS = [0.09, 0.09, 0.16, 0.30, 0.16, 0.10, 0.10]
+# عدد الليالي: أغلب الحجوزات 1-3 ليالٍ مع حجوزات أسبوعية قليلة
+STAY_NIGHTS = [(1, 35), (2, 30), (3, 18), (4, 7), (5, 4), (7, 4), (14, 2)]
+# معامل الطلب الموسمي لكل شهر (الصيف وإجازة منتصف السنة أعلى)
+SEASONALITY = [1.2, 0.9, 1.0, 1.0, 0.9, 1.3, 1.5, 1.5, 1.0, 0.9, 1.0, 1.3]
+# ليالي نهاية الأسبوع (الخميس والجمعة)
+WEEKEND_NIGHTS = (3, 4)
+
+
+@dataclass
+class Scale:
+    owners: int = 50
+    projects: int = 100
+    units: int = 1000
+    bookings: int = 50000
+    customers: Optional[int] = None  # الافتراضي: ربع عدد الحجوزات
+    years: int = 3
+    seed: int = 42
+
+
+class _Writer:
+    """تجميع الصفوف لكل جدول وكتابتها على دفعات"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.buffers: Dict[type, List[dict]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, model, row: dict) -> None:
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= CHUNK_SIZE:
+            self.flush(model)
+
+    def flush(self, model=None) -> None:
+        for target in ([model] if model else list(self.buffers)):
+            rows = self.buffers.get(target)
+            if rows:
+                self.conn.execute(insert(target), rows)
+                self.counts[target.__tablename__] = self.counts.get(target.__tablename__, 0) + len(rows)
+                rows.clear()
+
+
+def _weighted(rnd: random.Random, choices):
+    values, weights = zip(*choices)
+    return rnd.choices(values, weights=weights)[0]
+
+
+def _uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def _stay_price(check_in: date, nights: int, weekday_price: Decimal, weekend_price: Decimal) -> Decimal:
+    total = Decimal("0")
+    for offset in range(nights):
+        night = check_in + timedelta(days=offset)
+        total += weekend_price if night.weekday() in WEEKEND_NIGHTS else weekday_price
+    return total
+
+
+def _booking_status(rnd: random.Random, check_in: date, check_out: date, today: date) -> str:
+    if rnd.random() < 0.08:
+        return "ملغي"
+    if check_out <= today:
+        return "مكتمل" if rnd.random() < 0.6 else "خروج"
+    if check_in <= today:
+        return "دخول"
+    return "مؤكد"
+
+
+def _create_users(writer: _Writer, rnd: random.Random, now: datetime) -> Dict[str, List[str]]:
+    """موظفون تجريبيون لكل دور (كلمة المرور BENCH_PASSWORD مشفرة مرة واحدة)"""
+    hashed = hash_password(BENCH_PASSWORD)
+    staff = {UserRole.OWNERS_AGENT.value: [], UserRole.CUSTOMERS_AGENT.value: []}
+    for role, prefix, count in ((UserRole.OWNERS_AGENT.value, "bench_owners", 2),
+                                (UserRole.CUSTOMERS_AGENT.value, "bench_agent", 5)):
+        for i in range(1, count + 1):
+            user_id = _uuid(rnd)
+            writer.add(User, {
+                "id": user_id, "username": f"{prefix}_{i}", "email": f"{prefix}_{i}@bench.local",
+                "hashed_password": hashed, "first_name": rnd.choice(FIRST_NAMES),
+                "last_name": rnd.choice(LAST_NAMES), "role": role, "is_active": True,
+                "is_system_owner": False, "created_at": now, "updated_at": now,
+            })
+            staff[role].append(user_id)
+    return staff
+
+
+def _update_customer_counters(conn, customers: List[dict]) -> None:
+    """كتابة عدادات العملاء المحسوبة أثناء توليد الحجوزات (تحديث بالمفتاح على دفعات)"""
+    statement = (
+        update(Customer.__table__)
+        .where(Customer.__table__.c.id == bindparam("customer_id"))
+        .values(
+            booking_count=bindparam("booking_count"),
+            completed_booking_count=bindparam("completed_booking_count"),
+            total_revenue=bindparam("total_revenue"),
+            created_at=bindparam("first_seen"),
+        )
+    )
+    rows = [
+        {"customer_id": c["id"], "booking_count": c["booking_count"],
+         "completed_booking_count": c["completed_booking_count"],
+         "total_revenue": round(c["total_revenue"], 2), "first_seen": c["created_at"]}
+        for c in customers if c["booking_count"]
+    ]
+    for offset in range(0, len(rows), CHUNK_SIZE):
+        conn.execute(statement, rows[offset:offset + CHUNK_SIZE])
+
+
+def generate(scale: Scale) -> Dict[str, int]:
+    """توليد البيانات في قاعدة التطبيق الحالية (DATABASE_URL) ويعيد عدد الصفوف لكل جدول"""
+    rnd = random.Random(scale.seed)
+    today = date.today()
+    now = datetime.utcnow()
+    start = today - timedelta(days=365 * scale.years)
+    end = today + timedelta(days=90)
+    span_days = (end - start).days
+    customer_total = scale.customers or max(scale.bookings // 4, 1)
+
+    create_tables()
+    with engine.begin() as conn:
+        writer = _Writer(conn)
+        staff = _create_users(writer, rnd, now)
+        owners_agents = staff[UserRole.OWNERS_AGENT.value]
+        customers_agents = staff[UserRole.CUSTOMERS_AGENT.value]
+
+        # ======== الملاك والمشاريع والوحدات ========
+        owner_ids = []
+        for i in range(scale.owners):
+            owner_id = _uuid(rnd)
+            owner_ids.append(owner_id)
+            writer.add(Owner, {
+                "id": owner_id, "owner_name": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {i + 1}",
+                "owner_mobile_phone": f"05{rnd.randrange(10 ** 8):08d}",
+                "created_by_id": rnd.choice(owners_agents), "created_at": now, "updated_at": now,
+            })
+
+        project_ids = []
+        for i in range(scale.projects):
+            project_id = _uuid(rnd)
+            project_ids.append(project_id)
+            writer.add(Project, {
+                "id": project_id, "owner_id": owner_ids[i % len(owner_ids)], "name": f"مشروع {i + 1}",
+                "city": rnd.choice(CITIES), "district": rnd.choice(DISTRICTS), "contract_status": "ساري",
+                "commission_percent": Decimal(rnd.choice(["10.00", "12.50", "15.00", "20.00"])),
+                "created_by_id": rnd.choice(owners_agents), "created_at": now, "updated_at": now,
+            })
+
+        units = []
+        for i in range(scale.units):
+            weekday_price = Decimal(rnd.randrange(200, 1500, 50))
+            weekend_price = weekday_price * Decimal(rnd.choice(["1.25", "1.5", "1.75"]))
+            unit = {
+                "id": _uuid(rnd), "project_id": project_ids[i % len(project_ids)],
+                "unit_name": f"وحدة {i + 1}", "unit_type": _weighted(rnd, UNIT_TYPES),
+                "rooms": rnd.randint(1, 6), "floor_number": rnd.randint(0, 8),
+                "unit_area": float(rnd.randrange(40, 600, 10)), "status": "متاحة",
+                "price_days_of_week": weekday_price, "price_in_weekends": weekend_price.quantize(Decimal("1.00")),
+                "amenities": rnd.sample(AMENITIES, rnd.randint(1, 5)),
+                "created_by_id": rnd.choice(owners_agents), "created_at": now, "updated_at": now,
+            }
+            units.append(unit)
+            writer.add(Unit, unit)
+        writer.flush()
+        if not uses_jsonb(conn.dialect.name):
+            rebuild_unit_amenities(conn)
+
+        # ======== العملاء (العدادات تُحسب من الحجوزات في النهاية) ========
+        customers = []
+        for i in range(customer_total):
+            name, phone = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}", f"05{i:08d}"
+            customer = {
+                "id": _uuid(rnd), "name": name, "phone": phone,
+                "search_text": customer_search_text(name, phone), "booking_count": 0, "completed_booking_count": 0,
+                "total_revenue": 0.0, "is_banned": False, "is_profile_complete": False,
+                "created_at": datetime.combine(start, datetime.min.time()), "updated_at": now,
+            }
+            customers.append(customer)
+            writer.add(Customer, customer)
+            writer.add(EmployeeActivityLog, {
+                "id": _uuid(rnd), "employee_id": rnd.choice(customers_agents),
+                "activity_type": ActivityType.CUSTOMER_CREATED.value, "entity_type": "customer",
+                "entity_id": customer["id"], "description": "إضافة عميل", "amount": 0.0,
+                "created_at": customer["created_at"],
+            })
+        writer.flush()
+
+        # ======== الحجوزات: تسلسل زمني لكل وحدة بدون تداخل ========
+        avg_nights = sum(n * w for n, w in STAY_NIGHTS) / sum(w for _, w in STAY_NIGHTS)
+        base, extra = divmod(scale.bookings, max(scale.units, 1))
+        if base * avg_nights > span_days:
+            print(f"⚠️  {scale.bookings:,} bookings do not fit in {scale.years} years for "
+                  f"{scale.units:,} units - increase --years or --units")
+        for index, unit in enumerate(units):
+            target = base + (1 if index < extra else 0)
+            if not target:
+                continue
+            day = start
+            for remaining in range(target, 0, -1):
+                # الفجوة المتوسطة تُعاد حسابها حتى يتسع الباقي من المدة للحجوزات المتبقية
+                mean_gap = max(((end - day).days - remaining * avg_nights) / remaining, 0.0)
+                gap = rnd.expovariate(1 / mean_gap) if mean_gap else 0.0
+                gap /= SEASONALITY[day.month - 1]
+                # اختيار يوم الوصول ضمن نافذة قصيرة حسب توزيع أيام الأسبوع
+                window = [day + timedelta(days=int(gap) + offset) for offset in range(3 if mean_gap else 1)]
+                check_in = rnd.choices(window, weights=[CHECK_IN_WEEKDAY_WEIGHTS[d.weekday()] for d in window])[0]
+                nights = _weighted(rnd, STAY_NIGHTS)
+                check_out = check_in + timedelta(days=nights)
+                if check_out > end:
+                    break
+                day = check_out
+
+                customer = customers[int(customer_total * rnd.random() ** 1.6)]
+                status = _booking_status(rnd, check_in, check_out, today)
+                price = _stay_price(check_in, nights, unit["price_days_of_week"], unit["price_in_weekends"])
+                created_at = datetime.combine(check_in - timedelta(days=rnd.randint(0, 45)), datetime.min.time()) \
+                    + timedelta(minutes=rnd.randint(8 * 60, 23 * 60))
+                booking_id = _uuid(rnd)
+                agent_id = rnd.choice(customers_agents)
+                writer.add(Booking, {
+                    "id": booking_id, "unit_id": unit["id"], "customer_id": customer["id"],
+                    "guest_name": customer["name"], "guest_phone": customer["phone"],
+                    "check_in_date": check_in, "check_out_date": check_out, "total_price": price,
+                    "status": status, "created_by_id": agent_id, "created_at": created_at, "updated_at": created_at,
+                })
+                writer.add(EmployeeActivityLog, {
+                    "id": _uuid(rnd), "employee_id": agent_id,
+                    "activity_type": ActivityType.BOOKING_CREATED.value, "entity_type": "booking",
+                    "entity_id": booking_id, "description": "إنشاء حجز", "amount": float(price),
+                    "created_at": created_at,
+                })
+
+                customer["booking_count"] += 1
+                customer["created_at"] = min(customer["created_at"], created_at)
+                if status in ("مكتمل", "خروج"):
+                    customer["completed_booking_count"] += 1
+                    customer["total_revenue"] += float(price)
+                    writer.add(Transaction, {
+                        "id": _uuid(rnd), "project_id": unit["project_id"], "unit_id": unit["id"],
+                        "description": f"حجز {customer['name']}", "date": check_out, "amount": price,
+                        "type": "دخل", "category": "حجز", "created_at": created_at,
+                    })
+
+        writer.flush()
+        _update_customer_counters(conn, customers)
+
+        # ======== المصروفات الشهرية لكل مشروع ========
+        for project_id in project_ids:
+            month = date(start.year, start.month, 1)
+            while month <= today:
+                for category, low, high in EXPENSE_CATEGORIES:
+                    if rnd.random() < 0.7:
+                        writer.add(Transaction, {
+                            "id": _uuid(rnd), "project_id": project_id, "unit_id": None,
+                            "description": category, "date": month + timedelta(days=rnd.randint(0, 27)),
+                            "amount": Decimal(rnd.randrange(low, high, 10)), "type": "صرف",
+                            "category": category, "created_at": now,
+                        })
+                month = (month + timedelta(days=32)).replace(day=1)
+
+        writer.flush()
+        # الإدخال الجماعي لا يمر بأحداث ORM: ETag القوائم يتغير بزيادة الإصدارات يدوياً في نفس المعاملة
+        bump_table_versions(conn, VERSIONED_TABLES)
+
+    db = SessionLocal()
+    try:
+        ensure_table_versions(db)
+        ensure_customer_search(db)
+        ensure_monthly_pnl(db)
+    finally:
+        db.close()
+    return writer.counts
+
+
+def has_data() -> bool:
+    create_tables()
+    with engine.connect() as conn:
+        return bool(conn.execute(select(func.count()).select_from(Unit)).scalar())
+
+
+def reset() -> None:
+    Base.metadata.drop_all(bind=engine)
+    create_tables()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owners", type=int, default=Scale.owners)
+    parser.add_argument("--projects", type=int, default=Scale.projects)
+    parser.add_argument("--units", type=int, default=Scale.units)
+    parser.add_argument("--bookings", type=int, default=Scale.bookings)
+    parser.add_argument("--customers", type=int, default=None)
+    parser.add_argument("--years", type=int, default=Scale.years)
+    parser.add_argument("--seed", type=int, default=Scale.seed)
+    parser.add_argument("--reset", action="store_true", help="حذف كل الجداول قبل التوليد")
+    args = parser.parse_args()
+
+    engine.echo = False
+    if args.reset:
+        reset()
+    elif has_data():
+        print("❌ Database already has units - use --reset to regenerate")
+        raise SystemExit(1)
+
+    scale = Scale(owners=args.owners, projects=args.projects, units=args.units, bookings=args.bookings,
+                  customers=args.customers, years=args.years, seed=args.seed)
+    started = time.perf_counter()
+    counts = generate(scale)
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+    for table, count in sorted(counts.items()):
+        print(f"   {table:26s} {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+إحصائيات مشتركة بين سكربتات القياس
+Shared latency statistics for the benchmark scripts
+"""
+import math
+from typing import List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """المئين بطريقة أقرب رتبة (nearest-rank): أصغر قيمة تغطي pct% من العينات"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
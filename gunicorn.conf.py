@@ -0,0 +1,27 @@
+"""
+إعدادات gunicorn (يقرأها gunicorn تلقائياً من مجلد التشغيل)
+
+تجهيز مجلد مقاييس Prometheus المشترك بين العمال حتى يجمع /metrics
+قيم كل العمال وليس العامل الذي استقبل الطلب فقط.
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "mnam-prometheus")
+)
+
+
+def on_starting(server):
+    """تنظيف ملفات المقاييس من التشغيل السابق"""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """إزالة قيم Gauge الخاصة بالعامل المنتهي"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)